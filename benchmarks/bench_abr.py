@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Stalls and average bitrate of the ABR controller on bandwidth traces.
+
+Replays each trace through a segment-level player model: the next segment
+is requested at the bitrate the policy picks, its download time follows
+the trace, playback drains the buffer meanwhile and stalls when it runs
+dry. Compares mpv's default (highest variant, no adaptation), a pure
+throughput rule and the hybrid controller in src/abr.py.
+
+    python -m benchmarks.bench_abr
+    python -m benchmarks.bench_abr --trace recorded.txt [--trace other.txt]
+
+A trace file has one "<seconds> <kbit/s>" pair per line (time since start,
+piecewise constant, repeated when the session outlasts it). The synthetic
+traces hold their last rate until the session ends.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.abr import AbrController
+
+LADDER = [400_000, 800_000, 1_500_000, 3_000_000, 6_000_000]   # bits/s
+SEGMENT_SECONDS = 6.0
+SESSION_SECONDS = 600       # media time played per trace
+MAX_BUFFER = 40.0           # readahead limit, seconds
+
+
+def synthetic_traces(seed=1):
+    rng = random.Random(seed)
+    flaky = []
+    t = 0.0
+    while t < SESSION_SECONDS * 2:
+        # Good link with frequent deep dips
+        flaky.append((t, rng.choice([6000, 4500, 3500]) * 1000))
+        t += rng.uniform(5, 25)
+        flaky.append((t, rng.choice([300, 700, 1200]) * 1000))
+        t += rng.uniform(3, 15)
+    return {
+        "steady 5 Mbps": [(0, 5_000_000)],
+        "flaky": flaky,
+        "recovery 0.9 -> 8 Mbps": [(0, 900_000), (120, 8_000_000)],
+        "drop 8 -> 1 Mbps": [(0, 8_000_000), (90, 1_000_000)],
+    }
+
+
+def load_trace(path):
+    trace = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and not line.startswith('#'):
+                trace.append((float(parts[0]), float(parts[1]) * 1000))
+    trace.sort()
+    return trace
+
+
+def _rate_at(trace, t, repeat=False):
+    """(bits/s, seconds until the rate changes) at time t; repeat: loop the trace."""
+    if repeat:
+        span = trace[-1][0] + (trace[-1][0] - trace[-2][0] if len(trace) > 1 else SESSION_SECONDS)
+        local = t % max(span, 1.0)
+    else:
+        span = float('inf')     # the last rate holds
+        local = t
+    for i in range(len(trace) - 1, -1, -1):
+        if trace[i][0] <= local:
+            end = trace[i + 1][0] if i + 1 < len(trace) else span
+            return trace[i][1], max(end - local, 1e-3)
+    return trace[0][1], max(trace[0][0] - local, 1e-3)
+
+
+def download_time(trace, t, bits, repeat=False):
+    """Seconds to download `bits` starting at time t."""
+    elapsed = 0.0
+    while bits > 0:
+        rate, left = _rate_at(trace, t + elapsed, repeat)
+        if rate * left >= bits:
+            return elapsed + bits / rate
+        bits -= rate * left
+        elapsed += left
+    return elapsed
+
+
+class FixedPolicy:
+    """mpv's default: hls-bitrate=max, never adapts."""
+
+    def __init__(self, ladder):
+        self.ladder = sorted(ladder)
+        self.switches = 0
+
+    def choose(self, buffered):
+        return len(self.ladder) - 1
+
+    def add_sample(self, bits_per_second, seconds):
+        pass
+
+
+class ThroughputPolicy(AbrController):
+    """Throughput rule only (no buffer term)."""
+
+    def choose(self, buffered):
+        index = self._throughput_index()
+        if index != self.index:
+            self.switches += 1
+            self.index = index
+        return index
+
+
+def simulate(trace, policy, repeat=False):
+    segments = int(SESSION_SECONDS / SEGMENT_SECONDS)
+    t = 0.0
+    buffer = 0.0
+    playing = False
+    startup = None
+    stalls = 0
+    stall_time = 0.0
+    bitrates = []
+    for _ in range(segments):
+        # Readahead limit: wait (playing) until there is room for a segment
+        if buffer > MAX_BUFFER - SEGMENT_SECONDS:
+            wait = buffer - (MAX_BUFFER - SEGMENT_SECONDS)
+            t += wait
+            buffer -= wait
+        index = policy.choose(buffer)
+        bitrate = policy.ladder[index]
+        bits = bitrate * SEGMENT_SECONDS
+        took = download_time(trace, t, bits, repeat)
+        if playing:
+            if took > buffer:
+                stalls += 1
+                stall_time += took - buffer
+                buffer = 0.0
+            else:
+                buffer -= took
+        t += took
+        buffer += SEGMENT_SECONDS
+        policy.add_sample(bits / took, took)
+        bitrates.append(bitrate)
+        if not playing:
+            playing = True
+            if startup is None:
+                startup = t
+    watch = SESSION_SECONDS + stall_time
+    return {
+        "avg_bitrate": sum(bitrates) / len(bitrates),
+        "stalls": stalls,
+        "stall_time": stall_time,
+        "ratio": stall_time / watch,
+        "startup": startup,
+        "switches": policy.switches,
+    }
+
+
+def run(traces, repeat=False):
+    print(f"ladder {', '.join(f'{b / 1e6:g}' for b in LADDER)} Mbps, {SEGMENT_SECONDS:g}s segments, "
+          f"{SESSION_SECONDS}s sessions, {MAX_BUFFER:g}s max buffer")
+    policies = (
+        ("mpv (max)", lambda: FixedPolicy(LADDER)),
+        ("throughput", lambda: ThroughputPolicy(LADDER, SEGMENT_SECONDS)),
+        ("hybrid (BOLA)", lambda: AbrController(LADDER, SEGMENT_SECONDS)),
+    )
+    for name, trace in traces.items():
+        print(f"\n{name}")
+        print(f"{'policy':>14} | {'avg bitrate':>11} | {'stalls':>6} | {'stall time':>10} | "
+              f"{'rebuffer':>8} | {'startup':>7} | {'switches':>8}")
+        for label, make in policies:
+            r = simulate(trace, make(), repeat)
+            print(f"{label:>14} | {r['avg_bitrate'] / 1e6:>6.2f} Mbps | {r['stalls']:>6} | "
+                  f"{r['stall_time']:>8.1f} s | {r['ratio'] * 100:>7.2f}% | {r['startup']:>5.2f} s | {r['switches']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--trace", action="append", help="bandwidth trace file (seconds kbit/s per line)")
+    args = parser.parse_args()
+    if args.trace:
+        run({os.path.basename(p): load_trace(p) for p in args.trace}, repeat=True)
+    else:
+        run(synthetic_traces())
+
+
+if __name__ == "__main__":
+    main()
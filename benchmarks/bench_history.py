@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Per-tick latency of history progress updates.
+
+Compares the old full-file load/dump implementation against HistoryStore
+at 50, 5,000 and 50,000 entries.
+
+    python -m benchmarks.bench_history
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.history_store import HistoryStore
+
+SIZES = [50, 5000, 50000]
+TICKS = 50
+
+
+def make_history(n):
+    now = datetime.now().isoformat()
+    return [{"url": f"https://cdn.example.com/ch{i}/index.m3u8?exp=1999999999",
+             "name": f"Channel {i}", "timestamp": now, "last_position": i}
+            for i in range(n)]
+
+
+# Previous utils.py implementation, kept here as the baseline
+def legacy_update_history_progress(path, url, position):
+    with open(path, 'r', encoding='utf-8') as f:
+        history = json.load(f)
+    for item in history:
+        if item['url'] == url:
+            item['last_position'] = position
+            item['timestamp'] = datetime.now().isoformat()
+            break
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+
+
+def measure(fn, ticks):
+    samples = []
+    for i in range(ticks):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def run():
+    print(f"{'entries':>8} | {'legacy mean':>12} {'p95':>9} | {'store mean':>11} {'p95':>9} | {'flush':>9}")
+    for n in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "history.json")
+            items = make_history(n)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(items, f, indent=2)
+            # Middle of the list: average position for the legacy linear scan
+            url = items[n // 2]['url']
+
+            ticks = TICKS if n < 50000 else 10
+            legacy = measure(lambda i: legacy_update_history_progress(path, url, i), ticks)
+
+            store = HistoryStore(path, max_entries=None, flush_delay=3600)
+            store.load()
+            fast = measure(lambda i: store.update_position(url, i), TICKS)
+
+            t0 = time.perf_counter()
+            store.flush()
+            flush_ms = (time.perf_counter() - t0) * 1000
+            store.close()
+
+        print(f"{n:>8} | {legacy[0]:>9.3f} ms {legacy[1]:>6.3f} ms | "
+              f"{fast[0]:>8.4f} ms {fast[1]:>6.4f} ms | {flush_ms:>6.3f} ms")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Refresh time of the history panel for 50, 1,000 and 10,000 items.
+
+Compares the old rebuild-every-row approach with the virtualized
+HistoryPanel. Needs a display (Tk).
+
+    python -m benchmarks.bench_history_panel
+"""
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import COLORS
+from src.ui_components import HistoryPanel, HistoryItemRow
+
+SIZES = [50, 1000, 10000]
+REPEAT = 3
+
+
+def make_items(n):
+    return [{"url": f"https://cdn.example.com/ch{i}/index.m3u8?exp={1999999999 + i}",
+             "name": f"Channel {i}", "last_position": i} for i in range(n)]
+
+
+def legacy_update_history(panel, items):
+    """Previous HistoryPanel.update_history: destroy and rebuild every row."""
+    frame = panel.list_container.scrollable_frame
+    for widget in frame.winfo_children():
+        widget.destroy()
+    for i, item in enumerate(items):
+        row = HistoryItemRow(frame, item, panel.load_callback, panel.delete_callback, i, bg=COLORS['bg'])
+        row.pack(fill=tk.X, expand=True)
+
+
+def timed(root, fn):
+    t0 = time.perf_counter()
+    fn()
+    root.update_idletasks()
+    return (time.perf_counter() - t0) * 1000
+
+
+def run():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available: {e}")
+        return
+    root.geometry("1000x400")
+    noop = lambda *a: None
+
+    print(f"{'items':>7} | {'legacy':>10} | {'virtual':>10} | {'scroll 1 row':>12}")
+    for n in SIZES:
+        items = make_items(n)
+
+        legacy = HistoryPanel(root, noop, noop, noop)
+        legacy.pack(fill=tk.BOTH, expand=True)
+        root.update()
+        t_legacy = min(timed(root, lambda: legacy_update_history(legacy, items)) for _ in range(REPEAT if n < 10000 else 1))
+        legacy.destroy()
+
+        panel = HistoryPanel(root, noop, noop, noop)
+        panel.pack(fill=tk.BOTH, expand=True)
+        root.update()
+        t_virtual = min(timed(root, lambda: panel.update_history(items)) for _ in range(REPEAT))
+        t_scroll = timed(root, lambda: panel.list_container.yview("scroll", 1, "units"))
+        panel.destroy()
+
+        print(f"{n:>7} | {t_legacy:>7.1f} ms | {t_virtual:>7.2f} ms | {t_scroll:>9.2f} ms")
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+HLS parser throughput and memory over synthetic playlists.
+
+    python -m benchmarks.bench_hls_parser
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.hls_parser import parse_playlist
+
+SIZES = [10000, 50000, 200000]
+
+
+def make_media_playlist(n, encrypted=True):
+    lines = ["#EXTM3U", "#EXT-X-VERSION:4", "#EXT-X-TARGETDURATION:6",
+             "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:VOD"]
+    for i in range(n):
+        if encrypted and i % 500 == 0:
+            lines.append(f'#EXT-X-KEY:METHOD=AES-128,URI="key{i // 500}.bin",IV=0x{i:032x}')
+        if i and i % 2000 == 0:
+            lines.append("#EXT-X-DISCONTINUITY")
+        lines.append("#EXTINF:6.006,")
+        if i % 3 == 0:
+            lines.append(f"#EXT-X-BYTERANGE:{188 * 1000}@{188 * 1000 * i}")
+        lines.append(f"seg_{i:06d}.ts")
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines)
+
+
+def make_master_playlist(n):
+    lines = ["#EXTM3U"]
+    for i in range(n):
+        bw = 200000 * (i + 1)
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bw},RESOLUTION={160 * (i + 1)}x{90 * (i + 1)},CODECS="avc1.64001f,mp4a.40.2"')
+        lines.append(f"v{i}/index.m3u8")
+    return "\n".join(lines)
+
+
+def run():
+    base = "https://cdn.example.com/vod/title/index.m3u8"
+
+    text = make_master_playlist(12)
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        pl = parse_playlist(text, base)
+    print(f"master (12 variants): {(time.perf_counter() - t0):.3f} ms/parse, top={pl.sorted_variants()[0].label()}")
+
+    print(f"{'segments':>9} | {'size':>8} | {'parse':>9} | {'segments/s':>11} | {'mem/segment':>11}")
+    for n in SIZES:
+        text = make_media_playlist(n)
+        t0 = time.perf_counter()
+        pl = parse_playlist(text, base)
+        elapsed = time.perf_counter() - t0
+        del pl
+
+        # Separate run for memory, tracemalloc slows parsing down a lot
+        tracemalloc.start()
+        pl = parse_playlist(text, base)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(pl.segments) == n
+        print(f"{n:>9} | {len(text) / 1e6:>6.1f}MB | {elapsed * 1000:>6.1f} ms | "
+              f"{n / elapsed:>11,.0f} | {peak / n:>9.0f} B")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Back-to-back load latency: fresh connections vs the shared keep-alive client.
+
+A "load" is what happens before the first frame: preflight the master
+playlist, fetch the media playlist, fetch the first segment. The local
+server charges CONNECT_COST once per TCP connection to stand in for the
+TCP + TLS handshake to a remote CDN.
+
+    python -m benchmarks.bench_http_client
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from src.http_client import HttpClient
+
+CONNECT_COST = 0.08     # seconds per new connection (handshake stand-in)
+REQUEST_COST = 0.02     # seconds per request (server think time)
+LOADS = 10
+
+MASTER = b"#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=2000000,RESOLUTION=1280x720\nv720/index.m3u8\n"
+MEDIA = b"#EXTM3U\n#EXT-X-TARGETDURATION:6\n" + b"".join(
+    b"#EXTINF:6.0,\nseg%d.ts\n" % i for i in range(100)) + b"#EXT-X-ENDLIST\n"
+SEGMENT = b"\0" * (512 * 1024)
+
+
+class _Origin(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        time.sleep(CONNECT_COST)
+        super().setup()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(REQUEST_COST)
+        if self.path.endswith("master.m3u8"):
+            body, ctype = MASTER, "application/vnd.apple.mpegurl"
+        elif self.path.endswith(".m3u8"):
+            body, ctype = MEDIA, "application/vnd.apple.mpegurl"
+        else:
+            body, ctype = SEGMENT, "video/mp2t"
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def load_fresh(base):
+    """Previous behaviour: module-level requests calls, new connection each time."""
+    requests.head(f"{base}/master.m3u8", timeout=10, allow_redirects=True)
+    requests.get(f"{base}/master.m3u8", timeout=10)
+    requests.get(f"{base}/v720/index.m3u8", timeout=10)
+    requests.get(f"{base}/v720/seg0.ts", timeout=10)
+
+
+def load_shared(client, base):
+    client.get(f"{base}/master.m3u8")
+    client.get(f"{base}/v720/index.m3u8")
+    client.get(f"{base}/v720/seg0.ts")
+
+
+def measure(fn):
+    samples = []
+    for _ in range(LOADS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def run():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # "localhost" so name resolution is part of the measurement
+    base = f"http://localhost:{server.server_address[1]}"
+
+    fresh = measure(lambda: load_fresh(base))
+
+    client = HttpClient()
+    shared = measure(lambda: load_shared(client, base))
+    client.close()
+
+    print(f"connect cost {CONNECT_COST * 1000:.0f} ms, request cost {REQUEST_COST * 1000:.0f} ms, "
+          f"{LOADS} back-to-back loads (HTTP/2: {client.http2})")
+    print(f"{'mode':>8} | {'first':>9} | {'median':>9} | {'mean':>9}")
+    for name, s in (("fresh", fresh), ("shared", shared)):
+        print(f"{name:>8} | {s[0]:>6.1f} ms | {statistics.median(s):>6.1f} ms | {statistics.mean(s):>6.1f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Time-to-full-buffer and stalls with and without segment prefetching.
+
+Starts a local origin that injects per-request latency and throttles each
+connection, then plays a simulated HLS stream through SegmentPrefetcher the
+way mpv would: one segment request at a time, readahead up to a buffer target.
+
+    python -m benchmarks.bench_prefetch
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.hls_proxy import HlsProxy, SegmentCache
+from src.prefetcher import SegmentPrefetcher
+
+LATENCY = 0.3               # seconds before the first byte
+CONN_RATE = 1024 * 1024     # bytes/s per connection
+SEGMENT_BYTES = 256 * 1024
+SEGMENT_SECONDS = 0.5       # media time per segment (scaled down)
+SEGMENTS = 40
+BUFFER_TARGET = 4.0         # seconds of media the player reads ahead
+START_THRESHOLD = 1.0       # seconds buffered before playback (re)starts
+
+
+class _Origin(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []           # paths asked for, in order
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        _Origin.requests.append(self.path)
+        time.sleep(LATENCY)
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp2t")
+        self.send_header("Content-Length", str(SEGMENT_BYTES))
+        self.end_headers()
+        chunk = 16 * 1024
+        sent = 0
+        while sent < SEGMENT_BYTES:
+            self.wfile.write(b'\0' * chunk)
+            sent += chunk
+            time.sleep(chunk / CONN_RATE)
+
+
+def fetch(url):
+    t0 = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=30) as r:
+        ttfb = time.perf_counter() - t0
+        return r.status, r.headers.get('Content-Type'), r.read(), ttfb
+
+
+def simulate(base, workers):
+    tmp = tempfile.mkdtemp()
+    cache = SegmentCache(tmp, 512 * 1024 * 1024, 0)
+    urls = [f"{base}/seg{i}.ts" for i in range(SEGMENTS)]
+    prefetcher = None
+    if workers:
+        prefetcher = SegmentPrefetcher(cache, fetch, max_workers=workers)
+        prefetcher.set_budget(BUFFER_TARGET / SEGMENT_SECONDS * SEGMENT_BYTES)
+        prefetcher.set_playlist(f"{base}/index.m3u8", urls)
+
+    start = time.perf_counter()
+    buffered = 0.0          # media seconds downloaded
+    position = 0.0          # media seconds played
+    playing = False
+    last = start
+    stalls = 0
+    stall_time = 0.0
+    stall_started = None
+    full_buffer_at = None
+
+    def advance(now):
+        nonlocal position, last, playing, stalls, stall_started
+        if playing:
+            position = min(buffered, position + (now - last))
+            if position >= buffered and buffered < SEGMENTS * SEGMENT_SECONDS:
+                playing = False
+                stalls += 1
+                stall_started = now
+        last = now
+
+    for url in urls:
+        # Readahead limit, like demuxer-readahead-secs
+        while buffered - position >= BUFFER_TARGET:
+            time.sleep(0.01)
+            advance(time.perf_counter())
+
+        key = SegmentCache.key_for(url)
+        if prefetcher:
+            prefetcher.get(url, key)
+        else:
+            fetch(url)
+        now = time.perf_counter()
+        advance(now)
+        buffered += SEGMENT_SECONDS
+
+        if full_buffer_at is None and buffered - position >= BUFFER_TARGET:
+            full_buffer_at = now - start
+        if not playing and buffered - position >= START_THRESHOLD:
+            if stall_started is not None:
+                stall_time += now - stall_started
+                stall_started = None
+            playing = True
+
+    if prefetcher:
+        prefetcher.shutdown()
+    shutil.rmtree(tmp, ignore_errors=True)
+    return full_buffer_at, stalls, stall_time, time.perf_counter() - start
+
+
+def check_proxy_ranges(base):
+    """mpv's whole-segment GETs carry "Range: bytes=0-"; they must still be served by the prefetcher."""
+    tmp = tempfile.mkdtemp()
+    proxy = HlsProxy(SegmentCache(tmp, 64 * 1024 * 1024, 0), prefetch_workers=4)
+    proxy.start()
+    urls = [f"{base}/range{i}.ts" for i in range(4)]
+    proxy.prefetcher.set_budget(len(urls) * SEGMENT_BYTES)
+    proxy.prefetcher.set_playlist(f"{base}/range.m3u8", urls)
+    _Origin.requests.clear()
+    try:
+        for url in urls:
+            req = urllib.request.Request(proxy._proxied('s', url), headers={"Range": "bytes=0-"})
+            with urllib.request.urlopen(req, timeout=30) as r:
+                assert len(r.read()) == SEGMENT_BYTES
+            time.sleep(LATENCY + SEGMENT_BYTES / CONN_RATE + 0.2)  # let the prefetch finish
+        ready = proxy.prefetcher.stats()["ready"]
+        fetched = len(_Origin.requests)
+    finally:
+        proxy.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+    assert fetched == len(urls), f"origin saw {fetched} requests for {len(urls)} segments"
+    assert ready == len(urls) - 1, f"only {ready} of {len(urls) - 1} Range: bytes=0- requests hit a prefetched entry"
+    print(f"Range: bytes=0- requests: {ready}/{len(urls) - 1} served from prefetched entries, "
+          f"{fetched} origin requests")
+
+
+def run():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"latency {LATENCY * 1000:.0f} ms, {CONN_RATE // 1024} KB/s per connection, "
+          f"{SEGMENT_BYTES // 1024} KB / {SEGMENT_SECONDS}s segments")
+    print(f"{'mode':>14} | {'full buffer':>11} | {'stalls':>6} | {'stall time':>10} | {'total':>7}")
+    for workers in (0, 8):
+        full, stalls, stall_time, total = simulate(base, workers)
+        mode = "sequential" if not workers else f"prefetch x{workers}"
+        full_text = f"{full:.2f} s" if full is not None else "never"
+        print(f"{mode:>14} | {full_text:>11} | {stalls:>6} | {stall_time:>8.2f} s | {total:>5.1f} s")
+    check_proxy_ranges(base)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tk canvas operations and time per seek bar update.
+
+Compares the old BufferedScale.draw (delete("all") and recreate every item
+on each set_progress / set_buffer) with the persistent-item BufferedScale.
+One "frame" is a set_progress + set_buffer pair, as update_player_info does,
+or a burst of set_progress calls, as a drag does, followed by
+update_idletasks(). Needs a display (Tk).
+
+    python -m benchmarks.bench_seekbar
+"""
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import COLORS
+from src.ui_components import BufferedScale
+
+FRAMES = 2000
+DRAG_BURST = 10     # motion events per frame while dragging
+
+
+class _CountingTk:
+    """Wraps a widget's Tcl interpreter and counts canvas commands."""
+
+    def __init__(self, tk_app, path):
+        self._tk = tk_app
+        self._path = path
+        self.calls = 0
+
+    def call(self, *args):
+        if args and args[0] == self._path:
+            self.calls += 1
+        return self._tk.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._tk, name)
+
+
+class LegacyScale(BufferedScale):
+    """Previous BufferedScale: immediate full redraw on every change."""
+
+    def set_progress(self, value):
+        if not self.is_dragging:
+            self.progress = max(0, min(100, value))
+            self.legacy_draw()
+
+    def set_buffer(self, value):
+        self.legacy_buffer = max(0, min(100, value))
+        self.legacy_draw()
+
+    def legacy_draw(self):
+        self.delete("all")
+        w = self.winfo_width()
+        h = self.winfo_height()
+        cy = h / 2
+        y1, y2 = cy - 2, cy + 2
+        radius = 6
+        padding = radius + 1
+        track_w = max(0, w - (padding * 2))
+        self.create_rectangle(padding, y1, padding + track_w, y2, fill=COLORS['seekbar_bg'], outline="", tags="track")
+        buffer = getattr(self, 'legacy_buffer', 0)
+        if buffer > 0:
+            self.create_rectangle(padding, y1, padding + (buffer / 100) * track_w, y2, fill=COLORS['text_gray'], outline="")
+        pw = (self.progress / 100) * track_w
+        if self.progress > 0:
+            self.create_rectangle(padding, y1, padding + pw, y2, fill=COLORS['accent'], outline="")
+        self.create_oval(padding + pw - radius, cy - radius, padding + pw + radius, cy + radius,
+                         fill='white', outline=COLORS['accent'], width=1)
+
+
+def make(root, cls):
+    scale = cls(root, width=800, height=20)
+    scale.pack(fill=tk.X)
+    root.update()
+    counter = _CountingTk(scale.tk, str(scale))
+    scale.tk = counter
+    return scale, counter
+
+
+def playback(root, scale):
+    for i in range(FRAMES):
+        scale.set_progress(i * 100 / FRAMES)
+        scale.set_buffer(min(100, i * 100 / FRAMES + 5))
+        root.update_idletasks()
+
+
+def drag(root, scale):
+    for i in range(FRAMES):
+        for j in range(DRAG_BURST):
+            scale.set_progress((i * DRAG_BURST + j) * 100 / (FRAMES * DRAG_BURST))
+        root.update_idletasks()
+
+
+def run():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available: {e}")
+        return
+    root.geometry("820x40")
+
+    print(f"{FRAMES} frames, drag burst {DRAG_BURST}")
+    print(f"{'scenario':>10} | {'impl':>7} | {'canvas cmds/frame':>17} | {'us/frame':>9}")
+    for name, scenario in (("playback", playback), ("drag", drag)):
+        for label, cls in (("legacy", LegacyScale), ("new", BufferedScale)):
+            scale, counter = make(root, cls)
+            t0 = time.perf_counter()
+            scenario(root, scale)
+            elapsed = time.perf_counter() - t0
+            print(f"{name:>10} | {label:>7} | {counter.calls / FRAMES:>17.1f} | {elapsed / FRAMES * 1e6:>9.1f}")
+            scale.destroy()
+    root.destroy()
+
+
+if __name__ == "__main__":
+    run()
@@ -1,11 +1,82 @@
 #!/usr/bin/env python3
-import tkinter as tk
-from src.app_gui import M3U8StreamingPlayer
+import argparse
+import sys
+from src.startup_profile import profiler
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="M3U8 Streaming Player")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print import / Tk / player init timings once the player is ready")
+    parser.add_argument("--headless", metavar="URL",
+                        help="play URL without a window (null video output) and write a JSON report")
+    parser.add_argument("--record", metavar="URL",
+                        help="download the HLS stream's segments to --output without playing it")
+    parser.add_argument("--output", default="recording.mp4",
+                        help="record: output file (.mp4 is remuxed with ffmpeg, .ts is kept as is)")
+    parser.add_argument("--workers", type=int, default=6, help="record: parallel segment downloads")
+    parser.add_argument("--duration", type=float, default=60,
+                        help="headless: seconds of playback to measure (default 60)")
+    parser.add_argument("--report", default="headless_report.json",
+                        help="headless: report file, '-' for stdout")
+    parser.add_argument("--referer", default="", help="headless / record: Referer header")
+    parser.add_argument("--user-agent", default="Chrome",
+                        help="headless / record: Chrome / Firefox / Safari / Edge or a full UA string")
+    parser.add_argument("--cache-mb", type=int, help="headless: forward cache (demuxer-max-bytes)")
+    parser.add_argument("--back-cache-mb", type=int, help="headless: back cache (demuxer-max-back-bytes)")
+    parser.add_argument("--proxy", action="store_true", help="headless: route HLS through the local caching proxy")
+    parser.add_argument("--start", type=float,
+                        help="headless: open at this offset in seconds (measures resumed vs fresh startup)")
+    return parser.parse_args()
+
+def run_headless(args):
+    # No Tk import on this path, it has to run on machines without a display
+    from src.headless import run_headless
+    return run_headless(args.headless, report_path=args.report, duration=args.duration,
+                        referer=args.referer, user_agent=args.user_agent,
+                        max_bytes_mb=args.cache_mb, max_back_bytes_mb=args.back_cache_mb,
+                        use_proxy=args.proxy, start=args.start)
+
+def run_record(args):
+    from src.hls_recorder import HlsRecorder
+    from src.http_client import get_client
+    from src.config import USER_AGENTS
+    client = get_client().with_headers({"Referer": args.referer,
+                                        "User-Agent": USER_AGENTS.get(args.user_agent, args.user_agent)})
+    recorder = HlsRecorder(args.record, args.output, workers=args.workers, client=client,
+                           on_progress=lambda p: print("\r" + p.describe(), end="", flush=True))
+    try:
+        path = recorder.run()
+    except KeyboardInterrupt:
+        print("\nInterrupted, run the same command again to resume")
+        return 1
+    except Exception as e:
+        print(f"\nRecording failed: {e} (run the same command again to resume)")
+        return 2
+    print(f"\nSaved to {path}")
+    return 0
 
 def main():
-    
+    args = parse_args()
+    if args.headless:
+        sys.exit(run_headless(args))
+    if args.record:
+        sys.exit(run_record(args))
+
+    profiler.enabled = args.profile_startup
+
+    profiler.start("imports")
+    import tkinter as tk
+    from src.app_gui import M3U8StreamingPlayer
+    profiler.end("imports")
+
+    profiler.start("tk construction")
     root = tk.Tk()
+    profiler.end("tk construction")
+
+    profiler.start("ui construction")
     app = M3U8StreamingPlayer(root)
+    profiler.end("ui construction")
+
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
 
@@ -0,0 +1,142 @@
+import math
+
+# -------------------------------------------------
+#  Adaptive bitrate (ABR) controller
+# -------------------------------------------------
+#  Hybrid throughput / buffer rule, after dash.js "DYNAMIC":
+#  - Low buffer: throughput rule, the highest variant below safety x the
+#    conservative estimate (min of a fast and a slow EWMA).
+#  - Once the buffer reaches buffer_low: BOLA. Each variant m has utility
+#    u_m = ln(bitrate_m / bitrate_0) + 1 and the pick maximises
+#        (V * (u_m + gp) - buffer) / bitrate_m
+#    with gp, V set so that buffer_low selects the lowest variant and
+#    buffer_target the highest. Up-switches are capped by the optimistic
+#    estimate (max of the EWMAs), down-switches are never held back, and
+#    a variant whose next segment would take longer to download than the
+#    buffer lasts (at the conservative estimate) is never picked.
+#  - Back to the throughput rule when the buffer falls below buffer_low / 2.
+#  Pure logic: the GUI feeds samples and buffer levels and applies the
+#  choice at segment boundaries; benchmarks/bench_abr.py replays traces.
+
+
+class ThroughputEstimator:
+    """Fast and slow EWMA of throughput samples (bits/s), weighted by sample duration."""
+
+    def __init__(self, fast_half_life=3.0, slow_half_life=8.0):
+        self.fast_half_life = fast_half_life
+        self.slow_half_life = slow_half_life
+        self.fast = None
+        self.slow = None
+
+    @staticmethod
+    def _ewma(old, sample, seconds, half_life):
+        if old is None:
+            return sample
+        alpha = 1 - math.pow(0.5, seconds / half_life)
+        return old + alpha * (sample - old)
+
+    def add(self, bits_per_second, seconds=1.0):
+        if not bits_per_second or bits_per_second <= 0:
+            return
+        self.fast = self._ewma(self.fast, bits_per_second, seconds, self.fast_half_life)
+        self.slow = self._ewma(self.slow, bits_per_second, seconds, self.slow_half_life)
+
+    def conservative(self):
+        return None if self.fast is None else min(self.fast, self.slow)
+
+    def optimistic(self):
+        return None if self.fast is None else max(self.fast, self.slow)
+
+
+class AbrController:
+    """
+    bandwidths: the variant ladder (BANDWIDTH, bits/s). Indexes returned by
+    choose() refer to the ladder sorted ascending (self.ladder).
+    """
+
+    def __init__(self, bandwidths, segment_duration=6.0, buffer_low=10.0, buffer_target=30.0,
+                 safety=0.85, estimator=None):
+        self.segment_duration = segment_duration
+        self.buffer_low = buffer_low
+        self.buffer_target = max(buffer_target, buffer_low + 1)
+        self.safety = safety
+        self.estimator = estimator or ThroughputEstimator()
+        self.mode = "throughput"
+        self.index = 0
+        self.switches = 0
+        self.set_ladder(bandwidths)
+
+    def set_ladder(self, bandwidths):
+        self.ladder = sorted(b for b in bandwidths if b) or [1]
+        self.index = min(self.index, len(self.ladder) - 1)
+        low = self.ladder[0]
+        self.utilities = [math.log(b / low) + 1 for b in self.ladder]
+        # buffer_low -> lowest variant, buffer_target -> highest
+        self.gp = (self.utilities[-1] - 1) / (self.buffer_target / self.buffer_low - 1)
+        self.vp = self.buffer_low / self.gp if self.gp > 0 else 1.0
+
+    @property
+    def bandwidth(self):
+        return self.ladder[self.index]
+
+    def add_sample(self, bits_per_second, seconds=1.0):
+        self.estimator.add(bits_per_second, seconds)
+
+    def start_index(self):
+        """Variant to open a stream with: throughput rule on what was measured before."""
+        return self._throughput_index()
+
+    def _highest_below(self, limit):
+        index = 0
+        if limit:
+            for i, b in enumerate(self.ladder):
+                if b <= limit:
+                    index = i
+        return index
+
+    def _throughput_index(self):
+        est = self.estimator.conservative()
+        return self._highest_below(self.safety * est if est else None)
+
+    def _bola_index(self, buffered):
+        best, best_score = 0, None
+        for i, (b, u) in enumerate(zip(self.ladder, self.utilities)):
+            score = (self.vp * (u + self.gp) - buffered) / b
+            if best_score is None or score > best_score:
+                best, best_score = i, score
+        return best
+
+    def choose(self, buffered):
+        """
+        Pick the variant for the next segment. buffered: seconds of media
+        ahead of the playhead. Returns an index into self.ladder.
+        """
+        buffered = buffered or 0.0
+        if self.mode == "throughput" and buffered >= self.buffer_low:
+            self.mode = "bola"
+        elif self.mode == "bola" and buffered < self.buffer_low / 2:
+            self.mode = "throughput"
+
+        if self.mode == "throughput":
+            index = self._throughput_index()
+        else:
+            index = self._bola_index(buffered)
+            if index > self.index:
+                # Never switch up beyond what the link has been seen to carry
+                index = max(self.index, min(index, self._highest_below(self.estimator.optimistic())))
+            est = self.estimator.conservative()
+            if est:
+                # Insufficient buffer: the segment must arrive before the buffer runs dry
+                spare = buffered - self.segment_duration / 2
+                while index > 0 and self.ladder[index] * self.segment_duration / est > spare:
+                    index -= 1
+        if index != self.index:
+            self.switches += 1
+            self.index = index
+        return index
+
+    def describe(self):
+        est = self.estimator.conservative()
+        est_text = f"{est / 1e6:.2f} Mbps" if est else "measuring"
+        return (f"{self.bandwidth / 1e6:.2f} Mbps ({self.mode}) | est {est_text} | "
+                f"{self.switches} switches")
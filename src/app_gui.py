@@ -2,14 +2,30 @@ import tkinter as tk
 from tkinter import ttk, messagebox, Menu, filedialog
 import threading
 import os
-import requests
 import time
 from datetime import datetime
 
-from .config import COLORS, USER_AGENTS, CACHE_SETTINGS
-from .player_core import MpvPlayer
+from .config import COLORS, USER_AGENTS, CACHE_SETTINGS, PROXY_SETTINGS, HISTORY_SETTINGS, DEBUG_SETTINGS, METRICS_SETTINGS, EXPIRY_SETTINGS, ZAP_SETTINGS, RECORD_SETTINGS, DVR_SETTINGS, LATENCY_SETTINGS, ABR_SETTINGS
+from .player_core import MpvPlayer, load_mpv
+from .hls_parser import fetch_playlist, choose_start_variant
+from .hls_proxy import HlsProxy, SegmentCache
+from .http_client import get_client
 from .ui_components import StyledButton, PrimaryButton, HistoryPanel, LoadingSpinner, BufferedScale, CustomTitleBar, apply_custom_window_style, show_custom_error, show_custom_warning, show_custom_info, ask_custom_yes_no
-from .utils import format_time, load_history, save_history, get_unique_filename, write_history, update_history_progress, get_history_item, load_settings, save_settings
+from .startup_profile import profiler
+from .range_map import RangeMap
+from .metrics import MetricsStore
+from .cache_controller import AdaptiveCacheController
+from .resume_planner import ResumePlanner
+from .expiry_scheduler import ExpiryScheduler
+from .task_executor import TaskExecutor, CancelledError
+from .zapper import ChannelZapper
+from .hls_recorder import HlsRecorder
+from .dvr import DvrBuffer, DvrRecorder
+from .live_latency import LiveEdgeTracker, LatencyEstimator, LatencyController
+from .stall_stats import StallAnalytics
+from .abr import AbrController, ThroughputEstimator
+from .metrics_exporter import MetricsExporter, PlayerTelemetry
+from .utils import format_time, load_history, save_history, get_unique_filename, write_history, update_history_progress, get_history_item, load_settings, save_settings, flush_history, get_history_page, count_history, remove_history
 
 class M3U8StreamingPlayer:
     def __init__(self, root):
@@ -33,6 +49,12 @@ class M3U8StreamingPlayer:
 
         # State
         self.player = None
+        self.proxy = None
+        self.telemetry = None # Stall / startup counters for the metrics endpoint
+        self.stall_stats = None # Rebuffer analytics (debug overlay "Stalls" page)
+        self.metrics_exporter = None
+        self.is_hls = False
+        self.bypass_proxy = False # warm zap: the stream is read straight from the origin
         self.is_playing = False
         self.is_seeking = False
         self.is_fullscreen = False
@@ -40,13 +62,101 @@ class M3U8StreamingPlayer:
         self.show_history = False
         self.show_debug = False
         self.current_url = ""
-        self.cache_history = [] # For graph (MB)
+        self.variants = [] # HLS variants from the master playlist
+        self.preferred_bandwidth = None # Quality picked by the user (bits/s)
+        self.metrics = MetricsStore( # Debug overlay time series
+            window=self.settings.get('debug_graph_window', DEBUG_SETTINGS['graph_window']),
+            capacity=DEBUG_SETTINGS['graph_points'])
+        self._last_drop_count = None
         self.previous_volume = 100
         self.is_closing = False
         
+        # Coalesced mpv property updates are applied at most once per frame
+        self.STATE_FRAME_MS = 16
+        self._progress_slot = None # last 5 s slot saved to history
+        self._load_started_at = None # click time of the load waiting for its first frame
+        self._load_kind = "fresh"
+        self.startup_times = {"fresh": [], "resume": [], "zap": [], "refresh": []} # click-to-first-frame (s)
+        self._shown_tick = None # (second, buffered second, duration) on screen
+
+        # Loads and other background work run on a small worker pool; their
+        # results come back through one queue drained once per frame
+        self.tasks = TaskExecutor(workers=2, name="load")
+        self.tasks.set_dispatcher(self._schedule_task_drain)
+
+        # Cached seeks (target inside a buffered range) skip the spinner
+        self.buffered = RangeMap() # seekable cached ranges, seconds
+        self.CACHED_SEEK_MARGIN = 1.0 # seconds that must be buffered after the target
+        self.CACHED_SEEK_QUIET = 1.0 # seconds the spinner stays suppressed after one
+        self._quiet_until = 0
+
+        # Auto cache sizing (config panel "Auto" checkbox)
+        self.cache_controller = AdaptiveCacheController(
+            target_seconds=self.settings.get('cache_auto_target_seconds', CACHE_SETTINGS['auto_target_seconds']),
+            back_seconds=self.settings.get('cache_auto_back_seconds', CACHE_SETTINGS['auto_back_seconds']),
+            ram_fraction=self.settings.get('cache_auto_ram_fraction', CACHE_SETTINGS['auto_ram_fraction']),
+            min_mb=CACHE_SETTINGS['auto_min_mb'], max_mb=CACHE_SETTINGS['auto_max_mb'])
+
+        # Signed URL expiry: warn, then renew through the configured command
+        self.expiry_scheduler = ExpiryScheduler(
+            warn_before=self.settings.get('expiry_warn_before', EXPIRY_SETTINGS['warn_before']),
+            renew_before=self.settings.get('expiry_renew_before', EXPIRY_SETTINGS['renew_before']),
+            renew_command=self.settings.get('renew_command', EXPIRY_SETTINGS['renew_command']),
+            renew_timeout=self.settings.get('renew_timeout', EXPIRY_SETTINGS['renew_timeout']),
+            on_warn=lambda url, left: self.tasks.call_soon(self._on_expiry_warning, url, left),
+            on_renewed=lambda old, new: self.tasks.call_soon(self._hot_swap_url, old, new),
+            on_failed=lambda url, reason: self.tasks.call_soon(self._on_renew_failed, url, reason))
+
+        # Channel zapping: standby players preloading neighbouring history entries
+        self.zapper = None
+        self.zap_channels = [] # history URLs in zapping order
+        self.zap_index = 0
+        self.ZAP_TICK_MS = 10000 # live standbys are re-checked this often
+        self.ZAP_PREPARE_DELAY_MS = 1000 # let the visible stream start before preloading
+        self._zap_direction = 1
+        self._input_bound = set() # libmpv instances with our mouse bindings
+
+        # Segment recorder (File > Record Stream), runs independently of playback
+        self.recorder = None
+        self._record_shown = 0 # last progress notice (monotonic)
+
+        # Live DVR: live HLS is recorded to disk and rewound through a local snapshot playlist
+        self.dvr_buffer = None
+        self.dvr_recorder = None
+        self._dvr_origin = None # DVR time of the snapshot's time 0; None while on the live URL
+        self._dvr_snapshot_end = 0.0 # DVR time where the open snapshot ends
+        self._dvr_paused_at = None # DVR time of a pause taken on the live URL
+
+        # Low-latency live mode: live edge tracking, catch-up speed and skips
+        self.live_tracker = None
+        self.latency_estimator = LatencyEstimator()
+        self.latency_controller = LatencyController(
+            target=self.settings.get('latency_target', LATENCY_SETTINGS['target_latency']),
+            max_speed=self.settings.get('latency_max_speed', LATENCY_SETTINGS['max_speed']),
+            skip_threshold=self.settings.get('latency_skip_threshold', LATENCY_SETTINGS['skip_threshold']))
+        self.LATENCY_TICK_MS = 500
+        self.LATENCY_REJOIN_COOLDOWN = 30 # seconds between reopening the live edge
+        self._latency_job = None
+        self._latency_rejoin_at = 0
+        self._speed = 1.0
+
+        # Auto quality: ABR picks the variant at segment boundaries (the estimate outlives the stream)
+        self.abr = None
+        self.abr_auto = self.settings.get('abr_enabled', ABR_SETTINGS['enabled'])
+        self.abr_estimator = ThroughputEstimator()
+        self.ABR_TICK_MS = 500
+        self._abr_job = None
+        self._abr_segment = None # playhead segment the last choice was made in
+
         # Pause & Refresh State
         self.pause_start_time = None
         self.PAUSE_REFRESH_THRESHOLD = self.settings.get('pause_refresh_threshold', CACHE_SETTINGS['pause_refresh_threshold'])
+        # Long pauses are checked in the background instead of always reloading
+        self.RESUME_CHECK_LEAD = 15 # seconds before the threshold the first check runs
+        self.RESUME_CHECK_INTERVAL = 60 # re-check while the pause continues
+        self.resume_planner = None
+        self._resume_plan = None
+        self._resume_check_job = None
         
         # Fullscreen state
         self.normal_geometry = None
@@ -76,56 +186,282 @@ class M3U8StreamingPlayer:
         # Remove focus from buttons on startup
         self.root.focus_set()
         
-        # Defer MPV initialization to after UI is displayed
-        self.root.after(100, self._init_player_async)
+        # Load mpv / requests in the background while the window paints,
+        # then bind the player through _init_player_async
+        self._backend_ready = threading.Event()
+        self._backend_error = None
+        threading.Thread(target=self._preload_backend, daemon=True).start()
+        self.root.after_idle(lambda: profiler.mark("first paint"))
+        self.root.after(20, self._wait_for_backend)
+
+    def _preload_backend(self):
+        """Import heavy modules off the Tk thread."""
+        profiler.start("background imports")
+        try:
+            load_mpv()
+            get_client()
+        except Exception as e:
+            self._backend_error = e
+        profiler.end("background imports")
+        self._backend_ready.set()
+
+    def _wait_for_backend(self):
+        if self.is_closing: return
+        if self._backend_ready.is_set():
+            self._init_player_async()
+        else:
+            self.root.after(20, self._wait_for_backend)
     
     def _init_player_async(self):
         """Initialize MPV player after UI is ready for faster startup."""
+        profiler.start("player init")
         try:
+            if self._backend_error:
+                raise RuntimeError(f"Failed to initialize MPV: {self._backend_error}")
             self.player = MpvPlayer(wid=self.video_canvas.winfo_id())
         except Exception as e:
+            profiler.end("player init")
             show_custom_error(self.root, "Error", str(e))
             return
 
+        # Local caching proxy (optional)
+        if self.settings.get('hls_proxy', PROXY_SETTINGS['enabled']):
+            self._start_proxy()
+
         # Bind MPV Mouse Events
         if self.player and self.player.mpv:
-            @self.player.mpv.key_binding('MOUSE_BTN0')
-            def on_mpv_click(state=None, name=None, char=None):
-                self.root.after(0, self.handle_click)
-                
-            @self.player.mpv.key_binding('MOUSE_BTN0_DBL')
-            def on_mpv_dbl_click(state=None, name=None, char=None):
-                self.root.after(0, self.handle_double_click)
+            self._bind_mpv_input()
 
-            # Observe buffering and state
-            @self.player.mpv.property_observer('core-idle')
-            def on_core_idle(name, value):
-                if self.is_closing: return
-                # Only show spinner if not manually paused
-                is_paused = self.player.mpv.pause if self.player and self.player.mpv else False
-                if value and not is_paused:
-                    self.root.after(0, self.spinner.start)
-                else:
-                    self.root.after(0, self.spinner.stop)
-                    
-            @self.player.mpv.property_observer('paused-for-cache')
-            def on_paused_for_cache(name, value):
+            # Observe buffering and state (watchers stay with self.player when
+            # zapping swaps its libmpv instance)
+            def on_buffering(name, value):
                 if self.is_closing: return
                 # Only show spinner if not manually paused
                 is_paused = self.player.mpv.pause if self.player and self.player.mpv else False
-                if value and not is_paused:
+                if value and not is_paused and time.time() >= self._quiet_until:
                     self.root.after(0, self.spinner.start)
                 else:
                     self.root.after(0, self.spinner.stop)
-            
-            @self.player.mpv.property_observer('eof-reached')
+
             def on_eof_reached(name, value):
                 if self.is_closing: return
                 if value:
-                    self.root.after(0, self.stop_stream)
+                    self.root.after(0, self._on_eof)
+
+            self.player.watch(('core-idle', 'paused-for-cache'), on_buffering)
+            self.player.watch('eof-reached', on_eof_reached)
         
-        # Start periodic updates
-        self.update_player_info()
+        # Playback state is pushed by mpv and delivered once per frame
+        if self.player:
+            self.player.set_dispatcher(self._schedule_state_dispatch)
+            self.player.subscribe(('time-pos', 'duration', 'demuxer-cache-time'), self.update_player_info)
+            self.player.subscribe('demuxer-cache-state', self.on_cache_state)
+            self.player.observe('pause')
+            self.player.observe('frame-drop-count')
+            self.player.observe('video-bitrate')
+            self.player.observe('audio-bitrate')
+            self.stall_stats = StallAnalytics(
+                self.player, max_urls=self.settings.get('history_limit', HISTORY_SETTINGS['limit']),
+                variant_of=self._variant_label)
+
+        self.resume_planner = ResumePlanner(proxy=self.proxy)
+
+        # Prometheus endpoint (optional)
+        if self.player and self.settings.get('metrics_enabled', METRICS_SETTINGS['enabled']):
+            self._start_metrics()
+
+        # Channel zapping (optional)
+        if self.player and self.settings.get('zap_enabled', ZAP_SETTINGS['enabled']):
+            self._start_zapper()
+
+        profiler.end("player init")
+        profiler.report()
+
+    def _schedule_state_dispatch(self):
+        """Called from the mpv event thread, at most once per pending batch."""
+        if self.is_closing or not self.player: return
+        self.root.after(self.STATE_FRAME_MS, self.player.dispatch_pending)
+
+    def _bind_mpv_input(self):
+        """Mouse bindings on the current libmpv instance (again after a zap)."""
+        handle = self.player.mpv
+        if id(handle) in self._input_bound: return
+        self._input_bound.add(id(handle))
+
+        @handle.key_binding('MOUSE_BTN0')
+        def on_mpv_click(state=None, name=None, char=None):
+            self.root.after(0, self.handle_click)
+
+        @handle.key_binding('MOUSE_BTN0_DBL')
+        def on_mpv_dbl_click(state=None, name=None, char=None):
+            self.root.after(0, self.handle_double_click)
+
+    def _schedule_task_drain(self):
+        """Called from worker threads when the first result is queued."""
+        if self.is_closing: return
+        self.root.after(self.STATE_FRAME_MS, self.tasks.drain)
+
+    def _start_proxy(self):
+        """Start the local HLS caching proxy and route the player through it."""
+        try:
+            cache = SegmentCache(
+                self.settings.get('proxy_cache_dir', PROXY_SETTINGS['cache_dir']),
+                self.settings.get('proxy_ram_mb', PROXY_SETTINGS['ram_mb']) * 1024 * 1024,
+                self.settings.get('proxy_disk_mb', PROXY_SETTINGS['disk_mb']) * 1024 * 1024)
+            self.proxy = HlsProxy(cache, prefetch_workers=self.settings.get(
+                'prefetch_workers', PROXY_SETTINGS['prefetch_workers']))
+            self.proxy.start()
+            self.player.proxy = self.proxy
+        except Exception as e:
+            print(f"HLS proxy disabled: {e}")
+            self.proxy = None
+
+    def _start_metrics(self):
+        """Serve /metrics; collection happens on mpv / server threads, never on Tk."""
+        try:
+            self.telemetry = PlayerTelemetry(self.player)
+            self.metrics_exporter = MetricsExporter(
+                self.player, self.telemetry, proxy=self.proxy,
+                host=self.settings.get('metrics_host', METRICS_SETTINGS['host']),
+                port=self.settings.get('metrics_port', METRICS_SETTINGS['port']),
+                gauges={"pause_refresh_remaining_seconds": (
+                    "Seconds until a paused stream is refreshed on resume.", self._pause_refresh_remaining)})
+            self.metrics_exporter.start()
+        except Exception as e:
+            print(f"Metrics endpoint disabled: {e}")
+            self.metrics_exporter = None
+
+    def _start_zapper(self):
+        """Start the standby players for channel zapping, within the memory ceiling."""
+        try:
+            self.zapper = ChannelZapper(
+                self._make_video_surface,
+                standby_players=self.settings.get('zap_standby_players', ZAP_SETTINGS['standby_players']),
+                standby_cache_mb=self.settings.get('zap_standby_cache_mb', ZAP_SETTINGS['standby_cache_mb']),
+                memory_ceiling_mb=self.settings.get('zap_memory_ceiling_mb', ZAP_SETTINGS['memory_ceiling_mb']),
+                max_age=self.settings.get('zap_standby_max_age', ZAP_SETTINGS['standby_max_age']))
+            if not self.zapper.start():
+                print("Channel zapping disabled: no standby player fits the memory ceiling")
+                self.zapper = None
+                return
+        except Exception as e:
+            print(f"Channel zapping disabled: {e}")
+            self.zapper = None
+            return
+        self.root.after(self.ZAP_TICK_MS, self._zap_tick)
+
+    def _make_video_surface(self):
+        """Extra video frame stacked below the visible one (standby player)."""
+        surface = tk.Frame(self.video_frame, bg=COLORS['video_bg'])
+        surface.place(x=0, y=0, relwidth=1, relheight=1)
+        surface.lower()
+        surface.bind("<Button-1>", self.start_drag)
+        surface.bind("<B1-Motion>", self.do_drag)
+        surface.bind("<ButtonRelease-1>", self.stop_drag)
+        surface.bind("<Double-Button-1>", lambda e: self.handle_double_click())
+        return surface
+
+    def _zap_tick(self):
+        if self.is_closing or not self.zapper: return
+        self.zapper.rewarm()
+        self.root.after(self.ZAP_TICK_MS, self._zap_tick)
+
+    def _set_zap_channels(self, url):
+        """Zapping order is the history order at the time of a regular load."""
+        self.zap_channels = [item['url'] for item in load_history()]
+        self.zap_index = self.zap_channels.index(url) if url in self.zap_channels else 0
+
+    def _prepare_standbys(self):
+        if not self.zapper or not self.zap_channels or self.is_closing: return
+        ref = self.referer_entry.get().strip()
+        self.zapper.prepare(self.zap_channels, self.zap_index, self._zap_direction,
+                            headers={"Referer": ref} if ref else None,
+                            user_agent=USER_AGENTS[self.ua_var.get()])
+
+    def zap(self, direction):
+        """PgDn / PgUp: switch to the next / previous history entry."""
+        if not self.zapper or not self.player or len(self.zap_channels) < 2: return
+        self._zap_direction = direction
+        self.zap_index = (self.zap_index + direction) % len(self.zap_channels)
+        url = self.zap_channels[self.zap_index]
+        old_url = self.current_url
+
+        # Leave the current channel the way stop_stream does
+        self._cancel_resume_check()
+        self.tasks.cancel("load")
+        self._stop_dvr()
+        self._stop_live_tracker()
+        try:
+            pos = self.player.get_time_pos()
+            if pos: update_history_progress(old_url, pos)
+        except: pass
+
+        self.current_url = url
+        self._mark_load_started("zap")
+        self.url_entry.delete(0, tk.END)
+        self.url_entry.insert(0, url)
+        self._shown_tick = None
+        self.buffered = RangeMap()
+
+        slot = self.zapper.take(url)
+        if not slot:
+            # Standby not ready yet: regular load, history order unchanged
+            self.spinner.start()
+            ref = self.referer_entry.get().strip()
+            ua = USER_AGENTS[self.ua_var.get()]
+            max_b, back_b = self._cache_entry_values()
+            self.tasks.submit("load", self._load_job, url, ref, ua, max_b, back_b, self.cache_auto_var.get(), None)
+            return
+
+        # Warm standby: swap libmpv instances and video surfaces, no reopen
+        volume = self.player.mpv.volume
+        self.video_surface = self.zapper.swap(self.player, self.video_surface, slot, old_url)
+        self._bind_mpv_input()
+        # Standby players open streams without the local proxy; is_hls stays as it is
+        # until the channel's playlist was read
+        self.bypass_proxy = True
+        self._set_variants([])
+        self.tasks.submit("load", self._zap_playlist_job, url, self._origin_client())
+        self.cache_controller.reset()
+        self._apply_current_cache_settings()
+        self.player.mpv.volume = volume
+        self.player.mpv.mute = False
+        self.player.mpv.pause = False
+        self.is_playing = True
+        self.spinner.stop()
+        self._on_play_start()
+
+    def _zap_playlist_job(self, job, url, client):
+        """Worker: read the playlist of a channel taken from a standby (quality list, ABR)."""
+        try:
+            status, playlist = fetch_playlist(url, timeout=10, client=client, job=job)
+        except ValueError:
+            status, playlist = 200, None
+        except CancelledError:
+            raise
+        except Exception as e:
+            print(f"Zap playlist error: {e}")
+            return
+        job.check()
+        if status >= 400: return
+        variants = playlist.sorted_variants() if playlist is not None and playlist.is_master else []
+        self.tasks.post(job, self._on_zap_playlist, url, playlist is not None, variants)
+
+    def _on_zap_playlist(self, url, is_hls, variants):
+        if url != self.current_url or not self.bypass_proxy: return
+        self.is_hls = is_hls
+        self._set_variants(variants)
+
+    def _use_proxy(self):
+        """Reopens of the current stream go through the proxy unless it bypasses it (warm zap)."""
+        return self.is_hls and not self.bypass_proxy
+
+    def _pause_refresh_remaining(self):
+        """Pause-refresh countdown (None while not paused). Safe from any thread."""
+        started = self.pause_start_time
+        if not started:
+            return None
+        return max(0, self.PAUSE_REFRESH_THRESHOLD - (time.time() - started))
 
     def setup_custom_window(self):
         """Remove Windows title bar but keep resizing and taskbar presence using ctypes."""
@@ -189,6 +525,8 @@ class M3U8StreamingPlayer:
         self.root.bind("<Control-d>", lambda e: self.toggle_debug_overlay())
         self.root.bind("<Control-D>", lambda e: self.toggle_debug_overlay())
         self.root.bind("<F1>", lambda e: self.show_shortcuts_dialog())
+        self.root.bind("<Next>", lambda e: self.zap(1))
+        self.root.bind("<Prior>", lambda e: self.zap(-1))
         self.root.bind("<Configure>", self.on_window_resize)
         
         # ALT key to toggle menu bar (use KeyRelease to avoid double trigger)
@@ -226,6 +564,8 @@ class M3U8StreamingPlayer:
         
         file_menu = Menu(self.file_btn, tearoff=0, bg=COLORS['menu_bg'], fg=COLORS['text'])
         file_menu.add_command(label="Open URL... (Ctrl+O)", command=self.show_open_dialog)
+        file_menu.add_command(label="Record Stream...", command=self.start_recording)
+        file_menu.add_command(label="Stop Recording", command=self.stop_recording)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.on_closing)
         self.file_btn.config(menu=file_menu)
@@ -281,6 +621,7 @@ class M3U8StreamingPlayer:
         
         self.video_canvas = tk.Frame(self.video_frame, bg=COLORS['video_bg'])
         self.video_canvas.pack(fill=tk.BOTH, expand=True)
+        self.video_surface = self.video_canvas # frame the visible player renders into (changes when zapping)
         
         # Placeholder Overlay (shown when idle)
         self.setup_video_placeholder()
@@ -290,6 +631,11 @@ class M3U8StreamingPlayer:
         
         # Debug Overlay
         self.setup_debug_overlay()
+
+        # Non-modal notice (top-right of the video), e.g. link expiry
+        self.notice_label = tk.Label(self.video_frame, text="", bg='#000000', fg='#FFA500',
+                                     font=('Segoe UI', 9, 'bold'), padx=8, pady=4)
+        self._notice_job = None
         
         # Control Panel
         self.setup_control_panel()
@@ -320,31 +666,145 @@ class M3U8StreamingPlayer:
         """Create a transparent overlay for technical debugging info."""
         self.debug_frame = tk.Frame(self.video_frame, bg='#000000', bd=1, relief=tk.SOLID)
         # Don't pack initially
+
+        # Page tabs: live stats / stall analytics
+        tabs = tk.Frame(self.debug_frame, bg='#000000')
+        tabs.pack(fill=tk.X, padx=5, pady=(3, 0))
+        self.debug_tabs = {}
+        self.debug_pages = {}
+        for page, title in (("stats", "Stats"), ("stalls", "Stalls")):
+            tab = tk.Label(tabs, text=title, bg='#000000', font=('Consolas', 9, 'bold'), cursor='hand2')
+            tab.pack(side=tk.LEFT, padx=(0, 10))
+            tab.bind('<Button-1>', lambda e, page=page: self.show_debug_page(page))
+            self.debug_tabs[page] = tab
+            self.debug_pages[page] = tk.Frame(self.debug_frame, bg='#000000')
+        stats_page = self.debug_pages["stats"]
         
         self.debug_labels = {}
-        stats = ["Cache Size", "Buffer Duration", "Network Speed", "Refresh In", "Active URL"]
+        stats = ["Cache Size", "Buffer Duration", "Network Speed", "Startup", "Refresh In", "Auto Cache", "Proxy Cache", "Prefetch", "Zapping", "DVR", "Latency", "ABR", "Active URL"]
         
         for i, stat in enumerate(stats):
-            lbl_name = tk.Label(self.debug_frame, text=f"{stat}:", bg='#000000', fg='#00FF00', 
+            lbl_name = tk.Label(stats_page, text=f"{stat}:", bg='#000000', fg='#00FF00', 
                                font=('Consolas', 9, 'bold'), anchor=tk.W)
             lbl_name.grid(row=i, column=0, sticky=tk.W, padx=5, pady=1)
             
-            lbl_val = tk.Label(self.debug_frame, text="N/A", bg='#000000', fg='#FFFFFF', 
+            lbl_val = tk.Label(stats_page, text="N/A", bg='#000000', fg='#FFFFFF', 
                               font=('Consolas', 9), anchor=tk.W)
             lbl_val.grid(row=i, column=1, sticky=tk.W, padx=5, pady=1)
             self.debug_labels[stat] = lbl_val
 
-        # Add Graph Canvas
-        self.debug_canvas = tk.Canvas(self.debug_frame, width=280, height=60, bg='#111111', highlightthickness=0)
+        # Add Graph Canvas (items are created once, _draw_cache_graph moves them)
+        self.debug_canvas = tk.Canvas(stats_page, width=self.GRAPH_W, height=self.GRAPH_H + 14 * len(self.GRAPH_SERIES) + 4,
+                                      bg='#111111', highlightthickness=0, cursor='hand2')
         self.debug_canvas.grid(row=len(stats), column=0, columnspan=2, pady=5, padx=5)
-        
+        self.debug_canvas.bind('<Button-1>', self._cycle_graph_window)
+        self._setup_cache_graph()
+
+        # Stall analytics page
+        stalls_page = self.debug_pages["stalls"]
+        self.stall_labels = {}
+        for i, stat in enumerate(("Now", "Session", "This URL", "Sessions")):
+            tk.Label(stalls_page, text=f"{stat}:", bg='#000000', fg='#00FF00',
+                     font=('Consolas', 9, 'bold'), anchor=tk.W).grid(row=i, column=0, sticky=tk.NW, padx=5, pady=1)
+            lbl_val = tk.Label(stalls_page, text="N/A", bg='#000000', fg='#FFFFFF',
+                               font=('Consolas', 9), anchor=tk.W, justify=tk.LEFT)
+            lbl_val.grid(row=i, column=1, sticky=tk.W, padx=5, pady=1)
+            self.stall_labels[stat] = lbl_val
+        tk.Label(stalls_page, text="Recent stalls:", bg='#000000', fg='#00FF00',
+                 font=('Consolas', 9, 'bold'), anchor=tk.W).grid(row=4, column=0, columnspan=2, sticky=tk.W, padx=5, pady=(6, 1))
+        self.stall_events_label = tk.Label(stalls_page, text="None", bg='#000000', fg='#FFFFFF',
+                                           font=('Consolas', 8), anchor=tk.W, justify=tk.LEFT)
+        self.stall_events_label.grid(row=5, column=0, columnspan=2, sticky=tk.W, padx=5, pady=(0, 5))
+        self.show_debug_page(self.settings.get('debug_page', 'stats'))
+
+    def show_debug_page(self, page):
+        """Switch the debug overlay between the stats and stall analytics pages."""
+        if page not in self.debug_pages: page = "stats"
+        for name, frame in self.debug_pages.items():
+            frame.pack_forget()
+            self.debug_tabs[name].config(fg='#FFFFFF' if name == page else '#555555')
+        self.debug_pages[page].pack(fill=tk.BOTH)
+        if self.settings.get('debug_page', 'stats') != page:
+            self.settings['debug_page'] = page
+            save_settings(self.settings)
+        self._debug_page = page
+        if self.show_debug and self.player:
+            self._refresh_debug_page()
+
+    @staticmethod
+    def _format_stall_summary(summary):
+        if not summary: return "No data"
+        text = f"{summary['stalls']} stalls, {summary['stall_time']:.1f}s / {format_time(summary['watch_time'])} watched ({summary['ratio'] * 100:.2f}%)"
+        if summary['mean'] is not None:
+            text += f"\nmean {summary['mean']:.2f}s  p95 {summary['p95']:.2f}s"
+        if summary.get('seek_waits'):
+            text += f"\n+ {summary['seek_waits']} seek waits, {summary['seek_wait_time']:.1f}s (not counted)"
+        return text
+
+    def _update_stall_page(self):
+        """Rebuffer analytics page of the debug overlay."""
+        if not self.stall_stats:
+            for lbl in self.stall_labels.values(): lbl.config(text="N/A")
+            return
+        ongoing = self.stall_stats.current_stall()
+        self.stall_labels["Now"].config(text=f"Stalled for {ongoing:.1f}s" if ongoing is not None else "Playing")
+        self.stall_labels["Session"].config(text=self._format_stall_summary(self.stall_stats.session_summary()))
+        url_summary = self.stall_stats.url_summary(self.current_url) if self.current_url else None
+        self.stall_labels["This URL"].config(text=self._format_stall_summary(url_summary))
+        self.stall_labels["Sessions"].config(text=str(url_summary['sessions']) if url_summary else "0")
+        lines = []
+        for e in reversed(self.stall_stats.recent_events(self.current_url)):
+            rate = self.format_speed(e['network_rate']) if e['network_rate'] else "-"
+            cache = f"{e['cache_bytes'] / 1048576:.1f} MB" if e['cache_bytes'] is not None else "-"
+            lines.append(f"{e['start'][11:]} {e['duration']:.2f}s at {format_time(e['position'])} | {rate} | {cache} | {e['variant'] or '-'}")
+        self.stall_events_label.config(text="\n".join(lines) or "None")
+
+    # name, label, color, formatter
+    GRAPH_SERIES = (
+        ("fw_bytes", "FW", '#00FF00', lambda v: f"{v / 1048576:.1f}"),
+        ("back_bytes", "BACK", '#1E90FF', lambda v: f"{v / 1048576:.1f}"),
+        ("input_rate", "NET", '#FFD700', lambda v: f"{v / 1048576:.2f}"),
+        ("buffered_seconds", "BUF", '#FF69B4', lambda v: f"{v:.1f}"),
+        ("dropped_frames", "DROP", '#FF4500', lambda v: f"{v:.0f}"),
+    )
+    GRAPH_UNITS = {"fw_bytes": "MB", "back_bytes": "MB", "input_rate": "MB/s", "buffered_seconds": "s", "dropped_frames": "fr"}
+    GRAPH_W = 280
+    GRAPH_H = 60
+
+    def _setup_cache_graph(self):
+        c = self.debug_canvas
+        w, h = self.GRAPH_W, self.GRAPH_H
+        # Background grid
+        for i in range(1, 4):
+            y = h - (i * h / 4)
+            c.create_line(0, y, w, y, fill='#222222', dash=(2, 2))
+        # Forward cache limit (same scale as FW / BACK)
+        self._graph_limit = c.create_line(0, 0, 0, 0, fill='#FFA500', dash=(4, 4), width=1)
+        self._graph_limit_text = c.create_text(5, 0, text="", fill="#FFA500", font=("Consolas", 7), anchor=tk.SW)
+        self._graph_scale_text = c.create_text(w - 5, 5, text="", fill="#555555", font=("Consolas", 7), anchor=tk.NE)
+        self._graph_window_text = c.create_text(5, 5, text="", fill="#555555", font=("Consolas", 7), anchor=tk.NW)
+        # One polyline + one min/avg/p95 readout per series
+        self._graph_lines = {}
+        self._graph_readouts = {}
+        for i, (name, label, color, _) in enumerate(self.GRAPH_SERIES):
+            self._graph_lines[name] = c.create_line(0, 0, 0, 0, fill=color, width=1, state=tk.HIDDEN)
+            self._graph_readouts[name] = c.create_text(5, h + 4 + i * 14, text=f"{label:<5} -", fill=color,
+                                                       font=("Consolas", 7), anchor=tk.NW)
+
+    def _cycle_graph_window(self, event=None):
+        windows = DEBUG_SETTINGS['graph_windows']
+        cur = self.metrics.window
+        nxt = windows[(windows.index(cur) + 1) % len(windows)] if cur in windows else windows[0]
+        self.metrics.set_window(nxt)
+        self.settings['debug_graph_window'] = nxt
+        save_settings(self.settings)
+        self._draw_cache_graph()
+
     def _draw_cache_graph(self):
-        """Draw a line chart of RAM cache occupancy (MB)."""
-        self.debug_canvas.delete("all")
-        
-        w = 280
-        h = 60
-        max_points = 60
+        """Move each series polyline to its current points and refresh the readouts."""
+        c = self.debug_canvas
+        w, h = self.GRAPH_W, self.GRAPH_H
+        points_max = self.metrics.capacity
         
         # Get threshold value from entry
         try:
@@ -352,34 +812,42 @@ class M3U8StreamingPlayer:
         except:
             threshold_mb = CACHE_SETTINGS['max_bytes']
 
-        # Calculate max MB for scaling (at least threshold + 10%)
-        max_mb = max(self.cache_history) if self.cache_history else 0
-        scale_limit = threshold_mb * 1.2
-        if max_mb < scale_limit: max_mb = scale_limit
-        if max_mb < 50: max_mb = 50 
-        
-        # Draw background grid
-        for i in range(1, 4):
-            y = h - (i * h / 4)
-            self.debug_canvas.create_line(0, y, w, y, fill='#222222', dash=(2, 2))
-
-        # Draw Threshold Line (Dashed)
-        ty = h - (threshold_mb / max_mb) * (h - 5) - 2
-        self.debug_canvas.create_line(0, ty, w, ty, fill='#FFA500', dash=(4, 4), width=1)
-        self.debug_canvas.create_text(5, ty-2, text=f"LIMIT: {threshold_mb}MB", fill="#FFA500", font=("Consolas", 7), anchor=tk.SW)
-
-        # Plot points
-        points = []
-        for i, mb in enumerate(self.cache_history):
-            x = (i / (max_points - 1)) * w
-            # Inverse Y
-            y = h - (mb / max_mb) * (h - 5) - 2
-            points.extend([x, y])
-            
-        if len(points) >= 4:
-            self.debug_canvas.create_line(points, fill='#00FF00', width=1)
-            # Label max scale
-            self.debug_canvas.create_text(w-5, 5, text=f"{int(max_mb)}MB", fill="#555555", font=("Consolas", 7), anchor=tk.NE)
+        snapshots = {name: self.metrics.snapshot(name) for name, *_ in self.GRAPH_SERIES}
+
+        # FW and BACK share a MB scale (at least threshold + 20%), others scale to their own max
+        bytes_max = max([threshold_mb * 1.2 * 1048576, 50 * 1048576] +
+                        [max((v for v in snapshots[n][0] if v == v), default=0) for n in ("fw_bytes", "back_bytes")])
+        ty = h - (threshold_mb * 1048576 / bytes_max) * (h - 5) - 2
+        c.coords(self._graph_limit, 0, ty, w, ty)
+        c.coords(self._graph_limit_text, 5, ty - 2)
+        c.itemconfig(self._graph_limit_text, text=f"LIMIT: {threshold_mb}MB")
+        c.itemconfig(self._graph_scale_text, text=f"{int(bytes_max / 1048576)}MB")
+        window = self.metrics.window
+        c.itemconfig(self._graph_window_text, text=f"{window // 60}m" if window >= 60 else f"{window}s")
+
+        for name, label, _, fmt in self.GRAPH_SERIES:
+            values, stats = snapshots[name]
+            scale = bytes_max if name in ("fw_bytes", "back_bytes") else max(max((v for v in values if v == v), default=0) * 1.1, 1e-9)
+            line = self._graph_lines[name]
+            # Right-aligned: the newest point is at the right edge; gaps (NaN) are skipped
+            offset = points_max - len(values)
+            coords = []
+            for i, v in enumerate(values):
+                if v != v:
+                    continue
+                coords.append(((offset + i) / (points_max - 1)) * w)
+                coords.append(h - (v / scale) * (h - 5) - 2)
+            if len(coords) >= 4:
+                c.coords(line, coords)
+                c.itemconfig(line, state=tk.NORMAL)
+            else:
+                c.itemconfig(line, state=tk.HIDDEN)
+            if stats:
+                lo, avg, p95 = stats
+                text = f"{label:<5} min {fmt(lo)}  avg {fmt(avg)}  p95 {fmt(p95)} {self.GRAPH_UNITS[name]}"
+            else:
+                text = f"{label:<5} -"
+            c.itemconfig(self._graph_readouts[name], text=text)
 
     def toggle_debug_overlay(self):
         self.show_debug = not self.show_debug
@@ -391,6 +859,14 @@ class M3U8StreamingPlayer:
 
     def update_debug_info(self):
         if not self.show_debug or not self.player: return
+        self._refresh_debug_page()
+        self.root.after(500, self.update_debug_info)
+
+    def _refresh_debug_page(self):
+        if self._debug_page == "stalls":
+            try: self._update_stall_page()
+            except Exception as e: print(f"Debug update error: {e}")
+            return
         
         try:
             cache_state = self.player.get_demuxer_cache_state()
@@ -399,12 +875,7 @@ class M3U8StreamingPlayer:
             if cache_state and 'fw-bytes' in cache_state:
                 size_mb = cache_state['fw-bytes'] / (1024 * 1024)
                 self.debug_labels["Cache Size"].config(text=f"{size_mb:.2f} MB")
-                
-                # Update history for graph (RAM occupancy)
-                self.cache_history.append(size_mb)
-                if len(self.cache_history) > 60:
-                    self.cache_history.pop(0)
-                self._draw_cache_graph()
+            self._draw_cache_graph()
             
             # 2. Buffer Duration
             buf_dur = self.player.get_buffered_time()
@@ -419,24 +890,95 @@ class M3U8StreamingPlayer:
                 speed = self.format_speed(rate)
                 self.debug_labels["Network Speed"].config(text=speed)
             
-            # 4. Refresh In (Added)
-            if self.pause_start_time and self.player and self.player.mpv.pause:
-                elapsed = time.time() - self.pause_start_time
-                remaining = max(0, self.PAUSE_REFRESH_THRESHOLD - elapsed)
-                self.debug_labels["Refresh In"].config(text=f"{int(remaining)}s")
+            # 4. Click-to-first-frame, fresh vs resumed loads
+            parts = []
+            for kind in ("fresh", "resume", "zap", "refresh"):
+                times = self.startup_times[kind]
+                if times:
+                    parts.append(f"{kind} {times[-1]:.2f}s (avg {sum(times) / len(times):.2f}s, n={len(times)})")
+            self.debug_labels["Startup"].config(text=" | ".join(parts) or "N/A")
+
+            # 4b. Refresh In (Added)
+            remaining = self._pause_refresh_remaining()
+            if remaining is not None and self.player and self.player.is_paused():
+                plan = self._resume_plan
+                text = f"{int(remaining)}s"
+                if plan:
+                    text += f" ({plan.action}: {plan.reason}"
+                    text += f", {plan.prefetched} seg ready)" if plan.prefetched else ")"
+                self.debug_labels["Refresh In"].config(text=text)
             else:
                 self.debug_labels["Refresh In"].config(text="N/A")
 
-            # 5. URL (truncated)
+            # 5. Auto cache decisions
+            if self.cache_auto_var.get():
+                d = self.cache_controller.decision
+                self.debug_labels["Auto Cache"].config(text=d.describe() if d else "Measuring bitrate...")
+            else:
+                self.debug_labels["Auto Cache"].config(text="Off")
+
+            # 6. Proxy cache
+            if self.proxy:
+                st = self.proxy.cache.stats()
+                saved_mb = st['bytes_saved'] / (1024 * 1024)
+                self.debug_labels["Proxy Cache"].config(
+                    text=f"{st['hit_ratio'] * 100:.0f}% hit | {st['prefetch_hits']} prefetched | {saved_mb:.1f} MB saved")
+            else:
+                self.debug_labels["Proxy Cache"].config(text="Off")
+
+            if self.proxy and self.proxy.prefetcher:
+                pf = self.proxy.prefetcher.stats()
+                rtt = f"{pf['rtt'] * 1000:.0f}ms" if pf['rtt'] is not None else "-"
+                bw = self.format_speed(pf['bandwidth']) if pf['bandwidth'] else "-"
+                self.debug_labels["Prefetch"].config(
+                    text=f"x{pf['concurrency']} ahead {pf['depth']} | rtt {rtt} | {bw}")
+            else:
+                self.debug_labels["Prefetch"].config(text="Off")
+
+            # 6b. Standby players
+            if self.zapper:
+                slots = " ".join("ready" if sl.ready else "loading" if sl.url else "idle"
+                                 for sl in self.zapper.slots)
+                self.debug_labels["Zapping"].config(
+                    text=f"{len(self.zapper.slots)} standby ~{self.zapper.memory_estimate_mb()} MB | {slots}")
+            else:
+                self.debug_labels["Zapping"].config(text="Off")
+
+            # 6c. Time-shift window
+            if self._dvr_active():
+                start, end = self.dvr_buffer.window()
+                behind = "live" if self._dvr_origin is None else f"-{format_time(max(0, end - self._dvr_position()))}"
+                self.debug_labels["DVR"].config(
+                    text=f"{format_time(end - start)} / {format_time(self.dvr_buffer.window_seconds)} | "
+                         f"{len(self.dvr_buffer.index)} seg {self.dvr_buffer.bytes / (1024 * 1024):.0f} MB | {behind}")
+            else:
+                self.debug_labels["DVR"].config(text="Recording..." if self.dvr_buffer else "Off")
+
+            # 6d. Live latency
+            if self.live_tracker:
+                latency = self.latency_estimator.latency
+                playlist, _ = self.live_tracker.snapshot()
+                mode = "LL-HLS parts" if playlist and playlist.part_target and self.live_tracker.partial \
+                    else "blocking reload" if self.live_tracker.blocked else "polling"
+                text = f"{latency:.1f}s" if latency is not None else "measuring"
+                self.debug_labels["Latency"].config(
+                    text=f"{text} / target {self.latency_controller.target:.0f}s | {self._speed:.2f}x | {mode}")
+            else:
+                self.debug_labels["Latency"].config(text="Off")
+
+            # 6e. Adaptive bitrate
+            if self.abr and self.abr_auto:
+                self.debug_labels["ABR"].config(text=f"Auto {self.abr.describe()}")
+            else:
+                self.debug_labels["ABR"].config(text="Manual" if self.abr else "Off")
+
+            # 7. URL (truncated)
             url = self.current_url
             if len(url) > 40: url = url[:37] + "..."
             self.debug_labels["Active URL"].config(text=url)
             
         except Exception as e:
             print(f"Debug update error: {e}")
-            
-        if self.show_debug:
-            self.root.after(500, self.update_debug_info)
 
     def setup_config_panel(self):
         self.config_panel = tk.Frame(self.player_area, bg=COLORS['bg'], relief=tk.FLAT, bd=0)
@@ -510,6 +1052,13 @@ class M3U8StreamingPlayer:
         self.pause_threshold_entry.insert(0, str(self.PAUSE_REFRESH_THRESHOLD))
         self.pause_threshold_entry.pack(side=tk.LEFT, padx=(0, 10))
 
+        # Auto (size from measured bitrate + free RAM)
+        self.cache_auto_var = tk.BooleanVar(value=self.settings.get('cache_auto', CACHE_SETTINGS['auto']))
+        tk.Checkbutton(row3, text="Auto", variable=self.cache_auto_var, command=self._on_cache_auto_toggle,
+                       bg=COLORS['bg'], fg=COLORS['text_gray'], selectcolor=COLORS['entry_bg'],
+                       activebackground=COLORS['bg'], activeforeground=COLORS['text'],
+                       font=('Segoe UI', 9), bd=0, cursor="hand2").pack(side=tk.LEFT, padx=(0, 10))
+
         # Apply Button
         PrimaryButton(row3, text="Apply", command=self._apply_current_cache_settings_ui).pack(side=tk.LEFT, padx=(0, 10))
 
@@ -521,6 +1070,7 @@ class M3U8StreamingPlayer:
         self.cache_bytes_entry.bind('<Return>', lambda e: self._apply_current_cache_settings_ui())
         self.cache_back_entry.bind('<Return>', lambda e: self._apply_current_cache_settings_ui())
         self.pause_threshold_entry.bind('<Return>', lambda e: self._apply_current_cache_settings_ui())
+        self._update_cache_entry_state()
 
         # Reset Defaults Button (Compact)
         tk.Button(row3, text="Reset Defaults", command=self.reset_cache_settings,
@@ -534,13 +1084,45 @@ class M3U8StreamingPlayer:
                   activeforeground=COLORS['text'], bd=0, padx=8, pady=0, font=('Segoe UI', 8, 'bold'),
                   cursor="hand2").pack(side=tk.RIGHT, padx=(0, 5))
 
+    def _update_cache_entry_state(self):
+        """Cache size entries are read-only while Auto decides them."""
+        state = 'readonly' if self.cache_auto_var.get() else tk.NORMAL
+        for entry in (self.cache_bytes_entry, self.cache_back_entry):
+            entry.config(state=state, readonlybackground=COLORS['entry_bg'])
+
+    def _set_cache_entries(self, max_b, back_b):
+        for entry, value in ((self.cache_bytes_entry, max_b), (self.cache_back_entry, back_b)):
+            state = entry.cget('state')
+            entry.config(state=tk.NORMAL)
+            entry.delete(0, tk.END)
+            entry.insert(0, str(value))
+            entry.config(state=state)
+
+    def _on_cache_auto_toggle(self):
+        self.settings['cache_auto'] = self.cache_auto_var.get()
+        save_settings(self.settings)
+        self._update_cache_entry_state()
+        if self.cache_auto_var.get():
+            # Re-decide from the next cache-state update
+            self.cache_controller.reset(self.cache_controller.bandwidth_hint)
+            self.show_cache_status("Auto: measuring...", COLORS['accent'])
+        else:
+            self._apply_current_cache_settings_ui()
+
+    def _apply_auto_cache(self, decision):
+        """Apply a decision from the adaptive controller (live, via command('set', ...))."""
+        self._set_cache_entries(decision.forward_mb, decision.back_mb)
+        if self.proxy and self.proxy.prefetcher:
+            self.proxy.prefetcher.set_budget(decision.forward_mb * 1024 * 1024)
+        self.player.apply_cache_settings(decision.forward_mb, decision.back_mb, decision.readahead_secs)
+
     def reset_cache_settings(self):
         """Reset cache tuning entries to default values."""
-        self.cache_bytes_entry.delete(0, tk.END)
-        self.cache_bytes_entry.insert(0, str(CACHE_SETTINGS['max_bytes']))
-        
-        self.cache_back_entry.delete(0, tk.END)
-        self.cache_back_entry.insert(0, str(CACHE_SETTINGS['max_back_bytes']))
+        if self.cache_auto_var.get():
+            self.cache_auto_var.set(False)
+            self.settings['cache_auto'] = False
+            self._update_cache_entry_state()
+        self._set_cache_entries(CACHE_SETTINGS['max_bytes'], CACHE_SETTINGS['max_back_bytes'])
         
         self.pause_threshold_entry.delete(0, tk.END)
         self.pause_threshold_entry.insert(0, str(CACHE_SETTINGS['pause_refresh_threshold']))
@@ -549,7 +1131,8 @@ class M3U8StreamingPlayer:
         # Apply immediately if player is active
         if self.player:
             self.player.apply_cache_settings(CACHE_SETTINGS['max_bytes'], 
-                                           CACHE_SETTINGS['max_back_bytes'])
+                                           CACHE_SETTINGS['max_back_bytes'],
+                                           self.settings.get('cache_readahead_secs', CACHE_SETTINGS['readahead_secs']))
 
     def clear_player_cache(self):
         """Manually clear the player's demuxer cache with a two-step squeeze-restore sequence."""
@@ -725,14 +1308,13 @@ class M3U8StreamingPlayer:
         self.load_and_play_stream()
 
     def refresh_history(self):
-        history = load_history()
-        self.history_panel.update_history(history)
+        # Rows are fetched a page at a time as the panel scrolls
+        self.history_panel.set_source(count_history(), get_history_page)
 
     def delete_history_item(self, index):
-        history = load_history()
-        if 0 <= index < len(history):
-            del history[index]
-            write_history(history)
+        item = get_history_page(index, 1)
+        if item:
+            remove_history(item[0]['url'])
             self.refresh_history()
 
     def clear_history(self):
@@ -740,24 +1322,37 @@ class M3U8StreamingPlayer:
             write_history([])
             self.refresh_history()
 
+    def _cache_entry_values(self):
+        """(forward MB, back MB) from the config panel, defaults if invalid."""
+        try:
+            return int(self.cache_bytes_entry.get()), int(self.cache_back_entry.get())
+        except:
+            return CACHE_SETTINGS['max_bytes'], CACHE_SETTINGS['max_back_bytes']
+
     def load_and_play_stream(self):
         url = self.url_entry.get().strip()
         ref = self.referer_entry.get().strip()
         ua = USER_AGENTS[self.ua_var.get()]
         
         # Get cache settings in main thread
-        try:
-            max_b = int(self.cache_bytes_entry.get())
-            back_b = int(self.cache_back_entry.get())
-        except:
-            max_b = CACHE_SETTINGS['max_bytes']
-            back_b = CACHE_SETTINGS['max_back_bytes']
+        max_b, back_b = self._cache_entry_values()
+        auto_cache = self.cache_auto_var.get()
 
         # Check if URL is placeholder or empty
         if not url or url == "Enter M3U8 stream URL...":
             show_custom_warning(self.root, "Warning", "Please enter a valid URL")
             return
         
+        # Resume: decide before loading so mpv opens at the offset (start=)
+        resume_pos = None
+        item = get_history_item(url)
+        if item and item.get('last_position', 0) > 5:
+            pos = item['last_position']
+            if ask_custom_yes_no(self.root, "Resume Playback", f"Resume from {format_time(pos)}?"):
+                resume_pos = pos
+
+        self._stop_dvr()
+        self._stop_live_tracker()
         self.current_url = url
         self.spinner.start()
         
@@ -768,91 +1363,173 @@ class M3U8StreamingPlayer:
         # Save to history
         save_history(url)
         self.refresh_history()
+        if self.zapper:
+            self._set_zap_channels(url)
         
         # Hide config
         if self.show_config:
             self.config_panel.pack_forget()
             self.show_config = False
             
-        # Threaded load (pass cache values)
-        threading.Thread(target=self._load_thread, args=(url, ref, ua, max_b, back_b), daemon=True).start()
+        # Background load (pass cache values); supersedes any load still running
+        self._mark_load_started("resume" if resume_pos else "fresh")
+        self.tasks.submit("load", self._load_job, url, ref, ua, max_b, back_b, auto_cache, resume_pos)
 
-    def _load_thread(self, url, ref, ua, max_b=None, back_b=None):
+    def _load_job(self, job, url, ref, ua, max_b=None, back_b=None, auto_cache=False, resume_pos=None):
+        """Worker thread. Stops at the next job.check() once another load was submitted."""
         try:
-            # Check URL validity first
-            headers = {"Referer": ref, "User-Agent": ua}
-            r = requests.head(url, headers=headers, timeout=10, allow_redirects=True)
-            if r.status_code >= 400:
-                self.root.after(0, lambda: show_custom_error(self.root, "Error", f"HTTP {r.status_code}"))
+            # Check URL validity first (and read the playlist if it is one)
+            # through the shared keep-alive client
+            client = get_client().with_headers({"Referer": ref, "User-Agent": ua})
+            try:
+                status, playlist = fetch_playlist(url, timeout=10, client=client, job=job)
+            except ValueError:
+                status, playlist = 200, None
+            job.check()
+            if status >= 400:
+                self.tasks.post(job, show_custom_error, self.root, "Error", f"HTTP {status}")
                 return
 
-            if self.player:
+            # Pick the starting variant before mpv opens anything
+            variants = playlist.sorted_variants() if playlist is not None and playlist.is_master else []
+            start = choose_start_variant(variants, self._abr_start_bandwidth(variants))
+
+            # Resume: fetch from the segment containing the offset, not segment 0
+            if resume_pos and playlist is not None and self.proxy:
+                self._prefetch_resume(job, client, playlist, start, resume_pos)
+
+            # Only the latest load gets past here, one at a time
+            with job.guard():
+                if not self.player: return
+                self.is_hls = playlist is not None
+                self.bypass_proxy = False
+                self.tasks.post(job, self._set_variants, variants, start)
+
+                # Auto cache: first sizing from the variant BANDWIDTH, refined once data arrives
+                self.cache_controller.reset(start.bandwidth if start else None)
+                decision = self.cache_controller.update(None) if auto_cache else None
+
                 # Apply Cache Settings BEFORE play
-                if max_b is not None:
-                    self.player.apply_cache_settings(max_b, back_b)
-                
-                self.player.play(url, headers={"Referer": ref}, user_agent=ua)
+                if decision:
+                    self.tasks.post(job, self._set_cache_entries, decision.forward_mb, decision.back_mb)
+                    self.player.apply_cache_settings(decision.forward_mb, decision.back_mb, decision.readahead_secs)
+                    if self.proxy and self.proxy.prefetcher:
+                        self.proxy.prefetcher.set_budget(decision.forward_mb * 1024 * 1024)
+                elif max_b is not None:
+                    self.player.apply_cache_settings(max_b, back_b, self.settings.get(
+                        'cache_readahead_secs', CACHE_SETTINGS['readahead_secs']))
+                    if self.proxy and self.proxy.prefetcher:
+                        self.proxy.prefetcher.set_budget(max_b * 1024 * 1024)
+
+                self.player.play(url, headers={"Referer": ref}, user_agent=ua,
+                                 hls_bitrate=start.bandwidth if start else None,
+                                 use_proxy=self.is_hls, start=resume_pos)
                 
                 self.is_playing = True
-                self.root.after(0, self._on_play_start)
-                
+                self.tasks.post(job, self._on_play_start)
+
+        except CancelledError:
+            raise
         except Exception as e:
-            self.root.after(0, lambda: show_custom_error(self.root, "Error", str(e)))
-            self.root.after(0, lambda: show_custom_error(self.root, "Error", str(e)))
+            self.tasks.post(job, show_custom_error, self.root, "Error", str(e))
 
     def _on_play_start(self):
         self.play_btn.config(text="⏸")
         self.video_canvas.focus_set()
+        self.expiry_scheduler.attach(self.current_url)
         
         # Update Quality List
         self.root.after(2000, self.update_quality_list)
-        
-        # Check for resume
-        self.root.after(500, self.check_resume_playback)
 
-    def check_resume_playback(self):
-        item = get_history_item(self.current_url)
-        if item and item.get('last_position', 0) > 5:
-            pos = item['last_position']
-            formatted = format_time(pos)
-            
-            # Pause player while user decides
-            if self.player and self.player.mpv:
-                self.player.mpv.pause = True
-                self.play_btn.config(text="▶")
-            
-            if ask_custom_yes_no(self.root, "Resume Playback", f"Resume from {formatted}?"):
-                self._retry_seek(pos)
-            
-            # Resume playback after decision
-            if not self.is_closing and self.player and self.player.mpv:
-                try:
-                    self.player.mpv.pause = False
-                    self.play_btn.config(text="⏸")
-                except Exception:
-                    # Ignore errors if player is dead/closing
-                    pass
-
-    def _retry_seek(self, pos, attempt=1):
-        """Try to seek to the position, retrying if MPV is not ready."""
-        # Check if player is ready and seekable
-        if self.player and self.player.is_seekable():
-            try:
-                self.player.seek(pos, "absolute")
-            except Exception as e:
-                # Actual seeking error (unexpected)
-                print(f"Seek command failed: {e}")
-                show_custom_error(self.root, "Error", f"Failed to seek: {e}")
+        # Zapping: preload the neighbouring channels once this one runs
+        if self.zapper:
+            self.root.after(self.ZAP_PREPARE_DELAY_MS, self._prepare_standbys)
+
+        # Live DVR: record from now on (HLS through the proxy only)
+        if self._use_proxy() and not self.dvr_buffer and self.settings.get('dvr_enabled', DVR_SETTINGS['enabled']):
+            self._start_dvr()
+
+        # Low-latency mode: follow the live edge beside mpv
+        self.latency_estimator.reset()
+        if self._use_proxy() and not self.live_tracker and self.settings.get('low_latency_enabled', LATENCY_SETTINGS['enabled']):
+            self._start_live_tracker()
+
+    def _prefetch_resume(self, job, client, playlist, variant, position):
+        """Point the proxy prefetcher at the resume offset (load worker)."""
+        try:
+            media_url = None
+            if playlist.is_master and variant:
+                status, playlist = fetch_playlist(variant.uri, timeout=10, client=client, job=job)
+                media_url = variant.uri
+            elif not playlist.is_master:
+                media_url = self.current_url
+            job.check()
+            if media_url and playlist is not None:
+                self.proxy.prefetch_at(media_url, playlist, position)
+        except CancelledError:
+            raise
+        except Exception as e:
+            print(f"Resume prefetch error: {e}")
+
+    def _origin_client(self):
+        """The shared client with the config panel's Referer / User-Agent on every request."""
+        return get_client().with_headers({"Referer": self.referer_entry.get().strip(),
+                                          "User-Agent": USER_AGENTS[self.ua_var.get()]})
+
+    def _expect_buffering(self):
+        """A seek or reopen follows: its buffering is a seek wait, not a stall (stall analytics)."""
+        if self.stall_stats: self.stall_stats.expect_buffering()
+
+    def _mark_load_started(self, kind):
+        """Start the click-to-first-frame timer ("fresh", "resume", "zap" or "refresh")."""
+        self._load_started_at = time.perf_counter()
+        self._load_kind = kind
+        if self.telemetry: self.telemetry.load_started(kind)
+        if self.stall_stats: self.stall_stats.begin(self.current_url)
+
+    def _variant_label(self, bandwidth):
+        # mpv event thread (stall analytics): plain attributes only
+        for variant in self.variants:
+            if variant.bandwidth == bandwidth:
+                return variant.label()
+        return None
+
+    def _record_first_frame(self):
+        elapsed = time.perf_counter() - self._load_started_at
+        self.startup_times[self._load_kind].append(elapsed)
+        self._load_started_at = None
+
+    def _set_variants(self, variants, selected=None):
+        """Fill the quality combobox from the master playlist variants."""
+        self.variants = variants
+        self._stop_abr()
+        self.abr = None
+        if len(variants) > 1:
+            # Entry 0 is "Auto"
+            self.quality_combo['values'] = ["Auto"] + [v.label() for v in variants]
+            self.abr = AbrController(
+                [v.bandwidth for v in variants],
+                buffer_low=self.settings.get('abr_buffer_low', ABR_SETTINGS['buffer_low']),
+                buffer_target=self.settings.get('abr_buffer_target', ABR_SETTINGS['buffer_target']),
+                safety=self.settings.get('abr_safety', ABR_SETTINGS['safety']),
+                estimator=self.abr_estimator)
+            if selected in variants and selected.bandwidth in self.abr.ladder:
+                self.abr.index = self.abr.ladder.index(selected.bandwidth)
+            if self.abr_auto:
+                self.quality_combo.current(0)
+                self._start_abr()
+            elif selected in variants:
+                self.quality_combo.current(variants.index(selected) + 1)
+            self.quality_combo.pack(pady=2) # Show combo
+            self.tasks.submit("abr-ladder", self._abr_segment_job, variants[0].uri, self._origin_client())
         else:
-            # Player not ready yet
-            if attempt <= 10: # Increased attempts since we are just checking property
-                # print(f"Player not seekable yet (attempt {attempt}). Retrying in 0.5s...")
-                self.root.after(500, lambda: self._retry_seek(pos, attempt + 1))
-            else:
-                show_custom_error(self.root, "Error", "Failed to resume: Stream is not seekable or timed out.")
+            self.quality_combo.set("")
+            self.quality_combo.pack_forget()
 
     def update_quality_list(self):
         if not self.player: return
+        # Already filled from the master playlist
+        if self.variants: return
         tracks = self.player.get_video_tracks()
         if not tracks: return
         
@@ -867,10 +1544,358 @@ class M3U8StreamingPlayer:
 
     def on_quality_change(self, event):
         selection = self.quality_combo.get()
-        if selection:
+        if selection and self.variants:
+            index = self.quality_combo.current() - 1 # entry 0 is "Auto"
+            if index < 0:
+                self.abr_auto = True
+                self.preferred_bandwidth = None
+                self._start_abr()
+            elif index < len(self.variants):
+                self.abr_auto = False
+                self._stop_abr()
+                bandwidth = self.variants[index].bandwidth
+                self.preferred_bandwidth = bandwidth
+                if not self.player.select_variant(bandwidth):
+                    self.refresh_stream()
+        elif selection:
             track_id = int(selection.split(':')[0])
             self.player.set_video_track(track_id)
 
+    def _abr_start_bandwidth(self, variants):
+        """Load worker: on Auto, open the variant the last measured throughput carries."""
+        if not self.abr_auto or not variants or self.abr_estimator.conservative() is None:
+            return self.preferred_bandwidth
+        abr = AbrController([v.bandwidth for v in variants],
+                            safety=self.settings.get('abr_safety', ABR_SETTINGS['safety']),
+                            estimator=self.abr_estimator)
+        return abr.ladder[abr.start_index()]
+
+    def _start_abr(self):
+        if self.abr and not self._abr_job:
+            self._abr_segment = None
+            self._abr_job = self.root.after(self.ABR_TICK_MS, self._abr_tick)
+
+    def _stop_abr(self):
+        if self._abr_job:
+            self.root.after_cancel(self._abr_job)
+            self._abr_job = None
+
+    def _abr_throughput(self, cache_state):
+        """(bits/s, seconds measured) since the last tick, or None while nothing was downloaded."""
+        if self.proxy and self._use_proxy():
+            # Through the proxy mpv reads from localhost: use the origin transfers completed
+            # since the last tick, over the time the link was busy (TTFB included)
+            size, busy = self.proxy.transfers.take()
+            return (size * 8 / busy, busy) if size and busy > 0 else None
+        rate = cache_state.get('raw-input-rate')
+        return (rate * 8, self.ABR_TICK_MS / 1000) if rate else None
+
+    def _abr_tick(self):
+        """Twice a second: feed the throughput estimate; pick the variant when the playhead enters a new segment."""
+        self._abr_job = None
+        if not self.abr or not self.abr_auto or not self.player or self.is_closing: return
+        self._abr_job = self.root.after(self.ABR_TICK_MS, self._abr_tick)
+        if not self.is_playing or self._dvr_origin is not None or self.player.is_paused(): return
+        cache_state = self.player.get_demuxer_cache_state()
+        if not isinstance(cache_state, dict): return
+        sample = self._abr_throughput(cache_state)
+        if sample: self.abr.add_sample(*sample)
+
+        pos = self.player.get_time_pos()
+        if pos is None: return
+        segment = int(pos // self.abr.segment_duration)
+        if segment == self._abr_segment: return
+        self._abr_segment = segment
+        previous = self.abr.bandwidth
+        self.abr.choose(cache_state.get('cache-duration'))
+        if self.abr.bandwidth != previous:
+            # Switches the video track; the demuxer fetches the new variant from the next segment on
+            self.player.select_variant(self.abr.bandwidth)
+
+    def _abr_segment_job(self, job, media_url, client):
+        """Worker: the ABR decides once per segment, so it needs the variant's target duration."""
+        try:
+            status, playlist = fetch_playlist(media_url, timeout=10, client=client, job=job)
+            if status < 400 and playlist is not None and not playlist.is_master and playlist.target_duration:
+                self.tasks.post(job, self._set_abr_segment_duration, playlist.target_duration)
+        except CancelledError:
+            raise
+        except Exception as e:
+            print(f"ABR playlist error: {e}")
+
+    def _set_abr_segment_duration(self, seconds):
+        if self.abr:
+            self.abr.segment_duration = seconds
+
+    def start_recording(self):
+        """Download the current stream's segments to a file, independent of playback."""
+        url = self.current_url or self.url_entry.get().strip()
+        if not url or url == "Enter M3U8 stream URL...":
+            show_custom_warning(self.root, "Warning", "Please enter a valid URL")
+            return
+        if self.recorder and self.recorder.running:
+            show_custom_warning(self.root, "Warning", "A recording is already running")
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Record Stream", defaultextension=".mp4",
+            initialfile=get_unique_filename(os.getcwd(), f"recording_{datetime.now():%Y%m%d_%H%M%S}.mp4"),
+            filetypes=[("MP4 video", "*.mp4"), ("MPEG-TS", "*.ts")])
+        if not path: return
+
+        self.recorder = HlsRecorder(
+            url, path, client=self._origin_client(), bandwidth=self.preferred_bandwidth,
+            workers=self.settings.get('record_workers', RECORD_SETTINGS['workers']),
+            retries=self.settings.get('record_retries', RECORD_SETTINGS['retries']),
+            on_progress=self._on_record_progress_thread)
+        self.recorder.start()
+        self.show_notice("Recording started", color=COLORS['record_active'])
+
+    def stop_recording(self):
+        if self.recorder and self.recorder.running:
+            self.recorder.stop()
+
+    def _on_record_progress_thread(self, progress):
+        # Recorder thread: forward at most twice a second, always the final states
+        now = time.monotonic()
+        if progress.state == "downloading" and now - self._record_shown < 0.5: return
+        self._record_shown = now
+        self.tasks.call_soon(self._on_record_progress, progress.state, progress.describe())
+
+    def _on_record_progress(self, state, text):
+        if state == "failed":
+            self.show_notice(text + " (record again to resume)", color=COLORS['status_stopped_fg'], duration=15000)
+        elif state in ("done", "stopped"):
+            self.show_notice(text, color=COLORS['status_playing_fg'])
+        else:
+            self.show_notice(text, color=COLORS['record_active'], duration=3000)
+
+    # --- Live DVR ---
+
+    def _start_dvr(self):
+        """Record the live stream for time-shift; stops by itself if it is VOD."""
+        window = self.settings.get('dvr_window_minutes', DVR_SETTINGS['window_minutes']) * 60
+        try:
+            self.dvr_buffer = DvrBuffer(self.settings.get('dvr_directory', DVR_SETTINGS['directory']), window)
+        except Exception as e:
+            print(f"DVR error: {e}")
+            return
+        url = self.current_url
+        self.dvr_recorder = DvrRecorder(
+            url, self.dvr_buffer, client=self._origin_client(), bandwidth=self.preferred_bandwidth,
+            fetch_segment=self.proxy.fetch_segment if self.proxy else None,
+            on_not_live=lambda: self.tasks.call_soon(self._stop_dvr, url),
+            on_error=lambda msg: self.tasks.call_soon(self.show_notice, f"DVR: {msg}"))
+        self.dvr_recorder.start()
+
+    def _stop_dvr(self, url=None):
+        """Drop the time-shift buffer (only if it still belongs to url, when given)."""
+        if url is not None and url != self.current_url: return
+        if self.dvr_recorder:
+            self.dvr_recorder.stop()
+        if self.dvr_buffer:
+            self.dvr_buffer.close(remove=True)
+        self.dvr_recorder = None
+        self.dvr_buffer = None
+        self._dvr_origin = None
+        self._dvr_paused_at = None
+
+    def _on_eof(self):
+        # A DVR snapshot ran out: continue live instead of stopping
+        if self._dvr_origin is not None and self._dvr_active(): self._go_live()
+        else: self.stop_stream()
+
+    def _dvr_active(self):
+        return bool(self.dvr_buffer and self.dvr_buffer.window())
+
+    def _dvr_position(self, cur=None):
+        """DVR time being played: snapshot origin + time-pos, or the live edge."""
+        start, end = self.dvr_buffer.window()
+        if self._dvr_origin is None: return end
+        if cur is None: cur = self.player.get_time_pos()
+        return self._dvr_origin + (cur or 0)
+
+    def _open_dvr_at(self, t):
+        """Play the recorded window as a local VOD snapshot, from DVR time t."""
+        path, origin = self.dvr_buffer.write_snapshot()
+        if not path: return
+        start, end = self.dvr_buffer.window()
+        t = max(start, min(t, end))
+        self._dvr_origin = origin
+        self._dvr_snapshot_end = end
+        self._dvr_paused_at = None
+        self._shown_tick = None
+        self._expect_buffering()
+        self.player.play(path, use_proxy=False, start=t - origin)
+
+    def _go_live(self):
+        """Back to the live URL (mpv joins at the live edge)."""
+        self._dvr_origin = None
+        self._dvr_paused_at = None
+        self._shown_tick = None
+        self.latency_estimator.reset()
+        bandwidth = self.abr.bandwidth if self.abr and self.abr_auto else self.preferred_bandwidth
+        self._expect_buffering()
+        self.player.play(self.current_url, headers={"Referer": self.referer_entry.get().strip()},
+                         user_agent=USER_AGENTS[self.ua_var.get()],
+                         hls_bitrate=bandwidth, use_proxy=self._use_proxy())
+
+    def _seek_dvr(self, t):
+        """Seek to DVR time t: in the open snapshot, a newer snapshot, or live."""
+        start, end = self.dvr_buffer.window()
+        t = max(start, t)
+        if end - t < 3 * self.dvr_buffer.target_duration:
+            if self._dvr_origin is not None: self._go_live()
+        elif self._dvr_origin is not None and self._dvr_origin <= t < self._dvr_snapshot_end:
+            self._expect_buffering()
+            self.player.seek(t - self._dvr_origin, "absolute")
+        else:
+            self._open_dvr_at(t)
+
+    def _update_dvr_position(self, cur):
+        """Seek bar over the DVR window: right end is live, label shows time behind."""
+        start, end = self.dvr_buffer.window()
+        pos = self._dvr_position(cur)
+        tick = ('dvr', int(pos), int(start), int(end))
+        if tick == self._shown_tick: return
+        self._shown_tick = tick
+        live = self._dvr_origin is None
+        self.time_label_left.config(text="LIVE" if live else f"-{format_time(max(0, end - pos))}")
+        self.time_label_right.config(text=format_time(end - start))
+        self.progress_scale.set_progress(0 if end <= start else (min(pos, end) - start) / (end - start) * 100)
+        self.progress_scale.set_buffer(100) # the whole window is on disk
+        if live or self.player.is_paused(): return
+
+        # Playing a snapshot: reopen it before its end while the window grew,
+        # and catch up with the window start once it was evicted
+        if end > self._dvr_snapshot_end and pos > self._dvr_snapshot_end - 2 * self.dvr_buffer.target_duration:
+            self._open_dvr_at(pos)
+        elif pos < start:
+            self._open_dvr_at(start)
+
+    # --- Low-latency live mode ---
+
+    def _start_live_tracker(self):
+        url = self.current_url
+        partial = self.settings.get('latency_partial_segments', LATENCY_SETTINGS['partial_segments']) and self.proxy
+        self.live_tracker = LiveEdgeTracker(
+            url, client=self._origin_client(), bandwidth=self.preferred_bandwidth,
+            blocking=self.settings.get('latency_blocking_reload', LATENCY_SETTINGS['blocking_reload']),
+            partial=bool(partial),
+            on_part=(lambda part_url: self.proxy.fetch_segment(part_url)) if partial else None,
+            on_segment_parts=self.proxy.set_parts if partial else None,
+            on_not_live=lambda: self.tasks.call_soon(self._stop_live_tracker, url))
+        self.live_tracker.start()
+        self._latency_job = self.root.after(self.LATENCY_TICK_MS, self._latency_tick)
+
+    def _stop_live_tracker(self, url=None):
+        if url is not None and url != self.current_url: return
+        if self.live_tracker:
+            self.live_tracker.stop()
+            self.live_tracker = None
+        if self._latency_job:
+            self.root.after_cancel(self._latency_job)
+            self._latency_job = None
+        self.latency_estimator.reset()
+        self._set_speed(1.0)
+
+    def _set_speed(self, speed):
+        if speed == self._speed or not self.player: return
+        try:
+            self.player.set_speed(speed)
+            self._speed = speed
+        except Exception as e:
+            print(f"Speed error: {e}")
+
+    def _latency_tick(self):
+        """Twice a second: estimate the live latency and steer speed / skip towards the target."""
+        self._latency_job = None
+        if not self.live_tracker or not self.player or self.is_closing: return
+        self._latency_job = self.root.after(self.LATENCY_TICK_MS, self._latency_tick)
+        if self._dvr_origin is not None or not self.is_playing:
+            # Time-shifted on purpose (DVR snapshot) or stopped
+            self._set_speed(1.0)
+            return
+
+        playlist, received_at = self.live_tracker.snapshot()
+        latency = self.latency_estimator.update(self.player.get_time_pos(), playlist, received_at)
+        if self.player.is_paused(): return
+        cache_state = self.player.get_demuxer_cache_state()
+        buffered = cache_state.get('cache-duration') if isinstance(cache_state, dict) else None
+        speed, skip = self.latency_controller.update(latency, buffered)
+        self._set_speed(speed)
+        if not skip: return
+
+        target = self.latency_controller.target
+        if buffered and buffered > skip + 1:
+            # The excess is already downloaded: jump inside the cache
+            self._quiet_until = time.time() + self.CACHED_SEEK_QUIET
+            self._expect_buffering()
+            self.player.seek(skip)
+        elif time.time() - self._latency_rejoin_at > self.LATENCY_REJOIN_COOLDOWN:
+            self._latency_rejoin_at = time.time()
+            self._go_live()
+        else:
+            return
+        self.show_notice(f"Skipped to the live edge ({latency:.0f}s behind, target {target:.0f}s)",
+                         color=COLORS['status_playing_fg'], duration=3000)
+
+    def show_notice(self, text, color='#FFA500', duration=8000):
+        """Show a short message over the video without blocking playback."""
+        if self._notice_job:
+            self.root.after_cancel(self._notice_job)
+        self.notice_label.config(text=text, fg=color)
+        self.notice_label.place(relx=1.0, x=-10, y=10, anchor=tk.NE)
+        self.notice_label.lift()
+        self._notice_job = self.root.after(duration, self._hide_notice)
+
+    def _hide_notice(self):
+        self._notice_job = None
+        self.notice_label.place_forget()
+
+    def _on_expiry_warning(self, url, seconds_left):
+        if url != self.current_url: return
+        action = "renewing automatically" if self.expiry_scheduler.renew_command else "reload with a fresh link"
+        self.show_notice(f"Stream link expires in {format_time(seconds_left)} ({action})")
+
+    def _on_renew_failed(self, url, reason):
+        if url != self.current_url: return
+        left = self.expiry_scheduler.seconds_left() or 0
+        self.show_notice(f"Link expires in {format_time(max(0, left))}, renewal failed: {reason}",
+                         color=COLORS['status_stopped_fg'], duration=15000)
+
+    def _hot_swap_url(self, old_url, new_url):
+        """Continue at the current position on a renewed URL (single loadfile replace)."""
+        if old_url != self.current_url or not self.player: return
+        pos = self.player.get_time_pos()
+        ref = self.referer_entry.get().strip()
+        ua = USER_AGENTS[self.ua_var.get()]
+
+        # History follows the new link, keeping the name and position
+        item = get_history_item(old_url)
+        save_history(new_url, item.get('name') if item else None)
+        if pos: update_history_progress(new_url, pos)
+        # The expired link would stay behind as a dead duplicate (history, zap list, stall stats)
+        remove_history(old_url)
+        if self.stall_stats: self.stall_stats.rename(old_url, new_url)
+        if old_url in self.zap_channels:
+            self.zap_channels[self.zap_channels.index(old_url)] = new_url
+        self.current_url = new_url
+
+        if self.dvr_recorder:
+            self.dvr_recorder.url = new_url
+        if self.live_tracker:
+            self.live_tracker.url = new_url
+            self.latency_estimator.reset()
+        if self._dvr_origin is None:
+            # (a DVR snapshot plays local files and keeps going)
+            self._expect_buffering()
+            self.player.replace_url(new_url, pos, headers={"Referer": ref}, user_agent=ua,
+                                    hls_bitrate=self.preferred_bandwidth, use_proxy=self._use_proxy())
+        self.expiry_scheduler.attach(new_url)
+        if self.show_history:
+            self.refresh_history()
+        self.show_notice("Stream link renewed", color=COLORS['status_playing_fg'], duration=4000)
+
     def toggle_play_pause(self):
         if not self.current_url:
             show_custom_warning(self.root, "Warning", "Please load a URL first")
@@ -880,17 +1905,74 @@ class M3U8StreamingPlayer:
             self.play_btn.config(text="▶")
             self.spinner.stop() # Ensure spinner is hidden when paused
             self.pause_start_time = time.time() # Record pause time
+            if self._dvr_active():
+                # Time-shift: a long pause on live continues from the recording
+                if self._dvr_origin is None: self._dvr_paused_at = self._dvr_position()
+            else:
+                self._schedule_resume_check()
         else:
-            # Check if we should refresh before resuming
+            if self._dvr_paused_at is not None and self._dvr_active() and self.pause_start_time \
+                    and time.time() - self.pause_start_time > self.PAUSE_REFRESH_THRESHOLD:
+                self.pause_start_time = None
+                self.play_btn.config(text="⏸")
+                self._open_dvr_at(self._dvr_paused_at)
+                return
+            self._dvr_paused_at = None
+
+            # Long pause: reload only if the background check said so (or never finished)
             if self.pause_start_time and (time.time() - self.pause_start_time > self.PAUSE_REFRESH_THRESHOLD):
+                plan = self._resume_plan
+                self._cancel_resume_check()
                 self.pause_start_time = None
-                self.refresh_stream()
-                return # refresh_stream will handle setting button text
+                if not plan or plan.action != "resume" or plan.age() > self.RESUME_CHECK_INTERVAL + 5:
+                    # Live: the paused position left the window, join where the prefetch went
+                    self.refresh_stream(live_edge=bool(plan and plan.is_live))
+                    return # refresh_stream will handle setting button text
 
+            self._cancel_resume_check()
             self.play_btn.config(text="⏸")
             self.pause_start_time = None
 
+    def _schedule_resume_check(self):
+        """First check shortly before the pause reaches the refresh threshold."""
+        self._cancel_resume_check()
+        delay = max(0, self.PAUSE_REFRESH_THRESHOLD - self.RESUME_CHECK_LEAD)
+        self._resume_check_job = self.root.after(int(delay * 1000), self._run_resume_check)
+
+    def _cancel_resume_check(self):
+        self.tasks.cancel("resume-check")
+        if self._resume_check_job:
+            self.root.after_cancel(self._resume_check_job)
+            self._resume_check_job = None
+        self._resume_plan = None
+
+    def _run_resume_check(self):
+        self._resume_check_job = None
+        if not self.pause_start_time or not self.resume_planner or self.is_closing: return
+        url = self.current_url
+        pos = self.player.get_time_pos() if self.player else None
+        bandwidth = self.preferred_bandwidth
+        client = self._origin_client()
+
+        def worker(job):
+            plan = self.resume_planner.plan(url, pos, bandwidth, client=client)
+            self.tasks.post(job, self._on_resume_plan, url, plan)
+
+        self.tasks.submit("resume-check", worker)
+        self._resume_check_job = self.root.after(self.RESUME_CHECK_INTERVAL * 1000, self._run_resume_check)
+
+    def _on_resume_plan(self, url, plan):
+        # Ignore answers for a previous stream or a pause that already ended
+        if url == self.current_url and self.pause_start_time:
+            self._resume_plan = plan
+
     def stop_stream(self):
+        self._cancel_resume_check()
+        self.expiry_scheduler.detach()
+        self._stop_dvr()
+        self._stop_live_tracker()
+        if self.stall_stats:
+            self.stall_stats.finish()
         if self.player:
             self.player.stop()
             self.is_playing = False
@@ -907,10 +1989,14 @@ class M3U8StreamingPlayer:
             self.time_label_left.config(text="00:00:00")
             self.progress_scale.set_progress(0)
             self.progress_scale.set_buffer(0)
+            self._shown_tick = None
 
-    def refresh_stream(self):
-        """Perform a 'Medium Reset' by reloading the stream at current position."""
+    def refresh_stream(self, live_edge=False):
+        """Perform a 'Medium Reset' by reloading the stream at current position (or the live edge)."""
         if not self.player or not self.current_url: return
+        if self._dvr_origin is not None and self._dvr_active():
+            self._open_dvr_at(self._dvr_position())
+            return
         
         pos = self.player.get_time_pos()
         if pos is None: pos = 0
@@ -922,18 +2008,23 @@ class M3U8StreamingPlayer:
         ref = self.referer_entry.get().strip()
         ua = USER_AGENTS[self.ua_var.get()]
         
+        # A load still in flight would replace this one
+        self.tasks.cancel("load")
         self.player.stop()
         
         # Apply current cache settings BEFORE play
         self._apply_current_cache_settings()
         
-        self.player.play(self.current_url, headers={"Referer": ref}, user_agent=ua)
+        # Re-open directly at the original position (timed apart from fresh / resumed loads);
+        # without start= mpv joins a live stream at its edge
+        self._mark_load_started("refresh")
+        self.latency_estimator.reset()
+        self.player.play(self.current_url, headers={"Referer": ref}, user_agent=ua,
+                         hls_bitrate=self.preferred_bandwidth, use_proxy=self._use_proxy(),
+                         start=None if live_edge else pos)
 
         self.is_playing = True
         self.play_btn.config(text="⏸")
-        
-        # Seek back to original position
-        self.root.after(500, lambda: self._retry_seek(pos))
 
     def _apply_current_cache_settings_ui(self):
         """Called from UI (Apply button or Enter) to apply and notify."""
@@ -968,6 +2059,12 @@ class M3U8StreamingPlayer:
 
             max_b = safe_int(self.cache_bytes_entry.get(), CACHE_SETTINGS['max_bytes'])
             back_b = safe_int(self.cache_back_entry.get(), CACHE_SETTINGS['max_back_bytes'])
+            # Manual mode: undo a readahead the Auto controller may have set
+            readahead = self.settings.get('cache_readahead_secs', CACHE_SETTINGS['readahead_secs'])
+            # Auto mode: entries mirror the controller, also restore its readahead
+            d = self.cache_controller.decision
+            if self.cache_auto_var.get() and d:
+                max_b, back_b, readahead = d.forward_mb, d.back_mb, d.readahead_secs
             pause_t = safe_int(self.pause_threshold_entry.get(), CACHE_SETTINGS['pause_refresh_threshold'])
             
             # Update local threshold
@@ -976,8 +2073,12 @@ class M3U8StreamingPlayer:
             # Save to persistent settings
             self.settings['pause_refresh_threshold'] = pause_t
             save_settings(self.settings)
+
+            # Prefetch never runs further ahead than the forward cache
+            if self.proxy and self.proxy.prefetcher:
+                self.proxy.prefetcher.set_budget(max_b * 1024 * 1024)
             
-            return self.player.apply_cache_settings(max_b, back_b)
+            return self.player.apply_cache_settings(max_b, back_b, readahead)
         except Exception as e:
             print(f"GUI Apply Cache error: {e}")
             return False
@@ -985,16 +2086,40 @@ class M3U8StreamingPlayer:
 
 
     def skip(self, seconds):
-        if self.player: self.player.seek(seconds)
+        if self.player and self._dvr_active():
+            self._seek_dvr(self._dvr_position() + seconds)
+        elif self.player:
+            self._expect_buffering()
+            self.player.seek(seconds)
 
     def on_seek_move(self, value):
         pass
 
+    def is_cached(self, t):
+        """True if a seek to t can be served from the demuxer cache."""
+        if self.buffered:
+            return self.buffered.contains(t, self.CACHED_SEEK_MARGIN)
+        # No seekable-ranges: only the forward buffer is known
+        cur = self.player.get_time_pos()
+        buf = self.player.get_buffered_time()
+        return cur is not None and buf is not None and cur <= t <= buf - self.CACHED_SEEK_MARGIN
+
     def on_seek_end(self, value):
+        if self.player and self._dvr_active():
+            start, end = self.dvr_buffer.window()
+            self._seek_dvr(start + (value / 100.0) * (end - start))
+            return
         if self.player:
             dur = self.player.get_duration()
             if dur:
                 t = (value / 100.0) * dur
+                if self.is_cached(t):
+                    # Instant: mpv seeks inside its cache, keep the spinner away
+                    self._quiet_until = time.time() + self.CACHED_SEEK_QUIET
+                else:
+                    self._quiet_until = 0
+                    self.spinner.start()
+                self._expect_buffering()
                 self.player.seek(t, "absolute")
 
     def toggle_mute(self):
@@ -1026,40 +2151,83 @@ class M3U8StreamingPlayer:
         else:
             return f"{bytes_per_sec / (1024 * 1024):.2f} MB/s"
 
-    def update_player_info(self):
-        if self.player and self.is_playing:
-            try:
-                cur = self.player.get_time_pos()
-                dur = self.player.get_duration()
-                if cur is not None and dur and not self.is_seeking:
-                    self.time_label_left.config(text=format_time(cur))
-                    self.time_label_right.config(text=format_time(dur))
-                    self.time_label_left.config(text=format_time(cur))
-                    self.time_label_right.config(text=format_time(dur))
-                    self.progress_scale.set_progress((cur / dur) * 100)
-                    
-                    # Update buffer
-                    buf = self.player.get_buffered_time()
-                    if buf:
-                        self.progress_scale.set_buffer((buf / dur) * 100)
-                    
-                    # Save progress every 5 seconds approx (modulo check)
-                    if int(cur) % 5 == 0:
-                        update_history_progress(self.current_url, cur)
-                
-                # Update network speed indicator (on spinner during buffering)
-                cache_state = self.player.get_demuxer_cache_state()
-                if cache_state and isinstance(cache_state, dict):
-                    raw_rate = cache_state.get('raw-input-rate', 0)
-                    if raw_rate and raw_rate > 0:
-                        speed_text = self.format_speed(raw_rate)
-                        self.spinner.set_speed(speed_text)
-                    else:
-                        self.spinner.set_speed("")
-                else:
-                    self.spinner.set_speed("")
-            except: pass
-        self.root.after(1000, self.update_player_info)
+    def update_player_info(self, state, changed):
+        """Subscriber for time-pos / duration / demuxer-cache-time."""
+        if not self.is_playing or self.is_seeking: return
+        cur = state.get('time-pos')
+        if cur is not None and self._load_started_at is not None:
+            self._record_first_frame()
+        if cur is not None and self._dvr_active():
+            # Live with DVR: the seek bar spans the recorded window, no resume point
+            try: self._update_dvr_position(cur)
+            except Exception as e: print(f"DVR position error: {e}")
+            return
+        dur = state.get('duration')
+        if cur is None or not dur: return
+        # time-pos changes every frame, the widgets only need whole seconds
+        buf = state.get('demuxer-cache-time')
+        tick = (int(cur), int(buf or 0), dur)
+        if tick == self._shown_tick: return
+        self._shown_tick = tick
+        try:
+            self.time_label_left.config(text=format_time(cur))
+            self.time_label_right.config(text=format_time(dur))
+            self.progress_scale.set_progress((cur / dur) * 100)
+            
+            self._update_buffered_ranges(state, dur)
+            
+            # Save progress every 5 seconds of playback
+            slot = int(cur) // 5
+            if slot != self._progress_slot:
+                self._progress_slot = slot
+                update_history_progress(self.current_url, cur)
+                if self.show_history:
+                    self.history_panel.update_item(get_history_item(self.current_url))
+        except: pass
+
+    def _update_buffered_ranges(self, state, dur):
+        """Seek bar buffer: every seekable cached range, or the cached prefix."""
+        if self.buffered:
+            self.progress_scale.set_buffered_ranges(self.buffered.percentages(dur))
+        else:
+            buf = state.get('demuxer-cache-time')
+            if buf:
+                self.progress_scale.set_buffer((buf / dur) * 100)
+
+    def _record_metrics(self, state, cache_state):
+        """Feed the overlay time series (recorded even while the overlay is hidden)."""
+        if not isinstance(cache_state, dict): return
+        fw = cache_state.get('fw-bytes')
+        total = cache_state.get('total-bytes')
+        drops = state.get('frame-drop-count')
+        drop_delta = None
+        if drops is not None:
+            if self._last_drop_count is not None and drops >= self._last_drop_count:
+                drop_delta = drops - self._last_drop_count
+            self._last_drop_count = drops
+        self.metrics.record({
+            "fw_bytes": fw,
+            "back_bytes": max(0, total - fw) if total is not None and fw is not None else None,
+            "input_rate": cache_state.get('raw-input-rate'),
+            "buffered_seconds": cache_state.get('cache-duration'),
+            "dropped_frames": drop_delta,
+        })
+
+    def on_cache_state(self, state, changed):
+        """Subscriber for demuxer-cache-state: buffered ranges and the speed indicator."""
+        cache_state = state.get('demuxer-cache-state')
+        self.buffered = RangeMap.from_cache_state(cache_state)
+        self._record_metrics(state, cache_state)
+        if self.is_playing and self.cache_auto_var.get():
+            decision = self.cache_controller.update(cache_state, state.get('video-bitrate'), state.get('audio-bitrate'))
+            if decision:
+                self._apply_auto_cache(decision)
+        if self.is_playing and cache_state and isinstance(cache_state, dict):
+            raw_rate = cache_state.get('raw-input-rate', 0)
+            if raw_rate and raw_rate > 0:
+                self.spinner.set_speed(self.format_speed(raw_rate))
+                return
+        self.spinner.set_speed("")
 
     def on_volume_enter(self, event):
         if self.volume_hide_timer:
@@ -1380,6 +2548,7 @@ class M3U8StreamingPlayer:
             ("F", "Toggle Fullscreen"),
             ("Escape", "Exit Fullscreen"),
             ("H", "Toggle History Panel"),
+            ("PgDn / PgUp", "Next / Previous Channel (zapping mode)"),
             ("", ""),
             ("Video Controls", ""),
             ("Single Click", "Play / Pause (on video)"),
@@ -1474,6 +2643,8 @@ class M3U8StreamingPlayer:
 
     def on_closing(self):
         self.is_closing = True
+        self.tasks.shutdown()
+        self.expiry_scheduler.detach()
         self.spinner.stop()
         
         if self.player:
@@ -1483,4 +2654,17 @@ class M3U8StreamingPlayer:
                 if pos: update_history_progress(self.current_url, pos)
             except: pass
             self.player.terminate()
+        if self.proxy:
+            self.proxy.stop()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        if self.zapper:
+            self.zapper.stop()
+        if self.recorder:
+            self.recorder.stop()
+        self._stop_dvr()
+        self._stop_live_tracker()
+        if self.stall_stats:
+            self.stall_stats.finish()
+        flush_history()
         self.root.destroy()
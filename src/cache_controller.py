@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+
+# -------------------------------------------------
+#  Adaptive ("Auto") cache sizing
+# -------------------------------------------------
+#  Sizes demuxer-max-bytes / demuxer-max-back-bytes / demuxer-readahead-secs
+#  from the stream's measured bitrate so the forward cache holds a target
+#  number of seconds, capped by a fraction of the RAM that is actually free.
+#  Bitrate comes from the cache itself (fw-bytes / cache-duration), falling
+#  back to mpv's video+audio bitrate or the HLS variant BANDWIDTH.
+
+MB = 1024 * 1024
+
+
+def available_memory():
+    """Free physical memory in bytes, or None if it cannot be determined."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/meminfo', 'r') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+    if os.name == 'nt':
+        try:
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+            stat = MEMORYSTATUSEX()
+            stat.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(stat))
+            return stat.ullAvailPhys
+        except Exception:
+            return None
+    return None
+
+
+class CacheDecision:
+    __slots__ = ('forward_mb', 'back_mb', 'readahead_secs', 'bitrate', 'source', 'limited_by')
+
+    def __init__(self, forward_mb, back_mb, readahead_secs, bitrate, source, limited_by):
+        self.forward_mb = forward_mb
+        self.back_mb = back_mb
+        self.readahead_secs = readahead_secs
+        self.bitrate = bitrate          # bytes/s of media
+        self.source = source            # where the bitrate came from
+        self.limited_by = limited_by    # None, "ram", "min" or "max"
+
+    def describe(self):
+        text = f"{self.forward_mb}/{self.back_mb} MB, {self.readahead_secs}s @ {self.bitrate * 8 / 1e6:.1f} Mbps ({self.source})"
+        if self.limited_by:
+            text += f" [{self.limited_by}]"
+        return text
+
+
+class AdaptiveCacheController:
+    def __init__(self, target_seconds=60, back_seconds=30, ram_fraction=0.25,
+                 min_mb=16, max_mb=2048, retune_interval=10.0, hysteresis=0.2):
+        self.target_seconds = target_seconds
+        self.back_seconds = back_seconds
+        self.ram_fraction = ram_fraction
+        self.min_mb = min_mb
+        self.max_mb = max_mb
+        self.retune_interval = retune_interval
+        self.hysteresis = hysteresis
+        self.bandwidth_hint = None      # HLS variant BANDWIDTH (bits/s)
+        self.decision = None            # last applied CacheDecision
+        self._rate = None               # EWMA bytes/s of media
+        self._last_tune = 0.0
+
+    def reset(self, bandwidth_hint=None):
+        """New stream: forget the measured bitrate."""
+        self.bandwidth_hint = bandwidth_hint
+        self._rate = None
+        self.decision = None
+        self._last_tune = 0.0
+
+    def _measure(self, cache_state, video_bitrate, audio_bitrate):
+        """(bytes per media second, source) or (None, None)."""
+        if isinstance(cache_state, dict):
+            fw = cache_state.get('fw-bytes')
+            dur = cache_state.get('cache-duration')
+            if fw and dur and dur >= 2:
+                rate = fw / dur
+                self._rate = rate if self._rate is None else 0.8 * self._rate + 0.2 * rate
+                return self._rate, "cache"
+        if self._rate is not None:
+            return self._rate, "cache"
+        if video_bitrate:
+            return (video_bitrate + (audio_bitrate or 0)) / 8, "codec"
+        if self.bandwidth_hint:
+            return self.bandwidth_hint / 8, "playlist"
+        return None, None
+
+    def update(self, cache_state, video_bitrate=None, audio_bitrate=None, now=None):
+        """
+        Feed the latest demuxer-cache-state. Returns a new CacheDecision when the
+        limits should change, else None.
+        """
+        now = time.monotonic() if now is None else now
+        rate, source = self._measure(cache_state, video_bitrate, audio_bitrate)
+        if rate is None:
+            return None
+        if self.decision is not None and now - self._last_tune < self.retune_interval:
+            return None
+
+        forward = rate * self.target_seconds * 1.25     # headroom for bitrate peaks
+        back = rate * self.back_seconds
+        limited_by = None
+
+        free = available_memory()
+        if free:
+            budget = free * self.ram_fraction
+            if forward + back > budget:
+                scale = budget / (forward + back)
+                forward *= scale
+                back *= scale
+                limited_by = "ram"
+
+        forward_mb = int(forward / MB)
+        back_mb = int(back / MB)
+        if forward_mb < self.min_mb:
+            forward_mb, limited_by = self.min_mb, limited_by or "min"
+        if forward_mb > self.max_mb:
+            forward_mb, limited_by = self.max_mb, "max"
+        back_mb = max(self.min_mb // 2, min(self.max_mb, back_mb))
+        # Read ahead no further than the forward cache can hold
+        readahead = int(max(5, min(self.target_seconds, forward_mb * MB / rate)))
+
+        decision = CacheDecision(forward_mb, back_mb, readahead, rate, source, limited_by)
+        previous = self.decision
+        if previous is not None:
+            change = abs(forward_mb - previous.forward_mb) / max(previous.forward_mb, 1)
+            if change < self.hysteresis and readahead == previous.readahead_secs:
+                # Keep the applied limits, just refresh the reported bitrate
+                previous.bitrate = rate
+                previous.source = source
+                return None
+        self.decision = decision
+        self._last_tune = now
+        return decision
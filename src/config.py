@@ -66,4 +66,112 @@ CACHE_SETTINGS = {
     "max_bytes": 100,       # MB
     "max_back_bytes": 100,   # MB
     "pause_refresh_threshold": 60, # Seconds (1 minutes)
+    "readahead_secs": 1,    # demuxer-readahead-secs outside Auto mode (mpv default)
+    # "Auto" mode: size the cache from the measured stream bitrate
+    "auto": False,
+    "auto_target_seconds": 60,  # Forward buffer to aim for
+    "auto_back_seconds": 30,    # Back buffer for rewinds
+    "auto_ram_fraction": 0.25,  # Max share of free RAM for both caches
+    "auto_min_mb": 16,
+    "auto_max_mb": 2048,
+}
+
+# -------------------------------------------------
+#  History Storage Defaults
+# -------------------------------------------------
+HISTORY_SETTINGS = {
+    "backend": "json",      # "json" (history.json) or "sqlite" (history.db)
+    "limit": 50,            # Max entries kept, 0 = unlimited
+}
+
+# -------------------------------------------------
+#  Local HLS Caching Proxy Defaults
+# -------------------------------------------------
+PROXY_SETTINGS = {
+    "enabled": False,       # Route HLS through the local caching proxy
+    "ram_mb": 256,          # In-memory segment cache
+    "disk_mb": 2048,        # On-disk segment cache
+    "cache_dir": "segment_cache",
+    "prefetch_workers": 8,  # Max parallel segment downloads, 0 = no prefetch
+}
+
+# -------------------------------------------------
+#  Debug Overlay (Ctrl+D) Graph
+# -------------------------------------------------
+DEBUG_SETTINGS = {
+    "graph_window": 30,     # Seconds shown in the graph (click the graph to cycle)
+    "graph_windows": [30, 300, 3600, 7200],
+    "graph_points": 120,    # Points kept per series, memory is fixed whatever the window
+}
+
+# -------------------------------------------------
+#  Prometheus Metrics Endpoint
+# -------------------------------------------------
+METRICS_SETTINGS = {
+    "enabled": False,       # Serve /metrics for Prometheus scraping
+    "host": "127.0.0.1",    # "0.0.0.0" to allow scraping from other machines
+    "port": 9464,
+}
+
+# -------------------------------------------------
+#  Segment Recorder (File > Record Stream)
+# -------------------------------------------------
+RECORD_SETTINGS = {
+    "workers": 6,           # Parallel segment downloads
+    "retries": 3,           # Attempts per segment before the recording fails (resumable)
+}
+
+# -------------------------------------------------
+#  Channel Zapping (PgUp / PgDn through history)
+# -------------------------------------------------
+ZAP_SETTINGS = {
+    "enabled": False,       # Keep standby players preloading the neighbouring channels
+    "standby_players": 1,   # 1 (next channel) or 2 (next and previous)
+    "standby_cache_mb": 16, # Forward demuxer cache of each standby player
+    "memory_ceiling_mb": 256, # Max RAM for all standby players together
+    "standby_max_age": 30,  # Seconds before a paused live standby is reloaded at the live edge
+}
+
+# -------------------------------------------------
+#  Signed URL Expiry / Renewal
+# -------------------------------------------------
+EXPIRY_SETTINGS = {
+    "warn_before": 300,     # Seconds before expiry to show a notice
+    "renew_before": 120,    # Seconds before expiry to run the renewal command
+    "renew_command": "",    # Local command/script, gets the URL as last argument, prints a fresh URL
+    "renew_timeout": 30,    # Seconds
+}
+
+
+# -------------------------------------------------
+#  Live DVR (time-shift)
+# -------------------------------------------------
+DVR_SETTINGS = {
+    "enabled": False,       # Record live HLS streams to disk for pause/rewind
+    "window_minutes": 30,   # How far back the live stream can be rewound
+    "directory": "dvr_buffer",  # Parent of the per-stream session directory (deleted when the stream stops)
+}
+
+
+# -------------------------------------------------
+#  Low-latency live mode
+# -------------------------------------------------
+LATENCY_SETTINGS = {
+    "enabled": False,       # Track the live edge and catch up after stalls
+    "target_latency": 10.0, # Seconds behind the newest media to aim for
+    "max_speed": 1.1,       # Catch-up playback speed limit
+    "skip_threshold": 20.0, # Seconds above the target before skipping ahead instead
+    "blocking_reload": True,    # LL-HLS blocking playlist reload (_HLS_msn) when the server supports it
+    "partial_segments": True,   # Fetch LL-HLS parts early and assemble segments from them
+}
+
+
+# -------------------------------------------------
+#  Adaptive bitrate (Auto quality)
+# -------------------------------------------------
+ABR_SETTINGS = {
+    "enabled": True,        # Start HLS master playlists on "Auto" quality
+    "buffer_low": 10.0,     # Seconds buffered before the buffer rule (BOLA) takes over
+    "buffer_target": 30.0,  # Buffer level that selects the highest variant
+    "safety": 0.85,         # Fraction of the measured throughput a variant may use
 }
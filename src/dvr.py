@@ -0,0 +1,265 @@
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+
+from .hls_parser import parse_program_date_time
+from .hls_recorder import SegmentDownloader, RecordingStopped
+
+# -------------------------------------------------
+#  Live DVR (time-shift) ring buffer
+# -------------------------------------------------
+#  While a live HLS stream plays, DvrRecorder follows its media playlist and
+#  stores every segment as a file in a directory, indexed by DvrIndex: a
+#  fixed-size ring of records in a memory-mapped file. Segments older than
+#  the window are deleted, so RAM use is the index mapping whatever the
+#  window length and disk use is the window itself.
+#  mpv cannot seek in a live HLS playlist, so the buffer is exposed as a
+#  local VOD snapshot (dvr.m3u8, ENDLIST) that the GUI reopens as it grows.
+#  Times are "DVR seconds": 0 is the start of the first recorded segment.
+#  Each buffer lives in its own session directory (dvr-XXXX) inside the
+#  configured one; only session directories are ever deleted, never the
+#  configured directory or anything else in it.
+
+HEADER = struct.Struct('<8sqqq')        # magic, capacity, head, count
+RECORD = struct.Struct('<qdddqB7x')     # sequence, start, duration, program date time, size, flags
+MAGIC = b'M3U8DVR1'
+FLAG_DISCONTINUITY = 1
+SESSION_PREFIX = "dvr-"
+STALE_SESSION = 6 * 3600    # leftover session directories (crash) older than this are removed
+
+
+class DvrIndex:
+    """Ring of segment records in a memory-mapped file, oldest first."""
+
+    def __init__(self, path, capacity):
+        self.capacity = capacity
+        size = HEADER.size + RECORD.size * capacity
+        self._file = open(path, 'w+b')
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self.head = 0       # slot of the oldest record
+        self.count = 0
+        self._sync()
+
+    def _sync(self):
+        HEADER.pack_into(self._map, 0, MAGIC, self.capacity, self.head, self.count)
+
+    def _offset(self, i):
+        return HEADER.size + RECORD.size * ((self.head + i) % self.capacity)
+
+    def __len__(self):
+        return self.count
+
+    def get(self, i):
+        """(sequence, start, duration, pdt, size, flags) of the i-th oldest record."""
+        if i < 0:
+            i += self.count
+        return RECORD.unpack_from(self._map, self._offset(i))
+
+    def append(self, sequence, start, duration, pdt, size, flags=0):
+        """Add a record; returns the record it overwrote when the ring was full."""
+        evicted = None
+        if self.count == self.capacity:
+            evicted = self.pop_oldest()
+        RECORD.pack_into(self._map, self._offset(self.count), sequence, start, duration, pdt or 0.0, size, flags)
+        self.count += 1
+        self._sync()
+        return evicted
+
+    def pop_oldest(self):
+        if not self.count:
+            return None
+        record = self.get(0)
+        self.head = (self.head + 1) % self.capacity
+        self.count -= 1
+        self._sync()
+        return record
+
+    def close(self):
+        try:
+            self._map.close()
+            self._file.close()
+        except (OSError, ValueError):
+            pass
+
+
+def _remove_stale_sessions(directory):
+    """Session directories left behind by a crash (not touched for STALE_SESSION seconds)."""
+    now = time.time()
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            stale = now - os.path.getmtime(path) > STALE_SESSION
+        except OSError:
+            continue
+        if name.startswith(SESSION_PREFIX) and os.path.isdir(path) and stale \
+                and os.path.exists(os.path.join(path, "index.bin")):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class DvrBuffer:
+    def __init__(self, directory, window_seconds=1800, capacity=None):
+        """
+        directory: parent of the session directory the buffer writes to.
+        capacity: max segments in the index; the default allows one segment
+        per second of window, far more than real HLS segment lengths need.
+        """
+        os.makedirs(directory, exist_ok=True)
+        _remove_stale_sessions(directory)
+        self.directory = tempfile.mkdtemp(prefix=SESSION_PREFIX, dir=directory)
+        self.window_seconds = window_seconds
+        self.index = DvrIndex(os.path.join(self.directory, "index.bin"), capacity or int(window_seconds) + 64)
+        self.playlist_path = os.path.join(self.directory, "dvr.m3u8")
+        self.target_duration = 10
+        self.extension = ".ts"
+        self.init_name = None       # fMP4 EXT-X-MAP section, if any
+        self.bytes = 0
+        self._next_start = 0.0
+        self._last_sequence = None
+        self._lock = threading.Lock()
+
+    def _segment_name(self, sequence):
+        return f"seg_{sequence}{self.extension}"
+
+    def set_init(self, data):
+        """fMP4 streams: store the init section and name segments .m4s."""
+        with self._lock:
+            self.init_name = "init.mp4"
+            self.extension = ".m4s"
+            with open(os.path.join(self.directory, self.init_name), 'wb') as f:
+                f.write(data)
+
+    def add(self, sequence, duration, data, pdt=None, discontinuity=False):
+        """Store a segment at the live end and evict what falls out of the window."""
+        with self._lock:
+            if self._last_sequence is not None and sequence <= self._last_sequence:
+                return False
+            if self._last_sequence is not None and sequence != self._last_sequence + 1:
+                discontinuity = True    # segments were missed, timestamps jump
+            path = os.path.join(self.directory, self._segment_name(sequence))
+            with open(path + ".tmp", 'wb') as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+            evicted = [self.index.append(sequence, self._next_start, duration, pdt, len(data),
+                                         FLAG_DISCONTINUITY if discontinuity else 0)]
+            self._next_start += duration
+            self._last_sequence = sequence
+            self.bytes += len(data)
+            while len(self.index) > 1 and self._next_start - self.index.get(0)[1] > self.window_seconds:
+                evicted.append(self.index.pop_oldest())
+            for record in evicted:
+                if record:
+                    self.bytes -= record[4]
+                    try:
+                        os.remove(os.path.join(self.directory, self._segment_name(record[0])))
+                    except OSError:
+                        pass
+            return True
+
+    def window(self):
+        """(start, end) in DVR seconds, or None while empty."""
+        with self._lock:
+            if not len(self.index):
+                return None
+            return self.index.get(0)[1], self._next_start
+
+    def write_snapshot(self):
+        """
+        Write the current window as a local VOD playlist.
+        Returns (path, origin): origin is the DVR time of playlist time 0.
+        """
+        with self._lock:
+            n = len(self.index)
+            if not n:
+                return None, None
+            records = [self.index.get(i) for i in range(n)]
+            lines = ["#EXTM3U", f"#EXT-X-VERSION:{7 if self.init_name else 3}",
+                     f"#EXT-X-TARGETDURATION:{int(max(self.target_duration, max(r[2] for r in records)) + 0.999)}",
+                     f"#EXT-X-MEDIA-SEQUENCE:{records[0][0]}",
+                     "#EXT-X-PLAYLIST-TYPE:VOD"]
+            if self.init_name:
+                lines.append(f'#EXT-X-MAP:URI="{self.init_name}"')
+            for i, (sequence, start, duration, pdt, size, flags) in enumerate(records):
+                if flags & FLAG_DISCONTINUITY and i:
+                    lines.append("#EXT-X-DISCONTINUITY")
+                lines.append(f"#EXTINF:{duration:.3f},")
+                lines.append(self._segment_name(sequence))
+            lines.append("#EXT-X-ENDLIST")
+            tmp = self.playlist_path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp, self.playlist_path)
+            return self.playlist_path, records[0][1]
+
+    def close(self, remove=True):
+        with self._lock:
+            self.index.close()
+            if remove:
+                shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class DvrRecorder:
+    """Follows a live playlist into a DvrBuffer on a background thread."""
+
+    def __init__(self, url, buffer, client=None, bandwidth=None, fetch_segment=None,
+                 on_not_live=None, on_error=None):
+        self.url = url
+        self.buffer = buffer
+        self.on_not_live = on_not_live  # () when the stream turns out to be VOD
+        self.on_error = on_error        # (message)
+        self._stop = threading.Event()
+        self.source = SegmentDownloader(client, retries=2, timeout=15, bandwidth=bandwidth,
+                                        stop_event=self._stop, fetch_segment=fetch_segment)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="dvr", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        last = None     # last stored media sequence
+        map_uri = None
+        errors = 0
+        while not self._stop.is_set():
+            try:
+                playlist = self.source.media_playlist(self.url)
+                if not playlist.is_live:
+                    if self.on_not_live:
+                        self.on_not_live()
+                    return
+                self.buffer.target_duration = playlist.target_duration or self.buffer.target_duration
+                segments = playlist.segments
+                if last is None:
+                    # Start at the live edge, like mpv does
+                    segments = segments[-3:]
+                for seg in segments:
+                    if last is not None and seg.sequence <= last:
+                        continue
+                    if seg.map_uri and seg.map_uri != map_uri:
+                        self.buffer.set_init(self.source.fetch(seg.map_uri))
+                        map_uri = seg.map_uri
+                    data = self.source.download(seg)
+                    self.buffer.add(seg.sequence, seg.duration, data,
+                                    parse_program_date_time(seg.program_date_time), seg.discontinuity)
+                    last = seg.sequence
+                errors = 0
+                wait = (playlist.target_duration or 6) / 2
+            except RecordingStopped:
+                return
+            except Exception as e:
+                errors += 1
+                if self.on_error and errors == 3:
+                    self.on_error(str(e))
+                wait = min(30, 2 ** errors)
+            self._stop.wait(max(1.0, wait))
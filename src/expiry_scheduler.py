@@ -0,0 +1,110 @@
+import os
+import shlex
+import subprocess
+import threading
+import time
+
+from .utils import extract_expiration
+
+# -------------------------------------------------
+#  Signed URL expiry scheduler
+# -------------------------------------------------
+#  Attached to the playing URL. If it carries an expires= / exp= /
+#  expiration= timestamp, on_warn fires warn_before seconds ahead and the
+#  renewal hook runs renew_before seconds ahead. The hook is a local command
+#  that gets the current URL as its last argument and prints a fresh URL on
+#  stdout; the GUI then hot-swaps to it. Callbacks run on a timer thread.
+
+
+class ExpiryScheduler:
+    def __init__(self, warn_before=300, renew_before=120, renew_command="", renew_timeout=30,
+                 on_warn=None, on_renewed=None, on_failed=None):
+        self.warn_before = warn_before
+        self.renew_before = renew_before
+        self.renew_command = renew_command
+        self.renew_timeout = renew_timeout
+        self.on_warn = on_warn          # (url, seconds_left)
+        self.on_renewed = on_renewed    # (old_url, new_url)
+        self.on_failed = on_failed      # (url, reason)
+        self.url = None
+        self.expires_at = None
+        self._timers = []
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def attach(self, url):
+        """Watch url (replaces any previous one). Returns its expiry timestamp or None."""
+        with self._lock:
+            self._cancel_locked()
+            self.url = url
+            self.expires_at = extract_expiration(url)
+            if not self.expires_at:
+                return None
+            gen = self._generation
+            now = time.time()
+            for at, fn in ((self.expires_at - self.warn_before, self._warn),
+                           (self.expires_at - self.renew_before, self._renew)):
+                t = threading.Timer(max(0, at - now), fn, args=(gen,))
+                t.daemon = True
+                self._timers.append(t)
+                t.start()
+            return self.expires_at
+
+    def detach(self):
+        with self._lock:
+            self._cancel_locked()
+            self.url = None
+            self.expires_at = None
+
+    def _cancel_locked(self):
+        self._generation += 1
+        for t in self._timers:
+            t.cancel()
+        self._timers = []
+
+    def seconds_left(self):
+        return self.expires_at - time.time() if self.expires_at else None
+
+    def _current(self, gen):
+        with self._lock:
+            return self.url if gen == self._generation else None
+
+    def _warn(self, gen):
+        url = self._current(gen)
+        if url and self.on_warn:
+            self.on_warn(url, max(0, self.seconds_left() or 0))
+
+    def _renew(self, gen):
+        url = self._current(gen)
+        if not url:
+            return
+        if not self.renew_command:
+            if self.on_failed:
+                self.on_failed(url, "no renewal command configured")
+            return
+        try:
+            new_url = self.run_hook(url)
+        except Exception as e:
+            if self.on_failed:
+                self.on_failed(url, str(e))
+            return
+        # Stream changed while the hook was running
+        if self._current(gen) != url:
+            return
+        if self.on_renewed:
+            self.on_renewed(url, new_url)
+
+    def run_hook(self, url):
+        """Run the renewal command with url as last argument, return the URL it prints."""
+        args = shlex.split(self.renew_command, posix=(os.name != 'nt')) + [url]
+        result = subprocess.run(args, capture_output=True, text=True, timeout=self.renew_timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"renewal command exited with {result.returncode}: {result.stderr.strip()[:200]}")
+        lines = [l.strip() for l in result.stdout.splitlines() if l.strip()]
+        if not lines or not lines[-1].startswith(('http://', 'https://')):
+            raise RuntimeError("renewal command did not print a URL")
+        new_url = lines[-1]
+        new_exp = extract_expiration(new_url)
+        if new_exp and self.expires_at and new_exp <= self.expires_at:
+            raise RuntimeError("renewed URL does not expire later")
+        return new_url
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+
+from .config import USER_AGENTS, CACHE_SETTINGS, PROXY_SETTINGS
+from .player_core import MpvPlayer
+from .hls_parser import fetch_playlist, choose_start_variant
+from .hls_proxy import HlsProxy, SegmentCache
+from .http_client import get_client
+
+# -------------------------------------------------
+#  Headless playback (main.py --headless URL)
+# -------------------------------------------------
+#  Plays a stream with null video/audio outputs and no Tk, then writes a JSON
+#  report: startup latency, stalls, bytes downloaded and cache occupancy over
+#  time. Each run is one process, so many can run side by side on a render box.
+
+SAMPLE_INTERVAL = 1.0   # seconds between cache samples
+STARTUP_TIMEOUT = 30.0  # give up if no frame arrives in this time
+
+
+class HeadlessSession:
+    def __init__(self, url, duration=60, referer="", user_agent="Chrome",
+                 max_bytes_mb=None, max_back_bytes_mb=None, use_proxy=False, start=None):
+        self.url = url
+        self.duration = duration
+        self.referer = referer
+        self.user_agent = USER_AGENTS.get(user_agent, user_agent)
+        self.max_bytes_mb = max_bytes_mb or CACHE_SETTINGS['max_bytes']
+        self.max_back_bytes_mb = max_back_bytes_mb or CACHE_SETTINGS['max_back_bytes']
+        self.use_proxy = use_proxy
+        self.start = start          # open at this offset (resume), seconds
+        self.player = None
+        self.proxy = None
+
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._first_frame = None
+        self._stall_started = None
+        self._ended = threading.Event()
+        self._end_reason = None
+        self.stalls = []        # (start, duration) relative to load start
+        self.samples = []       # periodic cache samples
+        self.bytes_downloaded = 0.0
+        self.preflight = None
+
+    def _now(self):
+        return time.perf_counter() - self._t0
+
+    # -- mpv event thread --------------------------------------------------
+    def _on_state(self, state, changed):
+        now = self._now()
+        with self._lock:
+            if 'time-pos' in changed and state.get('time-pos') is not None and self._first_frame is None:
+                self._first_frame = now
+            if 'paused-for-cache' in changed and self._first_frame is not None:
+                if state.get('paused-for-cache') and self._stall_started is None:
+                    self._stall_started = now
+                elif not state.get('paused-for-cache') and self._stall_started is not None:
+                    self.stalls.append((self._stall_started, now - self._stall_started))
+                    self._stall_started = None
+        if 'eof-reached' in changed and state.get('eof-reached'):
+            self._finish("eof")
+        if 'idle-active' in changed and state.get('idle-active') and self._first_frame is not None:
+            self._finish("idle")
+
+    def _finish(self, reason):
+        if self._end_reason is None:
+            self._end_reason = reason
+        self._ended.set()
+
+    # -- main thread --------------------------------------------------------
+    def _sample(self, last):
+        """Record one cache sample and integrate the input rate."""
+        now = self._now()
+        cs = self.player.get_demuxer_cache_state() or {}
+        pos = self.player.get_time_pos()
+        buf = self.player.get_buffered_time()
+        rate = cs.get('raw-input-rate') or 0
+        self.bytes_downloaded += rate * (now - last)
+        self.samples.append({
+            "t": round(now, 3),
+            "position": pos,
+            "fw_bytes": cs.get('fw-bytes'),
+            "total_bytes": cs.get('total-bytes'),
+            "buffered_seconds": round(buf - pos, 3) if buf is not None and pos is not None else None,
+            "input_rate": rate,
+        })
+        return now
+
+    def _start_player(self):
+        self.player = MpvPlayer(vo='null', ao='null', osc=False,
+                                input_default_bindings=False, input_vo_keyboard=False)
+        # No UI thread: deliver property batches straight from the event thread
+        self.player.set_dispatcher(self.player.dispatch_pending)
+        self.player.subscribe(('time-pos', 'paused-for-cache', 'eof-reached', 'idle-active'), self._on_state)
+        self.player.apply_cache_settings(self.max_bytes_mb, self.max_back_bytes_mb)
+
+        if self.use_proxy:
+            cache = SegmentCache(PROXY_SETTINGS['cache_dir'],
+                                 PROXY_SETTINGS['ram_mb'] * 1024 * 1024, 0)
+            self.proxy = HlsProxy(cache, prefetch_workers=PROXY_SETTINGS['prefetch_workers'])
+            self.proxy.start()
+            self.player.proxy = self.proxy
+
+    def run(self):
+        self._start_player()
+
+        client = get_client().with_headers({"Referer": self.referer, "User-Agent": self.user_agent})
+        is_hls = False
+        variant = None
+        playlist = None
+        # Startup latency covers the playlist preflight too, as in the GUI
+        self._t0 = time.perf_counter()
+        try:
+            status, playlist = fetch_playlist(self.url, timeout=10, client=client)
+            is_hls = playlist is not None
+            if playlist is not None and playlist.is_master:
+                variant = choose_start_variant(playlist.sorted_variants(), None)
+        except Exception:
+            pass
+        # Resume: prefetch from the segment containing the offset
+        if self.start and self.proxy and playlist is not None:
+            try:
+                media_url, media = self.url, playlist
+                if playlist.is_master and variant:
+                    media_url = variant.uri
+                    _, media = fetch_playlist(media_url, timeout=10, client=client)
+                self.proxy.prefetch_at(media_url, media, self.start)
+            except Exception as e:
+                print(f"Resume prefetch error: {e}")
+        self.preflight = self._now()
+
+        self.player.play(self.url, headers={"Referer": self.referer} if self.referer else None,
+                         user_agent=self.user_agent,
+                         hls_bitrate=variant.bandwidth if variant else None,
+                         use_proxy=is_hls, start=self.start)
+
+        last = 0.0
+        deadline = self.duration
+        while not self._ended.wait(SAMPLE_INTERVAL):
+            last = self._sample(last)
+            if self._first_frame is None and last > STARTUP_TIMEOUT:
+                self._finish("startup timeout")
+            elif self._first_frame is not None and last - self._first_frame >= deadline:
+                self._finish("duration")
+        self._sample(last)
+
+        # Close a stall that is still open at the end
+        with self._lock:
+            if self._stall_started is not None:
+                now = self._now()
+                self.stalls.append((self._stall_started, now - self._stall_started))
+                self._stall_started = None
+
+        report = self.report()
+        self.player.terminate()
+        if self.proxy:
+            self.proxy.stop()
+        return report
+
+    def report(self):
+        stall_time = sum(d for _, d in self.stalls)
+        played = (self.samples[-1]['t'] - self._first_frame) if self.samples and self._first_frame else 0
+        report = {
+            "url": self.url,
+            "pid": os.getpid(),
+            "end_reason": self._end_reason,
+            "start_position": self.start,
+            "startup_latency": round(self._first_frame, 3) if self._first_frame is not None else None,
+            "preflight_seconds": round(self.preflight, 3) if self.preflight is not None else None,
+            "played_seconds": round(played, 3),
+            "stall_count": len(self.stalls),
+            "stall_seconds": round(stall_time, 3),
+            "stalls": [{"t": round(t, 3), "duration": round(d, 3)} for t, d in self.stalls],
+            "bytes_downloaded": int(self.bytes_downloaded),
+            "cache_settings": {"max_bytes_mb": self.max_bytes_mb,
+                               "max_back_bytes_mb": self.max_back_bytes_mb},
+            "samples": self.samples,
+        }
+        if self.proxy:
+            report["proxy_cache"] = self.proxy.cache.stats()
+            if self.proxy.prefetcher:
+                report["prefetch"] = self.proxy.prefetcher.stats()
+        return report
+
+
+def run_headless(url, report_path="headless_report.json", **kwargs):
+    """Play url without a window and write the JSON report. "-" prints it."""
+    try:
+        report = HeadlessSession(url, **kwargs).run()
+    except RuntimeError as e:
+        print(f"Headless run failed: {e}")
+        return 2
+    text = json.dumps(report, indent=2)
+    if report_path == "-":
+        print(text)
+    else:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Report written to {report_path} "
+              f"(startup {report['startup_latency']}s, {report['stall_count']} stalls)")
+    return 0 if report['startup_latency'] is not None else 1
@@ -0,0 +1,207 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import atexit
+from datetime import datetime
+
+from .history_store import HistoryStore
+
+# -------------------------------------------------
+#  SQLite history backend
+# -------------------------------------------------
+#  Same interface as HistoryStore (history_store.py) so utils.py can swap
+#  backends from settings.json ("history_backend": "sqlite").
+#  Rows are keyed by a hash of the URL and ordered by the indexed timestamp,
+#  so lookups stay O(log n) no matter how many URLs are kept. Position ticks
+#  write last_position_at only, so the playing entry keeps its place (like
+#  the insertion order of the JSON backend).
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    url_hash      TEXT PRIMARY KEY,
+    url           TEXT NOT NULL,
+    name          TEXT,
+    timestamp     TEXT NOT NULL,
+    last_position REAL NOT NULL DEFAULT 0,
+    last_position_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def url_hash(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+COLUMNS = "url, name, timestamp, last_position, last_position_at"
+
+
+def _row_to_item(row):
+    return {
+        "url": row[0],
+        "name": row[1],
+        "timestamp": row[2],
+        "last_position": row[3],
+        "last_position_at": row[4],
+    }
+
+
+class SqliteHistoryStore:
+    def __init__(self, path, max_entries=50, migrate_from=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.migrate_from = migrate_from
+        self._lock = threading.RLock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    # WAL + NORMAL: commits don't fsync, checkpoints do
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.executescript(SCHEMA)
+                    columns = [r[1] for r in conn.execute("PRAGMA table_info(history)")]
+                    if 'last_position_at' not in columns:
+                        conn.execute("ALTER TABLE history ADD COLUMN last_position_at TEXT")
+                    self._conn = conn
+                    self._migrate_json()
+        return self._conn
+
+    def _migrate_json(self):
+        """One-time import of the old history.json list (and its uncompacted journal)."""
+        conn = self._conn
+        done = conn.execute("SELECT value FROM meta WHERE key='migrated_json'").fetchone()
+        if done or not self.migrate_from or not (
+                os.path.exists(self.migrate_from) or os.path.exists(self.migrate_from + ".journal")):
+            return
+        try:
+            # HistoryStore replays history.json.journal on top of the snapshot
+            items = HistoryStore(self.migrate_from, max_entries=0).load()
+        except Exception as e:
+            print(f"History migration skipped: {e}")
+            items = []
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO history (url_hash, url, name, timestamp, last_position) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(url_hash(i['url']), i['url'], i.get('name') or i['url'],
+                  i.get('timestamp') or datetime.now().isoformat(), i.get('last_position', 0))
+                 for i in items if isinstance(i, dict) and 'url' in i])
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_json', ?)",
+                         (datetime.now().isoformat(),))
+
+    def _trim(self, conn):
+        if not self.max_entries:
+            return
+        conn.execute(
+            "DELETE FROM history WHERE url_hash NOT IN "
+            "(SELECT url_hash FROM history ORDER BY timestamp DESC LIMIT ?)",
+            (self.max_entries,))
+
+    # -------------------------------------------------
+    #  Public API (mirrors HistoryStore)
+    # -------------------------------------------------
+    def load(self):
+        """Return history as a list, newest first."""
+        return self.page(0, self.max_entries or -1)
+
+    def page(self, offset, limit):
+        """Return `limit` items starting at `offset` (newest first)."""
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT {COLUMNS} FROM history "
+                "ORDER BY timestamp DESC LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return [_row_to_item(r) for r in rows]
+
+    def get(self, url):
+        with self._lock:
+            row = self._db().execute(
+                f"SELECT {COLUMNS} FROM history WHERE url_hash=?",
+                (url_hash(url),)).fetchone()
+        return _row_to_item(row) if row else None
+
+    def __len__(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def add(self, url, name=None):
+        """Insert or move a URL to the top, keeping its last position."""
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute(
+                    "INSERT INTO history (url_hash, url, name, timestamp, last_position) "
+                    "VALUES (?, ?, ?, ?, 0) "
+                    "ON CONFLICT(url_hash) DO UPDATE SET name=excluded.name, timestamp=excluded.timestamp",
+                    (url_hash(url), url, name or url, datetime.now().isoformat()))
+                self._trim(conn)
+
+    def update_position(self, url, position):
+        with self._lock:
+            conn = self._db()
+            with conn:
+                cur = conn.execute(
+                    "UPDATE history SET last_position=?, last_position_at=? WHERE url_hash=?",
+                    (position, datetime.now().isoformat(), url_hash(url)))
+            return cur.rowcount > 0
+
+    def remove(self, url):
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM history WHERE url_hash=?", (url_hash(url),))
+
+    def replace_all(self, items):
+        """Replace the whole history (delete / clear all)."""
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM history")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO history (url_hash, url, name, timestamp, last_position, last_position_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(url_hash(i['url']), i['url'], i.get('name') or i['url'],
+                      i.get('timestamp') or datetime.now().isoformat(), i.get('last_position', 0),
+                      i.get('last_position_at'))
+                     for i in items])
+                self._trim(conn)
+
+    def flush(self):
+        # Every write is committed immediately
+        pass
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                    self._conn.close()
+                except Exception as e:
+                    print(f"Error closing history database: {e}")
+                self._conn = None
+
+
+_stores = {}
+
+
+def get_db_store(path, max_entries=50, migrate_from=None):
+    """Return the process-wide SQLite store for a database file."""
+    store = _stores.get(path)
+    if store is None:
+        store = SqliteHistoryStore(path, max_entries=max_entries, migrate_from=migrate_from)
+        _stores[path] = store
+    return store
+
+
+@atexit.register
+def _close_all():
+    for store in list(_stores.values()):
+        store.close()
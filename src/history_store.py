@@ -0,0 +1,266 @@
+import json
+import os
+import threading
+import atexit
+from itertools import islice
+from datetime import datetime
+
+# -------------------------------------------------
+#  Indexed, write-behind history storage
+# -------------------------------------------------
+#  history.json stays the canonical snapshot (same list format as before).
+#  Changes are kept in an in-memory URL index and appended to
+#  "<history>.journal" (one JSON record per line) by a background flush.
+#  When the journal grows too large it is folded back into the snapshot
+#  with a tmp-file + os.replace so the snapshot is never half-written.
+
+
+class HistoryStore:
+    def __init__(self, path, max_entries=50, flush_delay=2.0, compact_every=200):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.max_entries = max_entries
+        self.flush_delay = flush_delay
+        self.compact_every = compact_every
+
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        # url -> entry, insertion order is oldest -> newest
+        self._index = {}
+        # Pending journal records, coalesced per URL for position ticks
+        self._pending_pos = {}
+        self._pending_ops = []
+        self._needs_compact = False
+        self._journal_records = 0
+        self._timer = None
+        self._loaded = False
+
+    # -------------------------------------------------
+    #  Loading
+    # -------------------------------------------------
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._index = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        items = json.load(f)
+                    # Snapshot is newest first
+                    for item in reversed(items):
+                        if isinstance(item, dict) and 'url' in item:
+                            self._index[item['url']] = item
+                except:
+                    self._index = {}
+            self._replay_journal()
+            self._loaded = True
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        # Torn last line after a crash, ignore it
+                        continue
+                    self._apply(rec)
+                    self._journal_records += 1
+        except Exception as e:
+            print(f"Error reading history journal: {e}")
+        # Fold the replayed journal into the snapshot on the next flush
+        if self._journal_records:
+            self._needs_compact = True
+
+    def _apply(self, rec):
+        op = rec.get('op')
+        url = rec.get('url')
+        if op == 'pos':
+            entry = self._index.get(url)
+            if entry is not None:
+                entry['last_position'] = rec['pos']
+                entry['timestamp'] = rec['ts']
+        elif op == 'put':
+            self._index.pop(url, None)
+            self._index[url] = rec['entry']
+            self._trim()
+        elif op == 'del':
+            self._index.pop(url, None)
+
+    def _trim(self):
+        if not self.max_entries:
+            return
+        while len(self._index) > self.max_entries:
+            oldest = next(iter(self._index))
+            del self._index[oldest]
+
+    # -------------------------------------------------
+    #  Public API (mirrors utils.py history functions)
+    # -------------------------------------------------
+    def load(self):
+        """Return history as a list, newest first."""
+        self._ensure_loaded()
+        with self._lock:
+            return [dict(e) for e in reversed(self._index.values())]
+
+    def page(self, offset, limit):
+        """Return `limit` items starting at `offset` (newest first)."""
+        self._ensure_loaded()
+        with self._lock:
+            newest_first = reversed(self._index.values())
+            return [dict(e) for e in islice(newest_first, offset, offset + limit)]
+
+    def get(self, url):
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._index.get(url)
+            return dict(entry) if entry is not None else None
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._index)
+
+    def add(self, url, name=None):
+        """Insert or move a URL to the top, keeping its last position."""
+        self._ensure_loaded()
+        with self._lock:
+            old = self._index.pop(url, None)
+            entry = {
+                "url": url,
+                "name": name or url,
+                "timestamp": datetime.now().isoformat(),
+                "last_position": old.get('last_position', 0) if old else 0
+            }
+            self._index[url] = entry
+            self._trim()
+            self._pending_ops.append({"op": "put", "url": url, "entry": dict(entry)})
+        self._schedule_flush()
+
+    def update_position(self, url, position):
+        """O(1) position update; persisted by the next background flush."""
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None:
+                return False
+            ts = datetime.now().isoformat()
+            entry['last_position'] = position
+            entry['timestamp'] = ts
+            # Coalesce: only the latest tick per URL reaches the journal
+            self._pending_pos[url] = {"op": "pos", "url": url, "pos": position, "ts": ts}
+        self._schedule_flush()
+        return True
+
+    def remove(self, url):
+        self._ensure_loaded()
+        with self._lock:
+            if self._index.pop(url, None) is None:
+                return
+            self._pending_pos.pop(url, None)
+            self._pending_ops.append({"op": "del", "url": url})
+        self._schedule_flush()
+
+    def replace_all(self, items):
+        """Replace the whole history (delete / clear all)."""
+        self._ensure_loaded()
+        with self._lock:
+            self._index = {}
+            for item in reversed(items):
+                self._index[item['url']] = dict(item)
+            self._trim()
+            self._pending_pos.clear()
+            self._pending_ops = []
+            self._needs_compact = True
+        self._schedule_flush()
+
+    # -------------------------------------------------
+    #  Write-behind flushing
+    # -------------------------------------------------
+    def _schedule_flush(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.flush_delay, self._timer_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timer_flush(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush(self):
+        """Write pending changes to disk. Safe to call from any thread."""
+        if not self._loaded:
+            return
+        with self._io_lock:
+            with self._lock:
+                records = self._pending_ops + list(self._pending_pos.values())
+                self._pending_ops = []
+                self._pending_pos.clear()
+                compact = self._needs_compact or (
+                    self._journal_records + len(records) >= self.compact_every)
+                snapshot = list(reversed(self._index.values())) if compact else None
+                if compact:
+                    snapshot = [dict(e) for e in snapshot]
+                    self._needs_compact = False
+
+            try:
+                if compact:
+                    self._write_snapshot(snapshot)
+                    self._journal_records = 0
+                elif records:
+                    with open(self.journal_path, 'a', encoding='utf-8') as f:
+                        f.write("".join(json.dumps(r) + "\n" for r in records))
+                    self._journal_records += len(records)
+            except Exception as e:
+                print(f"Error saving history: {e}")
+
+    def _write_snapshot(self, items):
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(items, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        # Snapshot now contains everything, the journal can go
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def close(self):
+        """Cancel the pending timer and flush synchronously."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._needs_compact = self._needs_compact or self._journal_records > 0
+        self.flush()
+
+
+_stores = {}
+
+
+def get_store(path, max_entries=50):
+    """Return the process-wide store for a history file."""
+    store = _stores.get(path)
+    if store is None:
+        store = HistoryStore(path, max_entries=max_entries)
+        _stores[path] = store
+    return store
+
+
+@atexit.register
+def _flush_all():
+    for store in list(_stores.values()):
+        try:
+            store.close()
+        except Exception:
+            pass
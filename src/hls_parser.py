@@ -0,0 +1,548 @@
+import re
+from bisect import bisect_right
+from datetime import datetime, timezone
+from itertools import chain
+from urllib.parse import urljoin
+
+# -------------------------------------------------
+#  HLS (.m3u8) playlist parser
+# -------------------------------------------------
+#  Streaming, line-by-line parser for master and media playlists.
+#  Records use __slots__ so 10k+ segment VOD playlists stay compact.
+#  Extra tags can be handled by registering a function in TAG_HANDLERS:
+#      TAG_HANDLERS['#EXT-X-FOO'] = lambda state, value: ...
+
+_ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+def parse_attributes(value):
+    """Parse an attribute list: KEY=VALUE,KEY2="quoted, value"."""
+    attrs = {}
+    for key, val in _ATTR_RE.findall(value):
+        if val.startswith('"'):
+            val = val[1:-1]
+        attrs[key] = val
+    return attrs
+
+
+class ByteRange:
+    __slots__ = ('length', 'offset')
+
+    def __init__(self, length, offset=None):
+        self.length = length
+        self.offset = offset
+
+    @classmethod
+    def parse(cls, value, prev_end=0):
+        if '@' in value:
+            length, offset = value.split('@', 1)
+            return cls(int(length), int(offset))
+        # No offset: continues right after the previous sub-range
+        return cls(int(value), prev_end)
+
+    def header(self):
+        """Value for an HTTP Range header."""
+        return f"bytes={self.offset}-{self.offset + self.length - 1}"
+
+
+class Key:
+    __slots__ = ('method', 'uri', 'iv', 'keyformat')
+
+    def __init__(self, method, uri=None, iv=None, keyformat=None):
+        self.method = method
+        self.uri = uri
+        self.iv = iv
+        self.keyformat = keyformat
+
+
+class Discontinuity:
+    __slots__ = ('index', 'sequence', 'start')
+
+    def __init__(self, index, sequence, start):
+        self.index = index          # index of the first segment after the tag
+        self.sequence = sequence    # discontinuity sequence number
+        self.start = start          # playlist time of that segment
+
+
+class Segment:
+    __slots__ = ('uri', 'duration', 'start', 'sequence', 'title', 'byterange',
+                 'key', 'discontinuity', 'program_date_time', 'map_uri')
+
+    def __init__(self, uri, duration, start, sequence, title=None, byterange=None,
+                 key=None, discontinuity=False, program_date_time=None, map_uri=None):
+        self.uri = uri
+        self.duration = duration
+        self.start = start
+        self.sequence = sequence
+        self.title = title
+        self.byterange = byterange
+        self.key = key
+        self.discontinuity = discontinuity
+        self.program_date_time = program_date_time
+        self.map_uri = map_uri
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+
+class Part:
+    """LL-HLS partial segment (EXT-X-PART) of media sequence `sequence`."""
+    __slots__ = ('uri', 'duration', 'sequence', 'index', 'independent', 'byterange')
+
+    def __init__(self, uri, duration, sequence, index, independent=False, byterange=None):
+        self.uri = uri
+        self.duration = duration
+        self.sequence = sequence    # media sequence of the parent segment
+        self.index = index          # position inside the parent segment
+        self.independent = independent
+        self.byterange = byterange
+
+
+class Variant:
+    __slots__ = ('uri', 'bandwidth', 'average_bandwidth', 'resolution', 'codecs',
+                 'frame_rate', 'audio', 'video')
+
+    def __init__(self, uri, bandwidth, average_bandwidth=None, resolution=None,
+                 codecs=None, frame_rate=None, audio=None, video=None):
+        self.uri = uri
+        self.bandwidth = bandwidth
+        self.average_bandwidth = average_bandwidth
+        self.resolution = resolution
+        self.codecs = codecs
+        self.frame_rate = frame_rate
+        self.audio = audio
+        self.video = video
+
+    @property
+    def height(self):
+        return self.resolution[1] if self.resolution else None
+
+    def label(self):
+        """Human readable label for the quality combobox."""
+        mbps = self.bandwidth / 1_000_000
+        if self.height:
+            return f"{self.height}p ({mbps:.1f} Mbps)"
+        return f"{mbps:.1f} Mbps"
+
+
+class MasterPlaylist:
+    __slots__ = ('uri', 'variants', 'media', 'independent_segments')
+
+    is_master = True
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.variants = []
+        self.media = []     # EXT-X-MEDIA attribute dicts (audio/subtitle renditions)
+        self.independent_segments = False
+
+    def sorted_variants(self):
+        """Variants from highest to lowest bandwidth."""
+        return sorted(self.variants, key=lambda v: v.bandwidth, reverse=True)
+
+
+class MediaPlaylist:
+    __slots__ = ('uri', 'target_duration', 'media_sequence', 'discontinuity_sequence',
+                 'playlist_type', 'endlist', 'segments', 'discontinuities',
+                 'independent_segments', 'parts', 'part_target', 'server_control', '_starts')
+
+    is_master = False
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.target_duration = None
+        self.media_sequence = 0
+        self.discontinuity_sequence = 0
+        self.playlist_type = None
+        self.endlist = False
+        self.segments = []
+        self.discontinuities = []
+        self.independent_segments = False
+        self.parts = []             # LL-HLS: EXT-X-PART of the last few segments
+        self.part_target = None     # EXT-X-PART-INF PART-TARGET
+        self.server_control = {}    # EXT-X-SERVER-CONTROL attributes
+        self._starts = None
+
+    @property
+    def is_live(self):
+        return not self.endlist and self.playlist_type != 'VOD'
+
+    @property
+    def duration(self):
+        return self.segments[-1].end if self.segments else 0.0
+
+    @property
+    def can_block_reload(self):
+        return self.server_control.get('CAN-BLOCK-RELOAD') == 'YES'
+
+    @property
+    def next_sequence(self):
+        return (self.segments[-1].sequence + 1) if self.segments else self.media_sequence
+
+    def pending_parts(self):
+        """Parts of the segment still being produced (after the last full segment)."""
+        nxt = self.next_sequence
+        return [p for p in self.parts if p.sequence == nxt]
+
+    def segment_parts(self, sequence):
+        return [p for p in self.parts if p.sequence == sequence]
+
+    @property
+    def live_edge(self):
+        """Playlist time of the newest media, partial segments included."""
+        return self.duration + sum(p.duration for p in self.pending_parts())
+
+    def program_date_time_at(self, t):
+        """Wall-clock time (POSIX) of playlist time t, from the nearest EXT-X-PROGRAM-DATE-TIME before it."""
+        for seg in reversed(self.segments[:self.segment_index_at(t) + 1] if self.segments else []):
+            pdt = parse_program_date_time(seg.program_date_time)
+            if pdt is not None:
+                return pdt + (t - seg.start)
+        return None
+
+    def segment_index_at(self, t):
+        """Index of the segment containing playlist time t (O(log n))."""
+        if not self.segments:
+            return None
+        if self._starts is None:
+            self._starts = [s.start for s in self.segments]
+        i = bisect_right(self._starts, t) - 1
+        return max(0, min(i, len(self.segments) - 1))
+
+    def segment_at(self, t):
+        i = self.segment_index_at(t)
+        return self.segments[i] if i is not None else None
+
+
+# -------------------------------------------------
+#  Parser
+# -------------------------------------------------
+class _State:
+    """Mutable state while walking a playlist."""
+    __slots__ = ('base', 'base_dir', 'master', 'media', 'duration', 'title', 'byterange', 'key',
+                 'discontinuity', 'pdt', 'map_uri', 'pending_variant', 'time',
+                 'sequence', 'disc_seq', 'range_end', 'part_index', 'part_range_end')
+
+    def __init__(self, base):
+        self.base = base
+        self.base_dir = urljoin(base, '.') if base else ""
+        self.master = None
+        self.media = None
+        self.duration = None
+        self.title = None
+        self.byterange = None
+        self.key = None
+        self.discontinuity = False
+        self.pdt = None
+        self.map_uri = None
+        self.pending_variant = None
+        self.time = 0.0
+        self.sequence = 0
+        self.disc_seq = 0
+        self.range_end = 0
+        self.part_index = 0
+        self.part_range_end = 0
+
+    def resolve(self, uri):
+        # Plain relative names ("seg_001.ts") are by far the common case,
+        # skip urljoin for them
+        if self.base_dir and ':' not in uri and uri[0] not in './?#':
+            return self.base_dir + uri
+        return urljoin(self.base, uri)
+
+    def master_pl(self):
+        if self.master is None:
+            self.master = MasterPlaylist(self.base)
+        return self.master
+
+    def media_pl(self):
+        if self.media is None:
+            self.media = MediaPlaylist(self.base)
+        return self.media
+
+
+def _resolution(value):
+    try:
+        w, h = value.lower().split('x')
+        return int(w), int(h)
+    except ValueError:
+        return None
+
+
+def _tag_stream_inf(state, value):
+    a = parse_attributes(value)
+    state.pending_variant = Variant(
+        None,
+        int(a.get('BANDWIDTH', 0)),
+        int(a['AVERAGE-BANDWIDTH']) if 'AVERAGE-BANDWIDTH' in a else None,
+        _resolution(a['RESOLUTION']) if 'RESOLUTION' in a else None,
+        a.get('CODECS'),
+        float(a['FRAME-RATE']) if 'FRAME-RATE' in a else None,
+        a.get('AUDIO'),
+        a.get('VIDEO'),
+    )
+    state.master_pl()
+
+
+def _tag_media(state, value):
+    attrs = parse_attributes(value)
+    if 'URI' in attrs:
+        attrs['URI'] = state.resolve(attrs['URI'])
+    state.master_pl().media.append(attrs)
+
+
+def _tag_extinf(state, value):
+    dur, _, title = value.partition(',')
+    state.duration = float(dur)
+    state.title = title or None
+
+
+def _tag_byterange(state, value):
+    state.byterange = ByteRange.parse(value, state.range_end)
+
+
+def _tag_key(state, value):
+    a = parse_attributes(value)
+    method = a.get('METHOD', 'NONE')
+    if method == 'NONE':
+        state.key = None
+    else:
+        uri = a.get('URI')
+        state.key = Key(method, state.resolve(uri) if uri else None, a.get('IV'), a.get('KEYFORMAT'))
+
+
+def _tag_discontinuity(state, value):
+    state.discontinuity = True
+
+
+def _tag_pdt(state, value):
+    state.pdt = value
+
+
+def _tag_map(state, value):
+    uri = parse_attributes(value).get('URI')
+    state.map_uri = state.resolve(uri) if uri else None
+
+
+def _tag_target_duration(state, value):
+    state.media_pl().target_duration = float(value)
+
+
+def _tag_media_sequence(state, value):
+    state.media_pl().media_sequence = int(value)
+    state.sequence = int(value)
+
+
+def _tag_disc_sequence(state, value):
+    state.media_pl().discontinuity_sequence = int(value)
+    state.disc_seq = int(value)
+
+
+def _tag_playlist_type(state, value):
+    state.media_pl().playlist_type = value.strip()
+
+
+def _tag_endlist(state, value):
+    state.media_pl().endlist = True
+
+
+def _tag_part(state, value):
+    a = parse_attributes(value)
+    if 'URI' not in a:
+        return
+    byterange = None
+    if 'BYTERANGE' in a:
+        byterange = ByteRange.parse(a['BYTERANGE'], state.part_range_end)
+        state.part_range_end = byterange.offset + byterange.length
+    state.media_pl().parts.append(Part(state.resolve(a['URI']), float(a.get('DURATION', 0)),
+                                       state.sequence, state.part_index,
+                                       a.get('INDEPENDENT') == 'YES', byterange))
+    state.part_index += 1
+
+
+def _tag_part_inf(state, value):
+    target = parse_attributes(value).get('PART-TARGET')
+    if target:
+        state.media_pl().part_target = float(target)
+
+
+def _tag_server_control(state, value):
+    state.media_pl().server_control = parse_attributes(value)
+
+
+def _tag_independent(state, value):
+    # Valid in both playlist types; remembered on whichever we end up with
+    state.master_pl().independent_segments = True
+
+
+TAG_HANDLERS = {
+    '#EXT-X-STREAM-INF': _tag_stream_inf,
+    '#EXT-X-MEDIA': _tag_media,
+    '#EXTINF': _tag_extinf,
+    '#EXT-X-BYTERANGE': _tag_byterange,
+    '#EXT-X-KEY': _tag_key,
+    '#EXT-X-DISCONTINUITY': _tag_discontinuity,
+    '#EXT-X-PROGRAM-DATE-TIME': _tag_pdt,
+    '#EXT-X-MAP': _tag_map,
+    '#EXT-X-TARGETDURATION': _tag_target_duration,
+    '#EXT-X-MEDIA-SEQUENCE': _tag_media_sequence,
+    '#EXT-X-DISCONTINUITY-SEQUENCE': _tag_disc_sequence,
+    '#EXT-X-PLAYLIST-TYPE': _tag_playlist_type,
+    '#EXT-X-ENDLIST': _tag_endlist,
+    '#EXT-X-INDEPENDENT-SEGMENTS': _tag_independent,
+    '#EXT-X-PART': _tag_part,
+    '#EXT-X-PART-INF': _tag_part_inf,
+    '#EXT-X-SERVER-CONTROL': _tag_server_control,
+}
+
+
+def _uri_line(state, line):
+    uri = state.resolve(line)
+    if state.pending_variant is not None:
+        state.pending_variant.uri = uri
+        state.master.variants.append(state.pending_variant)
+        state.pending_variant = None
+        return
+
+    pl = state.media_pl()
+    if state.discontinuity:
+        state.disc_seq += 1
+        pl.discontinuities.append(Discontinuity(len(pl.segments), state.disc_seq, state.time))
+    duration = state.duration or 0.0
+    pl.segments.append(Segment(uri, duration, state.time, state.sequence, state.title,
+                               state.byterange, state.key, state.discontinuity,
+                               state.pdt, state.map_uri))
+    state.time += duration
+    state.sequence += 1
+    if state.byterange is not None:
+        state.range_end = state.byterange.offset + state.byterange.length
+    # Per-segment tags reset; KEY and MAP carry over to following segments
+    state.duration = None
+    state.title = None
+    state.byterange = None
+    state.discontinuity = False
+    state.pdt = None
+    state.part_index = 0
+
+
+def parse_lines(lines, base_uri=""):
+    """
+    Parse an iterable of playlist lines (str or bytes).
+    Returns a MasterPlaylist or MediaPlaylist.
+    """
+    state = _State(base_uri)
+    first = True
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        line = line.strip()
+        if not line:
+            continue
+        if first:
+            first = False
+            if line.startswith('\ufeff'):
+                line = line[1:]
+            if line != '#EXTM3U':
+                raise ValueError("Not an M3U8 playlist")
+            continue
+        if line[0] == '#':
+            tag, _, value = line.partition(':')
+            handler = TAG_HANDLERS.get(tag)
+            if handler:
+                handler(state, value)
+            continue
+        _uri_line(state, line)
+
+    if first:
+        raise ValueError("Empty playlist")
+    if state.master is not None and state.master.variants:
+        return state.master
+    media = state.media_pl()
+    if state.master is not None:
+        media.independent_segments = state.master.independent_segments
+    return media
+
+
+def parse_playlist(text, base_uri=""):
+    """Parse playlist text."""
+    return parse_lines(text.splitlines(), base_uri)
+
+
+_PDT_FRACTION_RE = re.compile(r'(\.\d{1,6})\d*')
+_PDT_OFFSET_RE = re.compile(r'([+-]\d\d)(\d\d)$')
+
+
+def parse_program_date_time(value):
+    """EXT-X-PROGRAM-DATE-TIME (ISO 8601) as a POSIX timestamp, or None."""
+    if not value:
+        return None
+    v = value.strip()
+    if v[-1:] in ('Z', 'z'):
+        v = v[:-1] + '+00:00'
+    v = _PDT_FRACTION_RE.sub(r'\1', v, count=1)     # fromisoformat takes 6 digits max
+    v = _PDT_OFFSET_RE.sub(r'\1:\2', v)            # +0000 -> +00:00
+    try:
+        dt = datetime.fromisoformat(v)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def is_playlist_response(content_type, first_bytes):
+    """Guess whether an HTTP body is an HLS playlist."""
+    ct = (content_type or "").lower()
+    if 'mpegurl' in ct:
+        return True
+    if isinstance(first_bytes, str):
+        first_bytes = first_bytes.encode('utf-8', 'replace')
+    return first_bytes.lstrip(b'\xef\xbb\xbf \r\n\t').startswith(b'#EXTM3U')
+
+
+def fetch_playlist(url, headers=None, timeout=10, client=None, job=None):
+    """
+    GET a URL and parse the body if it is an HLS playlist.
+    Returns (status_code, playlist or None). Non-playlist bodies are not read.
+    job: optional task_executor.Job; cancelling it aborts the transfer.
+    """
+    from .http_client import get_client
+    client = client or get_client()
+    with client.stream(url, headers=headers, timeout=timeout) as r:
+        if job:
+            job.bind(r)
+        try:
+            if r.status >= 400:
+                return r.status, None
+            lines = r.iter_lines()
+            first = next(lines, b'')
+            if not is_playlist_response(r.headers.get('Content-Type'), first):
+                return r.status, None
+            playlist = parse_lines(chain([first], lines), r.url)
+            if job:
+                job.check()  # a closed transfer reads as a short playlist
+            return r.status, playlist
+        except Exception:
+            if job:
+                job.check()  # closed under us: report the cancellation
+            raise
+        finally:
+            if job:
+                job.unbind(r)
+
+
+def choose_start_variant(variants, preferred_bandwidth=None):
+    """
+    Pick the starting variant: the highest one not above the preferred
+    bandwidth, or the highest overall when there is no preference.
+    """
+    if not variants:
+        return None
+    ladder = sorted(variants, key=lambda v: v.bandwidth, reverse=True)
+    if preferred_bandwidth:
+        for v in ladder:
+            if v.bandwidth <= preferred_bandwidth:
+                return v
+        return ladder[-1]
+    return ladder[0]
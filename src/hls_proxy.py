@@ -0,0 +1,569 @@
+import base64
+import hashlib
+import os
+import posixpath
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, urljoin
+
+from .hls_parser import parse_attributes, is_playlist_response, parse_playlist
+from .prefetcher import SegmentPrefetcher
+from .http_client import get_client
+
+# -------------------------------------------------
+#  Local HLS caching reverse proxy
+# -------------------------------------------------
+#  mpv is pointed at http://127.0.0.1:<port>/p/<token>/index.m3u8.
+#  Playlists are fetched from the origin every time (live playlists change)
+#  and every URI inside is rewritten to point back at the proxy.
+#  Segments go through SegmentCache, so replays and refreshes are served
+#  locally instead of hitting the CDN again.
+
+
+def encode_url(url):
+    return base64.urlsafe_b64encode(url.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_url(token):
+    pad = '=' * (-len(token) % 4)
+    return base64.urlsafe_b64decode(token + pad).decode('utf-8')
+
+
+def _basename(url):
+    # Keep the original file name so demuxers that check extensions are happy
+    name = posixpath.basename(urlparse(url).path)
+    return name or "index"
+
+
+def _content_range(range_header, length):
+    """Content-Range for a cached byte range ("bytes=100-199" -> "bytes 100-199/*")."""
+    try:
+        start = int(range_header.split('=', 1)[1].split('-', 1)[0])
+    except (AttributeError, IndexError, ValueError):
+        start = 0
+    return f"bytes {start}-{start + length - 1}/*"
+
+
+def _requested_range(range_header):
+    """The player's Range header, or None when it asks for the whole body ("bytes=0-", as ffmpeg sends)."""
+    if not range_header or range_header.replace(' ', '') == "bytes=0-":
+        return None
+    return range_header
+
+
+def _slice_range(range_header, data):
+    """(data slice, Content-Range) of a whole body for "bytes=S-E" / "bytes=S-", or None."""
+    try:
+        first, last = range_header.split('=', 1)[1].split(',', 1)[0].split('-', 1)
+        start = int(first)
+        end = min(int(last), len(data) - 1) if last.strip() else len(data) - 1
+    except (AttributeError, IndexError, ValueError):
+        return None
+    if start >= len(data) or end < start:
+        return None
+    return data[start:end + 1], f"bytes {start}-{end}/{len(data)}"
+
+
+class TransferMeter:
+    """
+    Origin segment downloads as (start, end, bytes). take() returns what
+    completed since the last call: total bytes and the wall-clock time the
+    link was busy (union of the transfers, TTFB included), so parallel
+    downloads sharing one bottleneck are not counted as extra capacity.
+    """
+
+    def __init__(self, keep=256):
+        self.keep = keep            # unread transfers kept (nobody may be calling take())
+        self._lock = threading.Lock()
+        self._done = deque(maxlen=keep)
+
+    def record(self, start, end, size):
+        with self._lock:
+            self._done.append((start, end, size))
+
+    def take(self):
+        with self._lock:
+            done, self._done = list(self._done), deque(maxlen=self.keep)
+        total = sum(size for _, _, size in done)
+        busy = 0.0
+        cur_start = cur_end = None
+        for start, end, _ in sorted(done):
+            if cur_end is None or start > cur_end:
+                if cur_end is not None:
+                    busy += cur_end - cur_start
+                cur_start, cur_end = start, end
+            else:
+                cur_end = max(cur_end, end)
+        if cur_end is not None:
+            busy += cur_end - cur_start
+        return total, busy
+
+
+# Disk entries start with "SEGC <content type>\t<content range>\n" so both
+# survive a restart; files without it (older caches) are plain MPEG-TS.
+_DISK_MAGIC = b"SEGC "
+
+
+def _disk_header(content_type, content_range):
+    return _DISK_MAGIC + f"{content_type}\t{content_range or ''}\n".encode('utf-8')
+
+
+def _parse_disk_entry(raw):
+    """(content_type, data, content_range) of a cache file."""
+    if raw.startswith(_DISK_MAGIC):
+        end = raw.find(b"\n")
+        if end > 0:
+            ctype, _, content_range = raw[len(_DISK_MAGIC):end].decode('utf-8', 'replace').partition("\t")
+            return ctype or "video/mp2t", raw[end + 1:], content_range or None
+    return "video/mp2t", raw, None
+
+
+class SegmentCache:
+    """Two-tier LRU cache (RAM + disk) keyed by absolute segment URL."""
+
+    def __init__(self, cache_dir, max_ram_bytes, max_disk_bytes):
+        self.cache_dir = cache_dir
+        self.max_ram_bytes = max_ram_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._ram = OrderedDict()       # key -> (content_type, data, content_range)
+        self._ram_bytes = 0
+        self._disk = OrderedDict()      # key -> size
+        self._disk_bytes = 0
+        self._unread = OrderedDict()    # prefetched keys not read yet
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.prefetch_hits = 0          # first reads of prefetched entries
+        self.bytes_saved = 0
+        self.bytes_fetched = 0
+
+        if self.cache_dir and self.max_disk_bytes > 0:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._scan_disk()
+
+    @staticmethod
+    def key_for(url, byte_range=None):
+        raw = url if not byte_range else f"{url}#{byte_range}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".seg")
+
+    def _scan_disk(self):
+        """Rebuild the disk index from a previous session, oldest first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".seg"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def get(self, key):
+        """Return (content_type, data, content_range) or None; content_range is set for 206 bodies."""
+        item = self.peek(key)
+        with self._lock:
+            if item is None:
+                self.misses += 1
+                self._unread.pop(key, None)
+            else:
+                self._hit(key, len(item[1]))
+        return item
+
+    def peek(self, key):
+        """Like get, without counting a hit or miss."""
+        with self._lock:
+            item = self._ram.get(key)
+            if item is not None:
+                self._ram.move_to_end(key)
+                return item
+            on_disk = key in self._disk
+        if not on_disk:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                item = _parse_disk_entry(f.read())
+        except OSError:
+            with self._lock:
+                self._drop_disk(key)
+            return None
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._put_ram(key, item)
+        return item
+
+    def _hit(self, key, size):
+        # The first read of a prefetched entry did not save an origin request
+        if self._unread.pop(key, None):
+            self.prefetch_hits += 1
+        else:
+            self.hits += 1
+            self.bytes_saved += size
+
+    def claim_prefetched(self, key):
+        """Count a prefetched entry handed to the player without a get()."""
+        with self._lock:
+            if self._unread.pop(key, None):
+                self.prefetch_hits += 1
+
+    def put(self, key, content_type, data, prefetched=False, content_range=None):
+        """
+        Store an entry; prefetched entries count as a prefetch on their first read.
+        content_range: the origin's Content-Range when data is a 206 body.
+        """
+        with self._lock:
+            self.bytes_fetched += len(data)
+            self._put_ram(key, (content_type, data, content_range))
+            if prefetched:
+                self._unread[key] = True
+                while len(self._unread) > 4096:
+                    self._unread.popitem(last=False)
+            else:
+                self._unread.pop(key, None)
+        header = _disk_header(content_type, content_range)
+        size = len(header) + len(data)
+        if self.cache_dir and self.max_disk_bytes > 0 and size <= self.max_disk_bytes:
+            tmp = self._path(key) + ".tmp"
+            try:
+                with open(tmp, 'wb') as f:
+                    f.write(header)
+                    f.write(data)
+                os.replace(tmp, self._path(key))
+            except OSError as e:
+                print(f"Segment cache write error: {e}")
+                return
+            with self._lock:
+                if key not in self._disk:
+                    self._disk[key] = size
+                    self._disk_bytes += size
+                self._disk.move_to_end(key)
+                self._evict_disk()
+
+    def _put_ram(self, key, item):
+        size = len(item[1])
+        if size > self.max_ram_bytes:
+            return
+        old = self._ram.pop(key, None)
+        if old is not None:
+            self._ram_bytes -= len(old[1])
+        self._ram[key] = item
+        self._ram_bytes += size
+        while self._ram_bytes > self.max_ram_bytes and self._ram:
+            _, (_, data, _) = self._ram.popitem(last=False)
+            self._ram_bytes -= len(data)
+
+    def _drop_disk(self, key):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def contains(self, key):
+        """Check presence without touching LRU order or stats."""
+        with self._lock:
+            return key in self._ram or key in self._disk
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses + self.prefetch_hits
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "prefetch_hits": self.prefetch_hits,
+                "hit_ratio": self.hit_ratio,
+                "bytes_saved": self.bytes_saved,
+                "bytes_fetched": self.bytes_fetched,
+                "ram_bytes": self._ram_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        proxy = self.server.proxy
+        parts = self.path.split('/')
+        # ['', kind, token, name]
+        if len(parts) < 3 or parts[1] not in ('p', 's', 'k'):
+            self.send_error(404)
+            return
+        try:
+            url = decode_url(parts[2])
+        except Exception:
+            self.send_error(400)
+            return
+
+        try:
+            if parts[1] == 'p':
+                status, ctype, body = proxy.fetch_playlist(url)
+            elif parts[1] == 's':
+                byte_range = _requested_range(self.headers.get('Range'))
+                status, ctype, body, content_range = proxy.serve_segment(url, byte_range)
+            else:
+                status, ctype, body = proxy.fetch_passthrough(url)
+        except Exception as e:
+            print(f"Proxy error for {url}: {e}")
+            self.send_error(502)
+            return
+
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            if status == 206:
+                self.send_header("Content-Range", content_range or _content_range(self.headers.get('Range'), len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # mpv closed the connection (seek / stop)
+            pass
+
+
+class HlsProxy:
+    def __init__(self, cache, host="127.0.0.1", port=0, timeout=15, prefetch_workers=0, client=None):
+        self.cache = cache
+        self.timeout = timeout
+        self.headers = {}
+        # Shared keep-alive pool (http_client.py)
+        self.client = client or get_client()
+        self.transfers = TransferMeter()    # origin segment throughput (ABR)
+        self.prefetcher = None
+        if prefetch_workers > 0:
+            self.prefetcher = SegmentPrefetcher(cache, self._fetch_timed, max_workers=prefetch_workers)
+        self.server = ThreadingHTTPServer((host, port), _ProxyHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+        self._thread = None
+        # LL-HLS: segment URL -> its part URLs (low-latency mode, see live_latency.py)
+        self._parts = OrderedDict()
+        self._parts_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+        try:
+            self.server.shutdown()
+            self.server.server_close()
+        except Exception:
+            pass
+
+    def set_headers(self, headers):
+        """Headers (Referer, User-Agent, ...) injected into every origin request."""
+        self.headers = {k: v for k, v in (headers or {}).items() if v}
+
+    def wrap(self, url):
+        """Proxy URL for a playlist."""
+        return self._proxied('p', url)
+
+    def _proxied(self, kind, url):
+        return f"{self.base_url}/{kind}/{encode_url(url)}/{_basename(url)}"
+
+    # -------------------------------------------------
+    #  Origin fetching
+    # -------------------------------------------------
+    def _get(self, url, extra_headers=None):
+        headers = dict(self.headers)
+        if extra_headers:
+            headers.update(extra_headers)
+        return self.client.get(url, headers=headers, timeout=self.timeout)
+
+    def _get_segment(self, url, extra_headers=None):
+        t0 = time.perf_counter()
+        r = self._get(url, extra_headers)
+        if r.status < 400:
+            self.transfers.record(t0, time.perf_counter(), len(r.content))
+        return r
+
+    def _fetch_timed(self, url):
+        """Segment download for the prefetcher, with time to first byte."""
+        r = self._get_segment(url)
+        return r.status, r.headers.get('Content-Type', 'video/mp2t'), r.content, r.ttfb
+
+    def fetch_playlist(self, url):
+        r = self._get(url)
+        ctype = r.headers.get('Content-Type', 'application/vnd.apple.mpegurl')
+        if r.status >= 400 or not is_playlist_response(ctype, r.content[:64]):
+            return r.status, ctype, r.content
+        if self.prefetcher:
+            self._feed_prefetcher(r.text, r.url)
+        body = self.rewrite_playlist(r.text, r.url)
+        return r.status, 'application/vnd.apple.mpegurl', body.encode('utf-8')
+
+    def _feed_prefetcher(self, text, url):
+        try:
+            pl = parse_playlist(text, url)
+        except ValueError:
+            return
+        if not pl.is_master:
+            # Byte-range segments are requested per range, leave those to mpv
+            self.prefetcher.set_playlist(url, [s.uri for s in pl.segments if s.byterange is None])
+
+    def prefetch_at(self, media_url, playlist, position):
+        """Start prefetching a MediaPlaylist at the segment containing position (seconds)."""
+        if not self.prefetcher or playlist is None or playlist.is_master:
+            return False
+        seg = playlist.segment_at(position)
+        if seg is None or seg.byterange is not None:
+            return False
+        # Same list the proxy feeds from the playlist it serves to mpv
+        urls = [s.uri for s in playlist.segments if s.byterange is None]
+        self.prefetcher.start_at(media_url, urls, urls.index(seg.uri))
+        return True
+
+    def set_parts(self, segment_url, part_urls):
+        """Register the LL-HLS parts a segment is made of (the last 32 are kept)."""
+        with self._parts_lock:
+            self._parts[segment_url] = part_urls
+            while len(self._parts) > 32:
+                self._parts.popitem(last=False)
+
+    def _from_parts(self, url, key):
+        """A segment assembled from cached parts (parts concatenate to the segment), or None."""
+        with self._parts_lock:
+            part_urls = self._parts.get(url)
+        if not part_urls:
+            return None
+        part_keys = [SegmentCache.key_for(u) for u in part_urls]
+        if not all(self.cache.contains(k) for k in part_keys):
+            return None
+        chunks = []
+        for k in part_keys:
+            item = self.cache.peek(k)
+            if item is None:
+                return None
+            chunks.append(item[1])
+        data = b"".join(chunks)
+        ctype = item[0]
+        # Served now: this read is the assembly's own, not a cache hit
+        self.cache.put(key, ctype, data, prefetched=True)
+        self.cache.claim_prefetched(key)
+        return 200, ctype, data
+
+    def fetch_segment(self, url, byte_range=None):
+        """(status, content_type, data) of a segment or byte range, through the cache."""
+        return self.serve_segment(url, byte_range)[:3]
+
+    def serve_segment(self, url, byte_range=None):
+        """fetch_segment plus the Content-Range to send with a 206 (None otherwise)."""
+        if byte_range:
+            return self._fetch_range(url, byte_range)
+        key = SegmentCache.key_for(url)
+        if self._parts and not self.cache.contains(key):
+            assembled = self._from_parts(url, key)
+            if assembled:
+                return assembled + (None,)
+        if self.prefetcher:
+            return self.prefetcher.get(url, key) + (None,)
+        item = self.cache.get(key)
+        if item is not None:
+            return 200, item[0], item[1], None
+        r = self._get_segment(url)
+        ctype = r.headers.get('Content-Type', 'video/mp2t')
+        if r.status == 200:
+            self.cache.put(key, ctype, r.content)
+        return r.status, ctype, r.content, None
+
+    def _fetch_range(self, url, byte_range):
+        key = SegmentCache.key_for(url, byte_range)
+        if self.cache.contains(key):
+            item = self.cache.get(key)
+            if item is not None and item[2]:
+                return 206, item[0], item[1], item[2]
+        # The whole segment may already be cached (origin that ignores ranges, prefetch)
+        full_key = SegmentCache.key_for(url)
+        if self.cache.contains(full_key):
+            item = self.cache.get(full_key)
+            sliced = _slice_range(byte_range, item[1]) if item is not None else None
+            if sliced:
+                return 206, item[0], sliced[0], sliced[1]
+
+        r = self._get_segment(url, {'Range': byte_range})
+        ctype = r.headers.get('Content-Type', 'video/mp2t')
+        if r.status == 206:
+            # Only a real partial response is cached under the ranged key
+            content_range = r.headers.get('Content-Range') or _content_range(byte_range, len(r.content))
+            self.cache.put(key, ctype, r.content, content_range=content_range)
+            return 206, ctype, r.content, content_range
+        if r.status == 200:
+            # The origin ignored the range and sent the whole segment: keep it whole, answer the range
+            self.cache.put(full_key, ctype, r.content)
+            sliced = _slice_range(byte_range, r.content)
+            if sliced:
+                return 206, ctype, sliced[0], sliced[1]
+        return r.status, ctype, r.content, None
+
+    def fetch_passthrough(self, url):
+        r = self._get(url)
+        return r.status, r.headers.get('Content-Type', 'application/octet-stream'), r.content
+
+    # -------------------------------------------------
+    #  Playlist rewriting
+    # -------------------------------------------------
+    def rewrite_playlist(self, text, base_url):
+        out = []
+        next_is_playlist = False
+        for line in text.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                out.append(line)
+                continue
+            if stripped.startswith('#'):
+                tag = stripped.split(':', 1)[0]
+                if tag == '#EXT-X-STREAM-INF':
+                    next_is_playlist = True
+                if 'URI="' in stripped:
+                    # Keys must not be cached (rotation / auth), playlists
+                    # referenced from MEDIA / I-FRAME tags need rewriting too
+                    if tag == '#EXT-X-KEY' or tag == '#EXT-X-SESSION-KEY':
+                        kind = 'k'
+                    elif tag == '#EXT-X-MAP':
+                        kind = 's'
+                    else:
+                        kind = 'p'
+                    uri = parse_attributes(stripped.split(':', 1)[1]).get('URI')
+                    if uri:
+                        stripped = stripped.replace(f'URI="{uri}"',
+                                                    f'URI="{self._proxied(kind, urljoin(base_url, uri))}"')
+                out.append(stripped)
+                continue
+            absolute = urljoin(base_url, stripped)
+            out.append(self._proxied('p' if next_is_playlist else 's', absolute))
+            next_is_playlist = False
+        return "\n".join(out) + "\n"
@@ -0,0 +1,359 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from .hls_parser import parse_playlist, choose_start_variant
+from .http_client import get_client
+
+# -------------------------------------------------
+#  Segment-level HLS recorder
+# -------------------------------------------------
+#  Records straight from the media playlist, independent of playback:
+#  segments are downloaded by a worker pool, at most `window` ahead of the
+#  write position, and appended in order to <output>.part (TS, or fMP4 with
+#  its EXT-X-MAP init section). Memory is bounded by window * segment size.
+#  AES-128 segments are decrypted with `cryptography` (or pycryptodome).
+#  A <output>.part.json sidecar records how far the file is complete, so a
+#  failed or stopped recording continues where it left off. At the end a TS
+#  recording is remuxed to MP4 by `ffmpeg -c copy` when the output ends in
+#  .mp4 (kept as .ts if ffmpeg is not installed). Live playlists are followed
+#  until ENDLIST or stop().
+
+
+class RecordingError(RuntimeError):
+    pass
+
+
+class RecordingStopped(Exception):
+    """stop() was called while a download was waiting or retrying."""
+
+
+def _aes128_cbc_decrypt(key, iv, data):
+    """AES-128-CBC with PKCS#7 padding, as used by EXT-X-KEY METHOD=AES-128."""
+    try:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+        plain = decryptor.update(data) + decryptor.finalize()
+    except ImportError:
+        try:
+            from Crypto.Cipher import AES
+        except ImportError:
+            raise RecordingError("AES-128 segments need the 'cryptography' package (pip install cryptography)")
+        plain = AES.new(key, AES.MODE_CBC, iv).decrypt(data)
+    pad = plain[-1] if plain else 0
+    if 1 <= pad <= 16 and plain.endswith(bytes([pad]) * pad):
+        plain = plain[:-pad]
+    return plain
+
+
+def _iv_bytes(key, sequence):
+    if key.iv:
+        value = key.iv[2:] if key.iv.lower().startswith('0x') else key.iv
+        return bytes.fromhex(value.zfill(32))
+    # No IV attribute: the media sequence number, big-endian
+    return sequence.to_bytes(16, 'big')
+
+
+def _same_stream(a, b):
+    """Playlist URLs without the query, so renewed signed links still match."""
+    a, b = urlsplit(a or ""), urlsplit(b or "")
+    return (a.netloc, a.path) == (b.netloc, b.path)
+
+
+class SegmentDownloader:
+    """
+    Media playlist and segment fetching shared by the recorder and the DVR:
+    variant choice, retries with backoff, AES-128 decryption. fetch_segment,
+    if given, is HlsProxy.fetch_segment, so segments also land in (or come
+    from) the proxy cache mpv reads from.
+    """
+
+    def __init__(self, client=None, retries=3, timeout=20, bandwidth=None, stop_event=None,
+                 fetch_segment=None):
+        self.client = client or get_client()
+        self.retries = retries
+        self.timeout = timeout
+        self.bandwidth = bandwidth
+        self.stop_event = stop_event or threading.Event()
+        self.fetch_segment = fetch_segment
+        self._keys = {}
+        self._keys_lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        r = self.client.get(url, headers=headers, timeout=self.timeout)
+        if r.status not in (200, 206):
+            raise RecordingError(f"HTTP {r.status} for {url}")
+        return r
+
+    def media_playlist(self, url):
+        """MediaPlaylist for url, choosing a variant (by bandwidth) if it is a master."""
+        r = self.get(url)
+        playlist = parse_playlist(r.text, r.url)
+        if playlist.is_master:
+            variant = choose_start_variant(playlist.sorted_variants(), self.bandwidth)
+            if variant is None:
+                raise RecordingError("master playlist without variants")
+            r = self.get(variant.uri)
+            playlist = parse_playlist(r.text, r.url)
+        return playlist
+
+    def key(self, uri):
+        with self._keys_lock:
+            key = self._keys.get(uri)
+        if key is None:
+            key = self.get(uri).content
+            if len(key) != 16:
+                raise RecordingError(f"AES-128 key has {len(key)} bytes")
+            with self._keys_lock:
+                self._keys[uri] = key
+        return key
+
+    def _fetch_once(self, url, byterange):
+        if self.fetch_segment:
+            status, _, data = self.fetch_segment(url, byterange.header() if byterange else None)
+            if status not in (200, 206):
+                raise RecordingError(f"HTTP {status} for {url}")
+            return data
+        return self.get(url, {'Range': byterange.header()} if byterange else None).content
+
+    def fetch(self, url, byterange=None):
+        """Body of url, retried with backoff. Raises RecordingStopped once stopped."""
+        error = None
+        for attempt in range(self.retries + 1):
+            if self.stop_event.is_set():
+                raise RecordingStopped()
+            try:
+                return self._fetch_once(url, byterange)
+            except Exception as e:
+                error = e
+            if self.stop_event.wait(min(8.0, 0.5 * 2 ** attempt)):
+                raise RecordingStopped()
+        raise RecordingError(f"{url}: {error}")
+
+    def download(self, seg):
+        """Segment bytes, decrypted."""
+        data = self.fetch(seg.uri, seg.byterange)
+        key = seg.key
+        if key is not None and key.method != 'NONE':
+            if key.method != 'AES-128':
+                raise RecordingError(f"{key.method} encryption is not supported")
+            data = _aes128_cbc_decrypt(self.key(key.uri), _iv_bytes(key, seg.sequence), data)
+        return data
+
+
+class RecordingProgress:
+    __slots__ = ('state', 'done', 'total', 'bytes', 'media_seconds', 'started', 'output', 'error')
+
+    def __init__(self, output):
+        self.state = "starting"     # downloading, remuxing, done, stopped, failed
+        self.done = 0               # segments written
+        self.total = None           # None while following a live playlist
+        self.bytes = 0
+        self.media_seconds = 0.0
+        self.started = time.monotonic()
+        self.output = output
+        self.error = None
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def percent(self):
+        return 100.0 * self.done / self.total if self.total else None
+
+    def describe(self):
+        mb = self.bytes / (1024 * 1024)
+        if self.state == "downloading":
+            rate = mb / max(self.elapsed(), 0.001)
+            count = f"{self.done}/{self.total}" if self.total else f"{self.done}"
+            pct = f" {self.percent():.0f}%" if self.total else " (live)"
+            return f"Recording{pct}: {count} segments, {mb:.1f} MB @ {rate:.1f} MB/s"
+        if self.state == "failed":
+            return f"Recording failed: {self.error}"
+        if self.state == "done":
+            return f"Recorded {mb:.1f} MB to {os.path.basename(self.output)}"
+        return f"Recording {self.state}"
+
+
+class HlsRecorder:
+    def __init__(self, url, output, workers=6, window=None, retries=3, timeout=20,
+                 bandwidth=None, client=None, on_progress=None):
+        """
+        url: master or media playlist; bandwidth picks the variant (highest if None).
+        on_progress(RecordingProgress) is called from the recorder thread.
+        """
+        self.url = url
+        self.output = output
+        self.workers = workers
+        self.window = window or workers * 2
+        self.on_progress = on_progress
+        self.part_path = output + ".part"
+        self.state_path = output + ".part.json"
+        self.progress = RecordingProgress(output)
+        self._stop = threading.Event()
+        self.source = SegmentDownloader(client, retries=retries, timeout=timeout,
+                                        bandwidth=bandwidth, stop_event=self._stop)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run_safe, name="recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop after the segment being written. VOD: the .part file stays
+        resumable. Live: the recording so far is finished as usual.
+        """
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _report(self, state=None):
+        if state:
+            self.progress.state = state
+        if self.on_progress:
+            try:
+                self.on_progress(self.progress)
+            except Exception as e:
+                print(f"Recording progress callback error: {e}")
+
+    def _run_safe(self):
+        try:
+            self.run()
+        except Exception as e:
+            self.progress.error = str(e)
+            self._report("failed")
+
+    # -------------------------------------------------
+    #  Resume state
+    # -------------------------------------------------
+    def _load_state(self, media_url):
+        """(next sequence, bytes, media seconds) of a previous run of this stream, or None."""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                st = json.load(f)
+            if _same_stream(st['url'], media_url) and os.path.getsize(self.part_path) >= st['bytes']:
+                return st['next'], st['bytes'], st.get('seconds', 0.0), st.get('map')
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _save_state(self, media_url, next_sequence, map_uri):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"url": media_url, "next": next_sequence, "bytes": self.progress.bytes,
+                       "seconds": self.progress.media_seconds, "map": map_uri}, f)
+        os.replace(tmp, self.state_path)
+
+    # -------------------------------------------------
+    #  Recording
+    # -------------------------------------------------
+    def run(self):
+        """Record until the playlist ends or stop(). Blocking. Returns the output path."""
+        playlist = self.source.media_playlist(self.url)
+        media_url = playlist.uri
+        if not playlist.segments:
+            raise RecordingError("media playlist has no segments")
+
+        next_sequence, map_uri = playlist.segments[0].sequence, None
+        resumed = self._load_state(media_url)
+        out = open(self.part_path, 'r+b' if resumed else 'wb')
+        try:
+            if resumed:
+                next_sequence, self.progress.bytes, self.progress.media_seconds, map_uri = resumed
+                out.truncate(self.progress.bytes)
+                out.seek(self.progress.bytes)
+            fmp4 = any(s.map_uri for s in playlist.segments)
+            live = playlist.is_live
+
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="record") as pool:
+                while True:
+                    todo = [s for s in playlist.segments if s.sequence >= next_sequence]
+                    if not playlist.is_live:
+                        self.progress.total = self.progress.done + len(todo)
+                    self._report("downloading")
+                    next_sequence, map_uri = self._write_segments(pool, todo, out, media_url,
+                                                                  next_sequence, map_uri)
+                    if self._stop.is_set() or not playlist.is_live:
+                        break
+                    # Live: wait about half a target duration for new segments
+                    if self._stop.wait(max(1.0, (playlist.target_duration or 6) / 2)):
+                        break
+                    playlist = self.source.media_playlist(self.url)
+        except RecordingStopped:
+            pass
+        finally:
+            out.close()
+
+        # A stopped VOD recording stays resumable, a stopped live one is what there is
+        if self._stop.is_set() and not live:
+            self._report("stopped")
+            return None
+        self.output = self._finish(fmp4)
+        self.progress.output = self.output
+        self._report("done")
+        return self.output
+
+    def _write_segments(self, pool, segments, out, media_url, next_sequence, map_uri):
+        """Download segments concurrently, write them in order. Returns (next sequence, map uri)."""
+        futures = {}
+        submitted = 0
+        try:
+            for i, seg in enumerate(segments):
+                # Keep at most `window` segments downloading or waiting in memory
+                while submitted < len(segments) and submitted - i < self.window:
+                    futures[submitted] = pool.submit(self.source.download, segments[submitted])
+                    submitted += 1
+                data = futures.pop(i).result()
+                if self._stop.is_set():
+                    raise RecordingStopped()
+                if seg.map_uri and seg.map_uri != map_uri:
+                    init = self.source.fetch(seg.map_uri)
+                    out.write(init)
+                    self.progress.bytes += len(init)
+                    map_uri = seg.map_uri
+                out.write(data)
+                self.progress.bytes += len(data)
+                self.progress.media_seconds += seg.duration
+                self.progress.done += 1
+                next_sequence = seg.sequence + 1
+                out.flush()
+                self._save_state(media_url, next_sequence, map_uri)
+                self._report()
+        finally:
+            for f in futures.values():
+                f.cancel()
+        return next_sequence, map_uri
+
+    def _finish(self, fmp4):
+        """Turn the .part file into the output (remuxing TS to MP4 if asked). Returns the path."""
+        output = self.output
+        if output.lower().endswith('.mp4') and not fmp4:
+            ffmpeg = shutil.which('ffmpeg')
+            if ffmpeg:
+                self._report("remuxing")
+                result = subprocess.run(
+                    [ffmpeg, '-y', '-loglevel', 'error', '-i', self.part_path,
+                     '-map', '0', '-c', 'copy', '-bsf:a', 'aac_adtstoasc', output],
+                    capture_output=True, text=True)
+                if result.returncode == 0:
+                    os.remove(self.part_path)
+                    self._remove_state()
+                    return output
+                print(f"Remux failed, keeping TS: {result.stderr.strip()[:200]}")
+            output = os.path.splitext(output)[0] + '.ts'
+        os.replace(self.part_path, output)
+        self._remove_state()
+        return output
+
+    def _remove_state(self):
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
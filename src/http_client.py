@@ -0,0 +1,240 @@
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+
+# -------------------------------------------------
+#  Shared HTTP client
+# -------------------------------------------------
+#  One keep-alive pool for URL validation, playlist fetches, the local proxy
+#  and the prefetcher, so back-to-back loads from the same CDN skip DNS,
+#  TCP and TLS setup. Uses httpx with HTTP/2 when httpx[http2] is installed,
+#  requests otherwise. The client has no default headers: callers pass the
+#  Referer / User-Agent per request, usually through with_headers().
+#  Name lookups made while this client opens a connection go through its own
+#  bounded DnsCache; every other getaddrinfo call in the process is untouched.
+
+DNS_TTL = 300           # seconds
+DNS_MAX_ENTRIES = 256
+
+_orig_getaddrinfo = socket.getaddrinfo
+_dns_scope = threading.local()  # .cache: DnsCache of the client connecting on this thread
+
+
+class DnsCache:
+    """getaddrinfo results for ttl seconds, least recently used dropped beyond max_entries."""
+
+    def __init__(self, ttl=DNS_TTL, max_entries=DNS_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # args -> (expires, result)
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit and hit[0] > now:
+                self._entries.move_to_end(key)
+                return hit[1]
+        result = _orig_getaddrinfo(host, port, family, type, proto, flags)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _scoped_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    cache = getattr(_dns_scope, 'cache', None)
+    if cache is None:
+        return _orig_getaddrinfo(host, port, family, type, proto, flags)
+    return cache.resolve(host, port, family, type, proto, flags)
+
+
+def _install_dns_hook():
+    # The hook only answers from a cache inside HttpClient._resolving()
+    if socket.getaddrinfo is _orig_getaddrinfo:
+        socket.getaddrinfo = _scoped_getaddrinfo
+
+
+class HttpResponse:
+    __slots__ = ('status', 'headers', 'url', 'content', 'ttfb')
+
+    def __init__(self, status, headers, url, content, ttfb):
+        self.status = status
+        self.headers = headers
+        self.url = url
+        self.content = content
+        self.ttfb = ttfb        # seconds until response headers arrived
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+
+class StreamResponse:
+    """Headers are available, body is read lazily with iter_lines()."""
+    __slots__ = ('status', 'headers', 'url', '_lines', '_close')
+
+    def __init__(self, status, headers, url, lines, close=None):
+        self.status = status
+        self.headers = headers
+        self.url = url
+        self._lines = lines
+        self._close = close
+
+    def iter_lines(self):
+        return self._lines()
+
+    def close(self):
+        """Abort the transfer; may be called from another thread."""
+        if self._close:
+            self._close()
+
+
+def _abort(response):
+    """Close a requests response from another thread, unblocking a pending read."""
+    try:
+        # urllib3 response -> http.client response -> socket file -> socket
+        sock = response.raw._fp.fp.raw._sock
+        sock.shutdown(socket.SHUT_RDWR)
+    except (OSError, AttributeError):
+        pass
+    response.close()
+
+
+class HttpClient:
+    def __init__(self, pool_size=16, timeout=10, http2=True, dns_ttl=DNS_TTL, dns_max_entries=DNS_MAX_ENTRIES):
+        self.timeout = timeout
+        self.dns = DnsCache(dns_ttl, dns_max_entries)
+        self.http2 = False
+        self._httpx = None
+        self._session = None
+
+        if http2:
+            try:
+                import httpx
+                import h2  # noqa: F401  (httpx needs it for http2=True)
+                self._httpx = httpx.Client(
+                    http2=True, follow_redirects=True, timeout=timeout,
+                    limits=httpx.Limits(max_connections=pool_size * 4,
+                                        max_keepalive_connections=pool_size))
+                self.http2 = True
+            except ImportError:
+                self._httpx = None
+
+        if self._httpx is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._session = requests.Session()
+            # pool_connections = hosts kept, pool_maxsize = connections per host
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+
+        _install_dns_hook()
+
+    @contextmanager
+    def _resolving(self):
+        """Name lookups on this thread use self.dns while the request is sent."""
+        outer = getattr(_dns_scope, 'cache', None)
+        _dns_scope.cache = self.dns
+        try:
+            yield
+        finally:
+            _dns_scope.cache = outer
+
+    def with_headers(self, headers):
+        """A view of this client (same pool) that sends headers with every request."""
+        return HeaderClient(self, headers)
+
+    def get(self, url, headers=None, timeout=None):
+        """GET and read the whole body."""
+        timeout = timeout or self.timeout
+        t0 = time.perf_counter()
+        if self._httpx is not None:
+            with ExitStack() as stack:
+                with self._resolving():
+                    r = stack.enter_context(self._httpx.stream("GET", url, headers=headers, timeout=timeout))
+                ttfb = time.perf_counter() - t0
+                body = r.read()
+                return HttpResponse(r.status_code, r.headers, str(r.url), body, ttfb)
+        with self._resolving():
+            r = self._session.get(url, headers=headers, timeout=timeout, stream=True)
+        ttfb = time.perf_counter() - t0
+        return HttpResponse(r.status_code, r.headers, r.url, r.content, ttfb)
+
+    @contextmanager
+    def stream(self, url, headers=None, timeout=None):
+        """GET with a lazily read body; the connection goes back to the pool on exit."""
+        timeout = timeout or self.timeout
+        if self._httpx is not None:
+            with ExitStack() as stack:
+                with self._resolving():
+                    r = stack.enter_context(self._httpx.stream("GET", url, headers=headers, timeout=timeout))
+                yield StreamResponse(r.status_code, r.headers, str(r.url), r.iter_lines, r.close)
+            return
+        with self._resolving():
+            r = self._session.get(url, headers=headers, timeout=timeout, stream=True, allow_redirects=True)
+        try:
+            yield StreamResponse(r.status_code, r.headers, r.url, r.iter_lines, lambda: _abort(r))
+        finally:
+            r.close()
+
+    def close(self):
+        if self._httpx is not None:
+            self._httpx.close()
+        if self._session is not None:
+            self._session.close()
+
+
+class HeaderClient:
+    """HttpClient.with_headers(): fixed headers merged under the per-call ones."""
+
+    def __init__(self, client, headers):
+        self.client = client
+        self.headers = {k: v for k, v in (headers or {}).items() if v}
+
+    @property
+    def http2(self):
+        return self.client.http2
+
+    def _merge(self, headers):
+        merged = dict(self.headers)
+        if headers:
+            merged.update(headers)
+        return merged
+
+    def with_headers(self, headers):
+        return HeaderClient(self.client, self._merge(headers))
+
+    def get(self, url, headers=None, timeout=None):
+        return self.client.get(url, headers=self._merge(headers), timeout=timeout)
+
+    def stream(self, url, headers=None, timeout=None):
+        return self.client.stream(url, headers=self._merge(headers), timeout=timeout)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide shared client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
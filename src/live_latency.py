@@ -0,0 +1,211 @@
+import threading
+import time
+
+from .hls_parser import parse_playlist
+from .hls_recorder import SegmentDownloader
+
+# -------------------------------------------------
+#  Low-latency live mode
+# -------------------------------------------------
+#  LiveEdgeTracker follows the live media playlist beside mpv. With
+#  EXT-X-SERVER-CONTROL CAN-BLOCK-RELOAD=YES it asks for the next segment or
+#  LL-HLS part (_HLS_msn / _HLS_part) and the server answers as soon as that
+#  exists, instead of polling every half target duration. New parts are
+#  handed to on_part (the proxy fetches them into its cache) and completed
+#  segments to on_segment_parts, so the proxy can assemble a segment from
+#  parts it already has when mpv asks for it.
+#  LatencyEstimator turns that into a latency figure: mpv joins a live
+#  stream JOIN_SEGMENTS from the end; from then on the live edge advances with
+#  the wall clock and the playhead with time-pos, so stalls add latency and
+#  faster playback removes it. EXT-X-PROGRAM-DATE-TIME adds the encoder and
+#  CDN delay in front of the playlist edge.
+#  LatencyController picks a playback speed (1.0 .. max_speed) or a skip.
+
+JOIN_SEGMENTS = 3           # mpv / ffmpeg hls live_start_index
+MAX_EDGE_DELAY = 60         # larger PDT offsets are clock skew, not delay
+DISCONTINUITY_JUMP = 120    # latency jumps above this are timestamp resets
+
+
+def blocking_reload_url(url, msn, part=None):
+    """Playlist URL asking an LL-HLS server to hold the response until msn (and part) exist."""
+    query = f"_HLS_msn={msn}" + (f"&_HLS_part={part}" if part is not None else "")
+    return url + ('&' if '?' in url else '?') + query
+
+
+def edge_delay(playlist, received_at):
+    """How old the newest media was when the playlist arrived (0 without PROGRAM-DATE-TIME)."""
+    pdt = playlist.program_date_time_at(playlist.live_edge)
+    if pdt is None:
+        return 0.0
+    delay = received_at - pdt
+    return delay if 0 <= delay <= MAX_EDGE_DELAY else 0.0
+
+
+def join_latency(playlist, received_at, at):
+    """Latency at time `at` of a player that joined this playlist JOIN_SEGMENTS from the end."""
+    seg = playlist.segments[max(0, len(playlist.segments) - JOIN_SEGMENTS)]
+    return (playlist.live_edge - seg.start) + (at - received_at) + edge_delay(playlist, received_at)
+
+
+class LiveEdgeTracker:
+    """Follows a live media playlist on a background thread; keeps the newest copy."""
+
+    def __init__(self, url, client=None, bandwidth=None, blocking=True, partial=True,
+                 on_part=None, on_segment_parts=None, on_not_live=None):
+        self.url = url
+        self.blocking = blocking
+        self.partial = partial
+        self.on_part = on_part                      # (part_uri) new LL-HLS part
+        self.on_segment_parts = on_segment_parts    # (segment_uri, [part_uri]) segment complete
+        self.on_not_live = on_not_live
+        self.playlist = None
+        self.received_at = None     # time.time() of the newest playlist
+        self.blocked = False        # last reload used blocking (_HLS_msn)
+        self._stop = threading.Event()
+        self.source = SegmentDownloader(client, retries=0, bandwidth=bandwidth, stop_event=self._stop)
+        self._seen_parts = set()
+        self._done_segments = set()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="live-edge", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        """(playlist, received_at) of the newest reload."""
+        return self.playlist, self.received_at
+
+    def _reload(self, media_url, previous):
+        if previous is None:
+            return self.source.media_playlist(self.url)
+        target = previous.target_duration or 6
+        self.blocked = self.blocking and previous.can_block_reload
+        if self.blocked:
+            part = None
+            if self.partial and previous.part_target:
+                part = len(previous.pending_parts())
+            self.source.timeout = 3 * target + 5    # the server may hold the request
+            r = self.source.get(blocking_reload_url(media_url, previous.next_sequence, part))
+        else:
+            wait = (previous.part_target if self.partial and previous.part_target else target / 2)
+            if self._stop.wait(wait):
+                return None
+            r = self.source.get(media_url)
+        return parse_playlist(r.text, media_url)
+
+    def _feed_parts(self, playlist):
+        if not self.partial or not playlist.parts:
+            return
+        for part in playlist.parts:
+            if part.byterange is None and part.uri not in self._seen_parts:
+                self._seen_parts.add(part.uri)
+                if self.on_part:
+                    self.on_part(part.uri)
+        if self.on_segment_parts:
+            for seg in playlist.segments[-JOIN_SEGMENTS:]:
+                parts = playlist.segment_parts(seg.sequence)
+                if parts and seg.sequence not in self._done_segments \
+                        and all(p.byterange is None for p in parts):
+                    self._done_segments.add(seg.sequence)
+                    self.on_segment_parts(seg.uri, [p.uri for p in parts])
+        # Only the last few segments carry parts
+        if len(self._seen_parts) > 500:
+            self._seen_parts = {p.uri for p in playlist.parts}
+            self._done_segments = {s.sequence for s in playlist.segments[-JOIN_SEGMENTS:]}
+
+    def _run(self):
+        media_url = None
+        errors = 0
+        while not self._stop.is_set():
+            try:
+                playlist = self._reload(media_url, self.playlist)
+                if playlist is None:
+                    continue
+                if not playlist.is_live:
+                    if self.on_not_live:
+                        self.on_not_live()
+                    return
+                media_url = media_url or playlist.uri
+                self.playlist = playlist
+                self.received_at = time.time()
+                self._feed_parts(playlist)
+                errors = 0
+            except Exception as e:
+                if self._stop.is_set():
+                    return
+                errors += 1
+                if errors == 3:
+                    print(f"Live edge tracker error: {e}")
+                self._stop.wait(min(30, 2 ** errors))
+
+
+class LatencyEstimator:
+    """Live latency (seconds behind the newest media) from mpv's time-pos."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Call when the live URL is (re)opened; re-anchors on the next time-pos."""
+        self._first = None      # (time-pos, time) first seen after the open
+        self._anchor = None     # (time-pos, latency, time)
+        self.latency = None
+
+    def update(self, time_pos, playlist, received_at, now=None):
+        now = time.time() if now is None else now
+        if time_pos is None:
+            return self.latency
+        if self._first is None:
+            self._first = (time_pos, now)
+        if self._anchor is None:
+            if playlist is None or not playlist.segments:
+                return None
+            pos0, t0 = self._first
+            self._anchor = (pos0, join_latency(playlist, received_at, t0), t0)
+        pos0, lat0, t0 = self._anchor
+        latency = lat0 + (now - t0) - (time_pos - pos0)
+        if latency < 0 or (self.latency is not None and latency > self.latency + DISCONTINUITY_JUMP):
+            # Timestamps jumped (discontinuity): carry the last estimate over
+            latency = self.latency if self.latency is not None else lat0
+            self._anchor = (time_pos, latency, now)
+        self.latency = latency
+        return latency
+
+
+class LatencyController:
+    """
+    target: wanted latency in seconds. Above it playback speeds up in
+    proportion to the excess, up to max_speed; more than skip_threshold
+    above it the controller asks for a skip instead.
+    """
+
+    DEADBAND = 0.5      # seconds around the target without speed changes
+    GAIN = 0.05         # speed per second of excess latency
+    MIN_BUFFER = 1.0    # no catch-up with less than this buffered (would stall)
+
+    def __init__(self, target=6.0, max_speed=1.1, skip_threshold=15.0):
+        self.target = target
+        self.max_speed = max(1.0, max_speed)
+        self.skip_threshold = skip_threshold
+        self.speed = 1.0
+
+    def update(self, latency, buffered=None):
+        """Returns (speed, skip): skip is seconds to jump ahead, or 0."""
+        if latency is None:
+            self.speed = 1.0
+            return self.speed, 0
+        excess = latency - self.target
+        if self.skip_threshold and excess > self.skip_threshold:
+            self.speed = 1.0
+            return self.speed, excess
+        if buffered is not None and buffered < self.MIN_BUFFER:
+            self.speed = 1.0
+        elif excess > self.DEADBAND:
+            self.speed = round(min(self.max_speed, 1.0 + self.GAIN * excess), 2)
+        elif excess <= 0:
+            self.speed = 1.0
+        # inside the deadband: keep the current speed until the target is reached
+        return self.speed, 0
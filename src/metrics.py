@@ -0,0 +1,124 @@
+import threading
+import time
+from array import array
+
+# -------------------------------------------------
+#  Time-series ring buffers (debug overlay graph)
+# -------------------------------------------------
+#  Each series is a fixed-size array('d') written in a circle, so memory is
+#  capacity * 8 bytes whatever the window. Samples are folded into buckets
+#  of window / capacity seconds: a 30 s window keeps sub-second detail, a
+#  2 h window keeps one point every 24 s, both in the same space.
+#  Buckets without samples (idle gaps, a series not reported) hold GAP (NaN)
+#  so every point stays at its place on the time axis; readers skip them.
+
+GAP = float('nan')
+
+
+class RingSeries:
+    __slots__ = ('capacity', 'data', 'head', 'count')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array('d', bytes(8 * capacity))
+        self.head = 0   # next write position
+        self.count = 0
+
+    def push(self, value):
+        self.data[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def values(self):
+        """Oldest to newest."""
+        if self.count < self.capacity:
+            return self.data[:self.count]
+        return self.data[self.head:] + self.data[:self.head]
+
+    def last(self):
+        return self.data[self.head - 1] if self.count else None
+
+    def stats(self):
+        """(min, avg, p95) or None when empty. GAP points are ignored."""
+        values = sorted(v for v in self.values() if v == v)
+        if not values:
+            return None
+        p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+        return values[0], sum(values) / len(values), p95
+
+
+class MetricsStore:
+    """
+    Several series sharing one time axis. record() may be called at any rate;
+    values are averaged per bucket ("sum" series are added, for per-bucket counts).
+    """
+    SERIES = (
+        # name, aggregation
+        ("fw_bytes", "mean"),
+        ("back_bytes", "mean"),
+        ("input_rate", "mean"),
+        ("buffered_seconds", "mean"),
+        ("dropped_frames", "sum"),
+    )
+
+    def __init__(self, window=30, capacity=120):
+        self.capacity = capacity
+        self.series = {name: RingSeries(capacity) for name, _ in self.SERIES}
+        self._agg = dict(self.SERIES)
+        self._lock = threading.Lock()
+        self.set_window(window)
+
+    def set_window(self, window):
+        """Change the time span (seconds). Existing points are dropped."""
+        with self._lock:
+            self.window = window
+            self.bucket = window / self.capacity
+            for s in self.series.values():
+                s.clear()
+            self._bucket_start = None
+            self._acc = {}
+            self._n = {}
+
+    def record(self, values, now=None):
+        """values: {series name: number}. Unknown names and None are ignored."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._bucket_start is None:
+                self._bucket_start = now
+            elif now - self._bucket_start >= self.bucket:
+                self._close_bucket()
+                # Buckets that passed without samples become gaps (more than
+                # capacity would only overwrite each other)
+                skipped = int((now - self._bucket_start) // self.bucket) - 1
+                for _ in range(min(skipped, self.capacity)):
+                    for series in self.series.values():
+                        series.push(GAP)
+                # Stay on the bucket grid so the graph spans exactly the window
+                self._bucket_start += (skipped + 1) * self.bucket
+            for name, v in values.items():
+                if v is None or name not in self.series:
+                    continue
+                self._acc[name] = self._acc.get(name, 0.0) + v
+                self._n[name] = self._n.get(name, 0) + 1
+
+    def _close_bucket(self):
+        for name, series in self.series.items():
+            n = self._n.get(name)
+            if n:
+                total = self._acc[name]
+                series.push(total if self._agg[name] == "sum" else total / n)
+            else:
+                series.push(GAP)
+        self._acc = {}
+        self._n = {}
+
+    def snapshot(self, name):
+        """(values oldest to newest, (min, avg, p95) or None)."""
+        with self._lock:
+            series = self.series[name]
+            return series.values(), series.stats()
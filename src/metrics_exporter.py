@@ -0,0 +1,211 @@
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -------------------------------------------------
+#  Prometheus / OpenMetrics exporter
+# -------------------------------------------------
+#  Optional /metrics endpoint for fleets of kiosk players. PlayerTelemetry
+#  counts stalls and startup latency from mpv's event thread (MpvPlayer.watch)
+#  and gauges are read from MpvPlayer.state at scrape time, on the HTTP
+#  server's thread. Nothing here runs on, or waits for, the Tk thread.
+
+STARTUP_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30)
+STALL_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    self.counts[i] += 1
+            self.total += 1
+            self.sum += value
+
+    def render(self, name, labels=""):
+        """labels: extra 'key="value"' pairs, e.g. 'kind="resume"'."""
+        sep = "," if labels else ""
+        extra = f"{{{labels}}}" if labels else ""
+        with self._lock:
+            lines = [f'{name}_bucket{{{labels}{sep}le="{upper}"}} {count}' for upper, count in zip(self.buckets, self.counts)]
+            lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.total}')
+            lines.append(f'{name}_sum{extra} {self.sum}')
+            lines.append(f'{name}_count{extra} {self.total}')
+        return lines
+
+
+class PlayerTelemetry:
+    """Stall and startup accounting, fed from the mpv event thread."""
+
+    def __init__(self, player):
+        self.player = player
+        self.startup = {kind: Histogram(STARTUP_BUCKETS) for kind in ("fresh", "resume", "zap", "refresh")}
+        self.stall_durations = Histogram(STALL_BUCKETS)
+        self.stalls = 0
+        self.last_startup = None
+        self._lock = threading.Lock()
+        self._load_started = None
+        self._load_kind = "fresh"
+        self._stall_started = None
+        player.watch('time-pos', self._on_time_pos)
+        player.watch('paused-for-cache', self._on_paused_for_cache)
+
+    def load_started(self, kind="fresh"):
+        """
+        Call when a stream (re)load begins; the next frame closes the startup
+        timer. kind: "fresh", "resume" (opened at a saved offset), "zap"
+        (channel change) or "refresh" (reload of the playing stream).
+        """
+        with self._lock:
+            self._load_started = time.perf_counter()
+            self._load_kind = kind
+            self._stall_started = None
+
+    def _on_time_pos(self, name, value):
+        # Called for every frame, so bail out early
+        if value is None or self._load_started is None:
+            return
+        with self._lock:
+            if self._load_started is None:
+                return
+            self.last_startup = time.perf_counter() - self._load_started
+            self._load_started = None
+            histogram = self.startup[self._load_kind]
+        histogram.observe(self.last_startup)
+
+    def _on_paused_for_cache(self, name, value):
+        now = time.perf_counter()
+        with self._lock:
+            if self._load_started is not None:
+                return  # initial buffering counts as startup, not a stall
+            if value and self._stall_started is None:
+                self._stall_started = now
+                self.stalls += 1
+                return
+            if not value and self._stall_started is not None:
+                duration = now - self._stall_started
+                self._stall_started = None
+            else:
+                return
+        self.stall_durations.observe(duration)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        try:
+            body = self.server.exporter.render().encode('utf-8')
+        except Exception as e:
+            print(f"Metrics render error: {e}")
+            self.send_error(500)
+            return
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class MetricsExporter:
+    """
+    gauges: extra {name: (help, callable)} evaluated per scrape on the server
+    thread (e.g. the pause-refresh countdown). Callables must only read state.
+    """
+    PREFIX = "m3u8_player"
+
+    def __init__(self, player, telemetry, proxy=None, host="127.0.0.1", port=9464, gauges=None):
+        self.player = player
+        self.telemetry = telemetry
+        self.proxy = proxy
+        self.gauges = dict(gauges or {})
+        self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.exporter = self
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        try:
+            self.server.shutdown()
+            self.server.server_close()
+        except Exception:
+            pass
+
+    def _metric(self, out, name, kind, help_text, value, labels=""):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return
+        full = f"{self.PREFIX}_{name}"
+        out.append(f"# HELP {full} {help_text}")
+        out.append(f"# TYPE {full} {kind}")
+        out.append(f"{full}{labels} {float(value)}")
+
+    def render(self):
+        p = self.player
+        out = []
+        cs = p.get_state('demuxer-cache-state') or {}
+        fw = cs.get('fw-bytes')
+        total = cs.get('total-bytes')
+        pos = p.get_state('time-pos')
+        buf = p.get_state('demuxer-cache-time')
+
+        self._metric(out, "cache_forward_bytes", "gauge", "Demuxer cache ahead of the playback position.", fw)
+        self._metric(out, "cache_back_bytes", "gauge", "Demuxer cache behind the playback position.",
+                     max(0, total - fw) if total is not None and fw is not None else None)
+        self._metric(out, "buffered_seconds", "gauge", "Seconds buffered ahead of the playback position.",
+                     cs.get('cache-duration', (buf - pos) if buf is not None and pos is not None else None))
+        self._metric(out, "input_rate_bytes_per_second", "gauge", "Raw network input rate reported by mpv.",
+                     cs.get('raw-input-rate'))
+        self._metric(out, "playing", "gauge", "1 while a stream is playing and not paused.",
+                     1 if pos is not None and not p.get_state('pause') else 0)
+        self._metric(out, "dropped_frames_total", "counter", "Frames dropped by the video output.",
+                     p.get_state('frame-drop-count'))
+
+        t = self.telemetry
+        self._metric(out, "stalls_total", "counter", "Rebuffering stalls after playback started.", t.stalls)
+        full = f"{self.PREFIX}_stall_duration_seconds"
+        out += [f"# HELP {full} Duration of rebuffering stalls.", f"# TYPE {full} histogram"]
+        out += t.stall_durations.render(full)
+        full = f"{self.PREFIX}_startup_seconds"
+        out += [f"# HELP {full} Time from stream load to first frame: fresh starts, resumed offsets, channel changes.",
+                f"# TYPE {full} histogram"]
+        for kind, histogram in t.startup.items():
+            out += histogram.render(full, f'kind="{kind}"')
+
+        if self.proxy:
+            st = self.proxy.cache.stats()
+            self._metric(out, "proxy_cache_hit_ratio", "gauge", "Segment cache hit ratio of the local proxy.",
+                         st['hit_ratio'])
+            self._metric(out, "proxy_bytes_saved_total", "counter", "Origin bytes served from the proxy cache.",
+                         st['bytes_saved'])
+            self._metric(out, "proxy_prefetch_hits_total", "counter",
+                         "Prefetched segments read for the first time (not counted as cache hits).",
+                         st['prefetch_hits'])
+
+        for name, (help_text, fn) in self.gauges.items():
+            try:
+                self._metric(out, name, "gauge", help_text, fn())
+            except Exception:
+                pass
+        return "\n".join(out) + "\n"
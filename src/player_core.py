@@ -1,45 +1,116 @@
 import os
 import sys
+import json
+import threading
 from .config import MPV_PATHS
 
 # -------------------------------------------------
-#  Setup PATH for libmpv before importing mpv
+#  Lazy libmpv discovery & import
 # -------------------------------------------------
-dll_found = False
-for p in MPV_PATHS:
-    dll = os.path.join(p, "libmpv-2.dll")
-    if os.path.exists(dll):
-        os.environ["PATH"] = p + os.pathsep + os.environ.get("PATH", "")
-        dll_found = True
-        break
+#  Nothing is probed at import time. load_mpv() finds libmpv (using the
+#  cached location from the last launch if the DLL is unchanged), puts it
+#  on PATH and imports python-mpv. The GUI calls it from a background thread.
+LIBMPV_NAME = "libmpv-2.dll"
+LIBMPV_CACHE_FILE = "libmpv_cache.json"
 
-if not dll_found:
-    print("Warning: libmpv-2.dll not found in expected paths. 'import mpv' might fail.")
+mpv = None
+_mpv_lock = threading.Lock()
 
-import mpv
+def _read_libmpv_cache():
+    try:
+        with open(LIBMPV_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return None
+
+def _write_libmpv_cache(path, mtime):
+    try:
+        with open(LIBMPV_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"path": path, "mtime": mtime}, f)
+    except Exception as e:
+        print(f"Error saving libmpv cache: {e}")
+
+def find_libmpv_dir():
+    """Return the folder containing libmpv, or None."""
+    cached = _read_libmpv_cache()
+    if cached:
+        # Cache is valid while the same DLL (path + mtime) is still there
+        try:
+            if os.path.getmtime(os.path.join(cached['path'], LIBMPV_NAME)) == cached['mtime']:
+                return cached['path']
+        except (OSError, KeyError, TypeError):
+            pass
+
+    for p in MPV_PATHS:
+        dll = os.path.join(p, LIBMPV_NAME)
+        if os.path.exists(dll):
+            _write_libmpv_cache(p, os.path.getmtime(dll))
+            return p
+    return None
+
+def load_mpv():
+    """Import python-mpv once, with libmpv on PATH. Thread-safe."""
+    global mpv
+    if mpv is not None:
+        return mpv
+    with _mpv_lock:
+        if mpv is None:
+            dll_dir = find_libmpv_dir()
+            if dll_dir:
+                os.environ["PATH"] = dll_dir + os.pathsep + os.environ.get("PATH", "")
+            elif os.name == 'nt':
+                print(f"Warning: {LIBMPV_NAME} not found in expected paths. 'import mpv' might fail.")
+            import mpv as mpv_module
+            mpv = mpv_module
+    return mpv
 
 class MpvPlayer:
-    def __init__(self, wid=None):
+    def __init__(self, wid=None, **mpv_options):
         self.mpv = None
         self.wid = wid
+        self.mpv_options = mpv_options # Extra / overriding MPV() options (e.g. vo='null')
+        self.proxy = None # Optional HlsProxy, set by the GUI
+
+        # Property subscriptions (see subscribe)
+        self.state = {}             # latest value of every observed property
+        self._state_lock = threading.Lock()
+        self._dirty = set()         # properties changed since the last dispatch
+        self._subscribers = []      # (frozenset(names), callback)
+        self._watchers = {}         # name -> [callback(name, value)] on the event thread
+        self._observed = set()
+        self._dispatcher = None
+        self._dispatch_pending = False
+
         self._init_mpv()
         
     def _init_mpv(self):
         try:
-            self.mpv = mpv.MPV(
-                wid=str(self.wid) if self.wid else None,
+            options = dict(
                 input_default_bindings=True,
                 input_vo_keyboard=True,
                 osc=True,
                 keep_open=True,
                 cache='yes' # Explicitly enable caching
             )
+            if self.wid:
+                options['wid'] = str(self.wid)
+            options.update(self.mpv_options)
+            self.mpv = load_mpv().MPV(**options)
         except Exception as e:
             raise RuntimeError(f"Failed to initialize MPV: {e}")
 
-    def play(self, url, headers=None, user_agent=None):
+    def play(self, url, headers=None, user_agent=None, hls_bitrate=None, use_proxy=True, start=None):
+        """Open url (replacing the current file). start: position in seconds to open at."""
         if not self.mpv: return
         
+        # Route HLS through the local caching proxy, which injects the headers itself
+        if self.proxy and use_proxy:
+            proxy_headers = dict(headers or {})
+            if user_agent:
+                proxy_headers['User-Agent'] = user_agent
+            self.proxy.set_headers(proxy_headers)
+            url = self.proxy.wrap(url)
+        
         options = {}
         if user_agent:
             options['user_agent'] = user_agent
@@ -47,12 +118,129 @@ class MpvPlayer:
             # Format headers as "Key: Value,Key2: Value2"
             header_str = ",".join([f"{k}: {v}" for k, v in headers.items()])
             options['http_header_fields'] = header_str
+        # Starting HLS variant (bits/s), "max" is mpv's default
+        options['hls_bitrate'] = str(hls_bitrate) if hls_bitrate else "max"
             
         # Apply options
         for k, v in options.items():
             setattr(self.mpv, k, v)
             
-        self.mpv.play(url)
+        if start:
+            self._loadfile(url, start=f"{float(start):.3f}")
+        else:
+            self.mpv.play(url)
+
+    def _loadfile(self, url, **file_options):
+        """loadfile url replace with per-file options (e.g. start=), old and new mpv syntax."""
+        opts = ",".join(f"{k.replace('_', '-')}={v}" for k, v in file_options.items())
+        try:
+            # mpv >= 0.38: loadfile <url> <flags> <index> <options>
+            self.mpv.command("loadfile", url, "replace", -1, opts)
+        except Exception:
+            self.mpv.command("loadfile", url, "replace", opts)
+
+    def replace_url(self, url, position=None, headers=None, user_agent=None, hls_bitrate=None, use_proxy=True):
+        """
+        Swap the stream URL in place (e.g. a renewed signed URL) and continue at
+        position. No stop() and no demuxer-cache-clear: the switch is a single
+        loadfile ... replace, and segments already in the HLS proxy cache are reused.
+        """
+        self.play(url, headers=headers, user_agent=user_agent, hls_bitrate=hls_bitrate,
+                  use_proxy=use_proxy, start=position)
+
+    # -------------------------------------------------
+    #  Property subscriptions
+    # -------------------------------------------------
+    #  mpv pushes property changes from its event thread. They are stored in
+    #  self.state and coalesced: the dispatcher (set by the GUI) is asked once
+    #  to schedule dispatch_pending() on the UI thread, which then calls each
+    #  subscriber at most once with everything that changed in between.
+    #  time-pos alone changes every video frame, so this turns hundreds of
+    #  events into one UI update per frame, and reads never touch libmpv.
+    def set_dispatcher(self, schedule):
+        """schedule() must arrange for dispatch_pending() to run on the UI thread."""
+        self._dispatcher = schedule
+
+    def subscribe(self, names, callback):
+        """
+        Call callback(state, changed) on the UI thread when any of the mpv
+        properties in names change. state is a snapshot of all observed values.
+        """
+        if isinstance(names, str):
+            names = (names,)
+        self._subscribers.append((frozenset(names), callback))
+        for name in names:
+            self.observe(name)
+
+    def watch(self, names, callback):
+        """
+        Call callback(name, value) directly on the mpv event thread, uncoalesced.
+        For collectors that must not depend on the UI thread (metrics exporter);
+        callbacks have to be cheap and thread-safe.
+        """
+        if isinstance(names, str):
+            names = (names,)
+        for name in names:
+            self._watchers.setdefault(name, []).append(callback)
+            self.observe(name)
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(n, cb) for n, cb in self._subscribers if cb is not callback]
+
+    def get_state(self, name, default=None):
+        """Last observed value of an mpv property (no libmpv round trip)."""
+        with self._state_lock:
+            return self.state.get(name, default)
+
+    def observe(self, name):
+        """Track a property in self.state without a subscriber."""
+        if name in self._observed or not self.mpv:
+            return
+        self._observed.add(name)
+        self.mpv.observe_property(name, self._on_property)
+
+    def _on_property(self, name, value):
+        # mpv event thread
+        for callback in self._watchers.get(name, ()):
+            try:
+                callback(name, value)
+            except Exception as e:
+                print(f"Property watcher error: {e}")
+        with self._state_lock:
+            self.state[name] = value
+            self._dirty.add(name)
+            if self._dispatch_pending or not self._dispatcher:
+                return
+            self._dispatch_pending = True
+        try:
+            self._dispatcher()
+        except Exception:
+            # UI is gone (closing)
+            self._dispatch_pending = False
+
+    def dispatch_pending(self):
+        """Deliver coalesced property changes. Call on the UI thread."""
+        with self._state_lock:
+            changed = self._dirty
+            self._dirty = set()
+            self._dispatch_pending = False
+            snapshot = dict(self.state)
+        if not changed:
+            return
+        for names, callback in list(self._subscribers):
+            if names & changed:
+                try:
+                    callback(snapshot, changed)
+                except Exception as e:
+                    print(f"Property subscriber error: {e}")
+
+    def _read(self, name):
+        """Observed value if subscribed, else a direct property read."""
+        if name in self._observed:
+            return self.get_state(name)
+        if not self.mpv:
+            return None
+        return getattr(self.mpv, name.replace('-', '_'))
 
     def pause(self):
         if self.mpv:
@@ -72,17 +260,47 @@ class MpvPlayer:
         if self.mpv:
             self.mpv.volume = value
 
+    def set_speed(self, value):
+        if self.mpv:
+            self.mpv.speed = value
+
     def get_time_pos(self):
-        return self.mpv.time_pos if self.mpv else None
+        return self._read('time-pos') if self.mpv else None
 
     def get_duration(self):
-        return self.mpv.duration if self.mpv else None
+        return self._read('duration') if self.mpv else None
+
+    def is_paused(self):
+        return bool(self._read('pause')) if self.mpv else False
 
     def set_wid(self, wid):
         if self.mpv:
             self.mpv.wid = str(wid)
 
+    def swap_core(self, other):
+        """
+        Exchange libmpv instances (and the windows they render into) with
+        another MpvPlayer. Subscribers, watchers and the dispatcher stay with
+        each wrapper; property observers move along, so self.state refills
+        from the new instance right away (channel zapping).
+        """
+        for p in (self, other):
+            for name in p._observed:
+                try:
+                    p.mpv.unobserve_property(name, p._on_property)
+                except Exception:
+                    pass
+        self.mpv, other.mpv = other.mpv, self.mpv
+        self.wid, other.wid = other.wid, self.wid
+        for p in (self, other):
+            with p._state_lock:
+                p.state = {}
+            for name in p._observed:
+                # mpv answers with the current value, which repopulates state
+                p.mpv.observe_property(name, p._on_property)
+
     def terminate(self):
+        self._dispatcher = None
         if self.mpv:
             self.mpv.terminate()
 
@@ -109,12 +327,30 @@ class MpvPlayer:
         """Set video track by ID."""
         if self.mpv:
             self.mpv.vid = track_id
+
+    def select_variant(self, bandwidth):
+        """
+        Switch to the HLS variant with the given BANDWIDTH.
+        Uses the matching video track if mpv already opened it, otherwise
+        sets hls-bitrate so the variant is picked on the next (re)load.
+        Returns True if the switch was immediate.
+        """
+        if not self.mpv: return False
+        try:
+            for t in self.mpv.track_list or []:
+                if t.get('type') == 'video' and t.get('hls-bitrate') == bandwidth:
+                    self.mpv.vid = t['id']
+                    return True
+        except Exception:
+            pass
+        self.mpv.hls_bitrate = str(bandwidth)
+        return False
     
     def get_demuxer_cache_state(self):
         """Get demuxer cache state including network speed."""
         if self.mpv:
             try:
-                return self.mpv.demuxer_cache_state
+                return self._read('demuxer-cache-state')
             except:
                 return None
         return None
@@ -124,7 +360,7 @@ class MpvPlayer:
         if self.mpv:
             try:
                 # demuxer-cache-time returns the timestamp of the last buffered packet
-                return self.mpv.demuxer_cache_time
+                return self._read('demuxer-cache-time')
             except:
                 return None
         return None
@@ -138,7 +374,7 @@ class MpvPlayer:
                 return False
         return False
 
-    def apply_cache_settings(self, max_bytes_mb=None, max_back_bytes_mb=None):
+    def apply_cache_settings(self, max_bytes_mb=None, max_back_bytes_mb=None, readahead_secs=None):
         """
         Apply cache tuning settings correctly using confirmed command('set', ...) method.
         Returns True if applied successfully, False if any error occurred.
@@ -150,6 +386,11 @@ class MpvPlayer:
         try:
             # 1. Enable cache explicitly
             self.mpv.command("set", "cache", "yes")
+            # Keep already downloaded ranges across seeks (seekable-ranges)
+            try:
+                self.mpv.command("set", "demuxer-seekable-cache", "yes")
+            except:
+                success = False
 
             # 2. Apply Forward Cache (with validation)
             if max_bytes_mb is not None and max_bytes_mb > 0:
@@ -166,6 +407,13 @@ class MpvPlayer:
                     self.mpv.command("set", "demuxer-max-back-bytes", max_back_bytes)
                 except:
                     success = False
+
+            # 4. Readahead target (Auto cache mode)
+            if readahead_secs is not None and readahead_secs > 0:
+                try:
+                    self.mpv.command("set", "demuxer-readahead-secs", str(int(readahead_secs)))
+                except:
+                    success = False
             
             return success
 
@@ -0,0 +1,232 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------------------------------
+#  Parallel segment prefetcher
+# -------------------------------------------------
+#  Fed with media playlists by the local proxy. When mpv asks for segment i,
+#  segments i+1 .. i+depth are downloaded concurrently into the proxy's
+#  SegmentCache. Concurrency follows from the measured RTT and per-connection
+#  transfer rate: with a single connection each segment costs
+#  rtt + size / bw, so about 1 + rtt * bw / size parallel requests are
+#  needed to keep the link busy. Depth is capped by the forward cache budget.
+
+
+class _Inflight:
+    __slots__ = ('event', 'result')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class SegmentPrefetcher:
+    def __init__(self, cache, fetch, max_workers=8, max_depth=30, forward_budget_bytes=100 * 1024 * 1024):
+        """
+        cache: SegmentCache
+        fetch: callable(url) -> (status, content_type, data, seconds_to_first_byte)
+        """
+        self.cache = cache
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.forward_budget_bytes = forward_budget_bytes
+        self.enabled = True
+
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._playlists = {}        # playlist url -> [segment urls]
+        self._where = {}            # segment url -> (playlist url, index)
+        self._inflight = {}         # cache key -> _Inflight
+        self._queue = []            # segment urls waiting for a worker
+        self._active = 0
+
+        # Measurements (EWMA)
+        self.rtt = None             # seconds to first byte
+        self.bandwidth = None       # bytes/s per connection, after first byte
+        self.avg_segment_bytes = None
+
+        # Stats
+        self.prefetched = 0
+        self.ready = 0              # requests already in cache when mpv asked
+        self.waited = 0             # requests that joined an in-flight download
+        self.errors = 0
+
+    # -------------------------------------------------
+    #  Playlist feed
+    # -------------------------------------------------
+    def set_playlist(self, playlist_url, segment_urls):
+        with self._lock:
+            old = self._playlists.get(playlist_url)
+            if old:
+                for u in old:
+                    self._where.pop(u, None)
+            self._playlists[playlist_url] = list(segment_urls)
+            for i, u in enumerate(segment_urls):
+                self._where[u] = (playlist_url, i)
+
+    def start_at(self, playlist_url, segment_urls, index):
+        """
+        Resume / start=<pos> loads: begin downloading at segment index instead
+        of waiting for the player to walk there from segment 0. The first
+        `concurrency` segments go in flight right away, so a later request
+        for an earlier segment (stream probing) cannot drop them from the queue.
+        """
+        self.set_playlist(playlist_url, segment_urls)
+        if not self.enabled:
+            return
+        with self._lock:
+            wanted = [u for u in segment_urls[index:index + max(1, self.depth)]
+                      if not self.cache.contains(self.cache.key_for(u))]
+            self._queue = wanted + [u for u in self._queue if u not in wanted]
+        self._pump()
+
+    def set_budget(self, forward_budget_bytes):
+        self.forward_budget_bytes = max(0, int(forward_budget_bytes))
+
+    # -------------------------------------------------
+    #  Adaptive parameters
+    # -------------------------------------------------
+    @property
+    def concurrency(self):
+        if self.rtt is None or not self.bandwidth or not self.avg_segment_bytes:
+            return 2
+        n = 1 + self.rtt * self.bandwidth / self.avg_segment_bytes
+        return max(1, min(self.max_workers, math.ceil(n)))
+
+    @property
+    def depth(self):
+        if not self.avg_segment_bytes:
+            return min(self.max_depth, self.concurrency * 2)
+        by_budget = int(self.forward_budget_bytes // self.avg_segment_bytes)
+        return max(0, min(self.max_depth, by_budget))
+
+    def _measure(self, ttfb, total, size):
+        def ewma(old, new, a=0.3):
+            return new if old is None else old + a * (new - old)
+        self.rtt = ewma(self.rtt, ttfb)
+        transfer = max(total - ttfb, 1e-4)
+        self.bandwidth = ewma(self.bandwidth, size / transfer)
+        self.avg_segment_bytes = ewma(self.avg_segment_bytes, size)
+
+    # -------------------------------------------------
+    #  Request path (called from proxy handler threads)
+    # -------------------------------------------------
+    def get(self, url, key):
+        """
+        Return (status, content_type, data) for a segment requested by the
+        player, joining an in-flight prefetch if there is one, and schedule
+        the segments after it.
+        """
+        self._schedule_after(url)
+
+        item = self.cache.get(key)
+        if item is not None:
+            with self._lock:
+                self.ready += 1
+            return 200, item[0], item[1]
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = _Inflight()
+                self._inflight[key] = inflight
+                owner = True
+                # Not needed from the queue anymore
+                if url in self._queue:
+                    self._queue.remove(url)
+            else:
+                owner = False
+                self.waited += 1
+
+        if owner:
+            self._download(url, key, inflight)
+        else:
+            inflight.event.wait()
+            # Joined a prefetch: the data never went through cache.get()
+            self.cache.claim_prefetched(key)
+        return inflight.result
+
+    def _schedule_after(self, url):
+        if not self.enabled:
+            return
+        with self._lock:
+            where = self._where.get(url)
+            if where is None:
+                return
+            playlist_url, index = where
+            segments = self._playlists[playlist_url]
+            wanted = segments[index + 1:index + 1 + self.depth]
+            # Newest request wins: drop queued segments that are not ahead anymore
+            self._queue = [u for u in self._queue if u in wanted]
+            for u in wanted:
+                key = self.cache.key_for(u)
+                if key in self._inflight or u in self._queue:
+                    continue
+                if self.cache.contains(key):
+                    continue
+                self._queue.append(u)
+        self._pump()
+
+    def _pump(self):
+        with self._lock:
+            while self._queue and self._active < self.concurrency:
+                u = self._queue.pop(0)
+                key = self.cache.key_for(u)
+                if key in self._inflight:
+                    continue
+                inflight = _Inflight()
+                self._inflight[key] = inflight
+                self._active += 1
+                self._pool.submit(self._prefetch_task, u, key, inflight)
+
+    def _prefetch_task(self, url, key, inflight):
+        try:
+            self._download(url, key, inflight, prefetched=True)
+            if inflight.result and inflight.result[0] in (200, 206):
+                with self._lock:
+                    self.prefetched += 1
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._pump()
+
+    def _download(self, url, key, inflight, prefetched=False):
+        t0 = time.perf_counter()
+        try:
+            status, ctype, data, ttfb = self.fetch(url)
+            if status in (200, 206):
+                self.cache.put(key, ctype, data, prefetched=prefetched)
+                self._measure(ttfb, time.perf_counter() - t0, len(data))
+            inflight.result = (status, ctype, data)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            inflight.result = (502, 'text/plain', str(e).encode('utf-8'))
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.event.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "concurrency": self.concurrency,
+                "depth": self.depth,
+                "active": self._active,
+                "queued": len(self._queue),
+                "rtt": self.rtt,
+                "bandwidth": self.bandwidth,
+                "prefetched": self.prefetched,
+                "ready": self.ready,
+                "waited": self.waited,
+                "errors": self.errors,
+            }
+
+    def shutdown(self):
+        self.enabled = False
+        with self._lock:
+            self._queue = []
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,68 @@
+from bisect import bisect_right
+
+# -------------------------------------------------
+#  Buffered time ranges
+# -------------------------------------------------
+#  Sorted, merged, disjoint [start, end) intervals in seconds, fed from
+#  demuxer-cache-state's seekable-ranges. Lookups bisect the start list, so
+#  "is t cached?" is O(log n) however fragmented the back-buffer gets.
+
+
+class RangeMap:
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, ranges=()):
+        self.starts = []
+        self.ends = []
+        self.update(ranges)
+
+    def update(self, ranges):
+        """Replace the contents with ranges ((start, end) pairs, any order, may overlap)."""
+        starts = []
+        ends = []
+        for start, end in sorted(r for r in ranges if r[1] > r[0]):
+            if ends and start <= ends[-1]:
+                if end > ends[-1]:
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_cache_state(cls, cache_state):
+        """Build from mpv's demuxer-cache-state dict (None / missing keys -> empty)."""
+        ranges = cache_state.get('seekable-ranges') if isinstance(cache_state, dict) else None
+        return cls((r['start'], r['end']) for r in ranges or ()
+                   if r.get('start') is not None and r.get('end') is not None)
+
+    def range_at(self, t):
+        """(start, end) of the range containing t, or None."""
+        i = bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.ends[i]:
+            return self.starts[i], self.ends[i]
+        return None
+
+    def contains(self, t, margin=0.0):
+        """True if t is cached with at least margin seconds after it."""
+        r = self.range_at(t)
+        return r is not None and r[1] - t >= margin
+
+    def total(self):
+        return sum(e - s for s, e in zip(self.starts, self.ends))
+
+    def percentages(self, duration):
+        """[(start%, end%)] for BufferedScale.set_buffered_ranges."""
+        if not duration:
+            return []
+        return [(s / duration * 100, e / duration * 100) for s, e in zip(self.starts, self.ends)]
+
+    def __iter__(self):
+        return iter(zip(self.starts, self.ends))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __eq__(self, other):
+        return isinstance(other, RangeMap) and self.starts == other.starts and self.ends == other.ends
@@ -0,0 +1,148 @@
+import threading
+import time
+
+from .hls_parser import parse_playlist, choose_start_variant
+from .http_client import get_client
+from .utils import extract_expiration
+
+# -------------------------------------------------
+#  Resume after a long pause
+# -------------------------------------------------
+#  Instead of always reloading once a pause passes the refresh threshold,
+#  the GUI asks ResumePlanner during the pause whether the stream is still
+#  good: URL token not about to expire, playlist unchanged (conditional GET
+#  through the shared client) or still a complete VOD playlist. Only if not,
+#  the plan is "reload" and, when the local proxy is running, the playlist
+#  and the segments at the resume position are pulled into its cache so the
+#  reload starts from local data.
+
+EXPIRY_MARGIN = 60          # seconds; reload if the token expires sooner
+PREFETCH_SEGMENTS = 3       # segments pulled at the resume position
+
+
+class ResumePlan:
+    __slots__ = ('action', 'reason', 'checked_at', 'prefetched', 'is_live')
+
+    def __init__(self, action, reason, prefetched=0, is_live=False):
+        self.action = action            # "resume" or "reload"
+        self.reason = reason
+        self.checked_at = time.time()
+        self.prefetched = prefetched    # segments now in the proxy cache
+        self.is_live = is_live          # reload at the live edge, not the paused position
+
+    def age(self):
+        return time.time() - self.checked_at
+
+
+class ResumePlanner:
+    def __init__(self, client=None, proxy=None):
+        self.client = client or get_client()
+        self.proxy = proxy
+        self._validators = {}       # url -> conditional request headers
+        self._live = {}             # url -> is_live from the last full answer
+        self._lock = threading.Lock()
+
+    def _conditional_get(self, client, url):
+        """GET with If-None-Match / If-Modified-Since from the previous answer."""
+        with self._lock:
+            headers = dict(self._validators.get(url, {}))
+        r = client.get(url, headers=headers)
+        if r.status == 200:
+            validators = {}
+            if r.headers.get('ETag'):
+                validators['If-None-Match'] = r.headers['ETag']
+            if r.headers.get('Last-Modified'):
+                validators['If-Modified-Since'] = r.headers['Last-Modified']
+            with self._lock:
+                self._validators[url] = validators
+        return r
+
+    def _media_playlist(self, client, response, bandwidth):
+        """(media url, MediaPlaylist) for a playlist response; raises ValueError if not HLS."""
+        playlist = parse_playlist(response.text, response.url)
+        if not playlist.is_master:
+            return response.url, playlist
+        variant = choose_start_variant(playlist.sorted_variants(), bandwidth)
+        if variant is None:
+            raise ValueError("master playlist without variants")
+        media = client.get(variant.uri)
+        if media.status >= 400:
+            raise RuntimeError(f"variant HTTP {media.status}")
+        return media.url, parse_playlist(media.text, media.url)
+
+    def plan(self, url, position=None, bandwidth=None, client=None):
+        """
+        Decide how to resume url at position (seconds). Blocking, run it off the UI thread.
+        client: e.g. HttpClient.with_headers() carrying the stream's Referer / User-Agent.
+        """
+        client = client or self.client
+        expiry = extract_expiration(url)
+        if expiry and expiry - time.time() < EXPIRY_MARGIN:
+            prefetched = self.prepare_reload(url, position, bandwidth, client)
+            return ResumePlan("reload", "token expiring", prefetched=prefetched,
+                              is_live=bool(self._live.get(url)))
+
+        try:
+            r = self._conditional_get(client, url)
+            if r.status == 304:
+                if self._live.get(url) is False:
+                    return ResumePlan("resume", "playlist unchanged")
+                # A live master can be unchanged while its media playlist moved on
+                r = client.get(url)
+        except Exception as e:
+            return ResumePlan("reload", f"revalidation failed: {e}", is_live=bool(self._live.get(url)))
+        if r.status >= 400:
+            return ResumePlan("reload", f"HTTP {r.status}", is_live=bool(self._live.get(url)))
+
+        try:
+            media_url, playlist = self._media_playlist(client, r, bandwidth)
+        except ValueError:
+            # Not a playlist (progressive file): nothing is lost by resuming
+            return ResumePlan("resume", "not HLS")
+        except Exception as e:
+            return ResumePlan("reload", f"revalidation failed: {e}", is_live=bool(self._live.get(url)))
+        self._live[url] = playlist.is_live
+
+        if not playlist.is_live:
+            return ResumePlan("resume", "VOD playlist valid")
+
+        # Live: the window moved on during the pause, reload at the live edge
+        return ResumePlan("reload", "live window moved",
+                          prefetched=self._prefetch(media_url, playlist, None), is_live=True)
+
+    def prepare_reload(self, url, position=None, bandwidth=None, client=None):
+        """Warm the proxy cache for a reload at position (VOD) or the live edge."""
+        if not self.proxy:
+            return 0
+        client = client or self.client
+        try:
+            media_url, playlist = self._media_playlist(client, client.get(url), bandwidth)
+        except Exception:
+            return 0
+        self._live[url] = playlist.is_live
+        return self._prefetch(media_url, playlist, None if playlist.is_live else position)
+
+    def _prefetch(self, media_url, playlist, position):
+        """Pull the media playlist and PREFETCH_SEGMENTS segments into the proxy cache."""
+        if not self.proxy or not playlist.segments:
+            return 0
+        if position is None:
+            # mpv starts live streams about three segments from the end
+            first = max(0, len(playlist.segments) - PREFETCH_SEGMENTS)
+        else:
+            first = playlist.segment_index_at(position)
+            if first is None:
+                return 0
+        done = 0
+        try:
+            # Through the proxy so its prefetcher learns the playlist too
+            self.proxy.fetch_playlist(media_url)
+            for seg in playlist.segments[first:first + PREFETCH_SEGMENTS]:
+                if seg.byterange is not None:
+                    continue
+                status, _, _ = self.proxy.fetch_segment(seg.uri)
+                if status == 200:
+                    done += 1
+        except Exception as e:
+            print(f"Resume prefetch error: {e}")
+        return done
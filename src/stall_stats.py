@@ -0,0 +1,317 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# -------------------------------------------------
+#  Stall (rebuffering) analytics
+# -------------------------------------------------
+#  StallAnalytics watches paused-for-cache and pause on mpv's event thread
+#  (MpvPlayer.watch, like PlayerTelemetry). Every rebuffer is timestamped and
+#  tagged with the network rate, forward cache bytes, variant and position at
+#  its start. The variant is the hls-bitrate of the video track mpv has
+#  selected, taken from track-list as it changes. A session runs from one load to the next; watch time counts
+#  from the first frame and excludes user pauses, so
+#      rebuffer ratio = stall time / watch time.
+#  Buffering the GUI caused itself (seeks, DVR snapshot reopens, latency
+#  skips) is announced with expect_buffering() and kept apart as seek waits,
+#  so it does not count towards the rebuffer ratio or the stall durations.
+#  Finished sessions are folded into per-URL aggregates kept in
+#  stall_stats.json next to history.json (recent durations for the p95, the
+#  last few events), bounded like the history itself.
+
+STALL_FILE = "stall_stats.json"
+KEEP_DURATIONS = 200    # per URL, for mean / p95
+KEEP_EVENTS = 20        # per URL, newest last
+MIN_STALL = 0.05        # shorter paused-for-cache blips are ignored
+EXPECT_WINDOW = 5.0     # buffering starting this soon after expect_buffering() is a seek wait
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def summarize(durations, watch_time, stall_time, stalls):
+    """Aggregate dict: stalls, stall_time, watch_time, ratio, mean, p95."""
+    return {
+        "stalls": stalls,
+        "stall_time": stall_time,
+        "watch_time": watch_time,
+        "ratio": stall_time / watch_time if watch_time > 0 else 0.0,
+        "mean": sum(durations) / len(durations) if durations else None,
+        "p95": percentile(durations, 0.95),
+    }
+
+
+class StallEvent:
+    __slots__ = ('start', 'end', 'position', 'network_rate', 'cache_bytes', 'variant', 'expected')
+
+    def __init__(self, start, position=None, network_rate=None, cache_bytes=None, variant=None, expected=False):
+        self.start = start              # time.time()
+        self.end = None
+        self.position = position        # time-pos when it started
+        self.network_rate = network_rate  # raw-input-rate, bytes/s
+        self.cache_bytes = cache_bytes  # forward cache (fw-bytes)
+        self.variant = variant          # label of the playing variant
+        self.expected = expected        # seek wait, not a stall
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    def to_dict(self):
+        return {
+            "start": datetime.fromtimestamp(self.start).isoformat(timespec='seconds'),
+            "duration": round(self.duration, 3),
+            "position": round(self.position, 1) if self.position is not None else None,
+            "network_rate": self.network_rate,
+            "cache_bytes": self.cache_bytes,
+            "variant": self.variant,
+        }
+
+
+class StallAnalytics:
+    """
+    variant_of: optional callable(hls_bitrate) returning a label for the
+    playing variant (None: "<bitrate> Mbps" / "<height>p"); called on mpv's
+    event thread, so it must not touch Tk widgets.
+    """
+
+    def __init__(self, player, path=STALL_FILE, max_urls=50, variant_of=None):
+        self.player = player
+        self.path = path
+        self.max_urls = max_urls
+        self.variant_of = variant_of
+        self._lock = threading.Lock()
+        self._urls = None           # url -> aggregate dict, loaded lazily
+        self.url = None
+        self.events = []            # this session's stalls
+        self._open = None           # StallEvent in progress
+        self._waiting_first_frame = False
+        self._active_since = None   # playing (not paused) since
+        self._watch_time = 0.0
+        self._track = None          # (hls-bitrate, height) of the selected video track
+        self.seek_waits = []        # this session's seek wait durations
+        self._expect_until = 0.0    # buffering starting before this is a seek wait
+        player.watch('track-list', self._on_track_list)
+        player.watch('time-pos', self._on_time_pos)
+        player.watch('paused-for-cache', self._on_paused_for_cache)
+        player.watch('pause', self._on_pause)
+
+    # --- session ---
+
+    def begin(self, url):
+        """New load: closes the previous session. Buffering before the first frame is startup."""
+        self.finish()
+        with self._lock:
+            self.url = url
+            self.events = []
+            self.seek_waits = []
+            self._expect_until = 0.0
+            self._open = None
+            self._watch_time = 0.0
+            self._active_since = None
+            self._waiting_first_frame = True
+
+    def finish(self):
+        """Close the session and persist it into the per-URL aggregates."""
+        now = time.time()
+        with self._lock:
+            if self.url is None:
+                return
+            self._close_stall(now)
+            if self._active_since is not None:
+                self._watch_time += now - self._active_since
+                self._active_since = None
+            url, events, waits, watch = self.url, self.events, self.seek_waits, self._watch_time
+            self.url = None
+            self._waiting_first_frame = False
+        if watch > 0 or events or waits:
+            self._merge(url, events, watch, waits)
+
+    def expect_buffering(self, window=EXPECT_WINDOW):
+        """
+        GUI: a seek or reopen is starting. Buffering that begins within window
+        seconds (or is going on now) is recorded as a seek wait.
+        """
+        now = time.time()
+        with self._lock:
+            if self.url is None:
+                return
+            self._expect_until = now + window
+            if self._open is not None and not self._open.expected:
+                # The user seeks out of a stall: the stall ends here, the rest is the seek's wait
+                stall = self._open
+                self._close_stall(now)
+                self._open = StallEvent(now, stall.position, stall.network_rate, stall.cache_bytes,
+                                        stall.variant, expected=True)
+
+    def rename(self, old_url, new_url):
+        """A renewed link of the same stream: the session and the stored aggregates follow it."""
+        with self._lock:
+            if self.url == old_url:
+                self.url = new_url
+        urls = self._load()
+        entry = urls.pop(old_url, None)
+        if entry is None:
+            return
+        entry['url'] = new_url
+        urls.pop(new_url, None)
+        urls[new_url] = entry
+        self._save()
+
+    # --- mpv event thread ---
+
+    def _on_track_list(self, name, value):
+        track = None
+        for t in value or ():
+            if isinstance(t, dict) and t.get('type') == 'video' and t.get('selected'):
+                track = (t.get('hls-bitrate'), t.get('demux-h'))
+                break
+        self._track = track
+
+    def _playing_variant(self):
+        if self._track is None:
+            return None
+        bitrate, height = self._track
+        label = None
+        if self.variant_of and bitrate:
+            try:
+                label = self.variant_of(bitrate)
+            except Exception:
+                pass
+        if label:
+            return label
+        if bitrate:
+            return f"{bitrate / 1e6:.2f} Mbps"
+        return f"{height}p" if height else None
+
+    def _on_time_pos(self, name, value):
+        if value is None or not self._waiting_first_frame:
+            return
+        with self._lock:
+            if self._waiting_first_frame and self.url is not None:
+                self._waiting_first_frame = False
+                if not self.player.get_state('pause'):
+                    self._active_since = time.time()
+
+    def _on_paused_for_cache(self, name, value):
+        now = time.time()
+        with self._lock:
+            if self.url is None or self._waiting_first_frame:
+                return
+            if value and self._open is None and self._active_since is not None:
+                cache = self.player.get_state('demuxer-cache-state')
+                cache = cache if isinstance(cache, dict) else {}
+                self._open = StallEvent(now, self.player.get_state('time-pos'),
+                                        cache.get('raw-input-rate'), cache.get('fw-bytes'), self._playing_variant(),
+                                        expected=now <= self._expect_until)
+            elif not value:
+                self._close_stall(now)
+
+    def _on_pause(self, name, value):
+        now = time.time()
+        with self._lock:
+            if self.url is None or self._waiting_first_frame:
+                return
+            if value:
+                # A user pause ends the stall and stops the watch clock
+                self._close_stall(now)
+                if self._active_since is not None:
+                    self._watch_time += now - self._active_since
+                    self._active_since = None
+            elif self._active_since is None:
+                self._active_since = now
+
+    def _close_stall(self, now):
+        if self._open is None:
+            return
+        self._open.end = now
+        if self._open.expected:
+            self._expect_until = 0.0    # one wait per announced seek
+            if self._open.duration >= MIN_STALL:
+                self.seek_waits.append(self._open.duration)
+        elif self._open.duration >= MIN_STALL:
+            self.events.append(self._open)
+        self._open = None
+
+    # --- aggregates ---
+
+    def session_summary(self):
+        with self._lock:
+            durations = [e.duration for e in self.events]
+            waits = list(self.seek_waits)
+            if self._open is not None:
+                (waits if self._open.expected else durations).append(self._open.duration)
+            watch = self._watch_time
+            if self._active_since is not None:
+                watch += time.time() - self._active_since
+        summary = summarize(durations, watch, sum(durations), len(durations))
+        summary['seek_waits'] = len(waits)
+        summary['seek_wait_time'] = sum(waits)
+        return summary
+
+    def current_stall(self):
+        """Seconds the ongoing stall has lasted, or None (also during a seek wait)."""
+        with self._lock:
+            return self._open.duration if self._open is not None and not self._open.expected else None
+
+    def url_summary(self, url):
+        """Aggregate over all finished sessions of url (None if never seen)."""
+        entry = self._load().get(url)
+        if not entry:
+            return None
+        summary = summarize(entry['durations'], entry['watch_time'], entry['stall_time'], entry['stalls'])
+        summary['sessions'] = entry['sessions']
+        summary['seek_waits'] = entry.get('seek_waits', 0)
+        summary['seek_wait_time'] = entry.get('seek_wait_time', 0.0)
+        return summary
+
+    def recent_events(self, url, count=5):
+        """Newest stalls of url: this session's first, then stored ones."""
+        with self._lock:
+            events = [e.to_dict() for e in self.events] if url == self.url else []
+        stored = (self._load().get(url) or {}).get('events', [])
+        return (stored + events)[-count:]
+
+    def _load(self):
+        if self._urls is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._urls = {e['url']: e for e in data if isinstance(e, dict) and 'url' in e}
+            except (OSError, ValueError):
+                self._urls = {}
+        return self._urls
+
+    def _merge(self, url, events, watch_time, seek_waits=()):
+        urls = self._load()
+        entry = urls.pop(url, None) or {"url": url, "sessions": 0, "watch_time": 0.0,
+                                        "stall_time": 0.0, "stalls": 0, "durations": [], "events": []}
+        durations = [e.duration for e in events]
+        entry['sessions'] += 1
+        entry['watch_time'] += watch_time
+        entry['stall_time'] += sum(durations)
+        entry['stalls'] += len(durations)
+        entry['seek_waits'] = entry.get('seek_waits', 0) + len(seek_waits)
+        entry['seek_wait_time'] = entry.get('seek_wait_time', 0.0) + sum(seek_waits)
+        entry['durations'] = (entry['durations'] + [round(d, 3) for d in durations])[-KEEP_DURATIONS:]
+        entry['events'] = (entry['events'] + [e.to_dict() for e in events])[-KEEP_EVENTS:]
+        entry['last_seen'] = datetime.now().isoformat(timespec='seconds')
+        urls[url] = entry       # most recent last
+        while self.max_urls and len(urls) > self.max_urls:
+            urls.pop(next(iter(urls)))
+        self._save()
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(list(self._urls.values()), f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error saving stall stats: {e}")
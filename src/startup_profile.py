@@ -0,0 +1,44 @@
+import time
+
+# -------------------------------------------------
+#  Startup profiling (main.py --profile-startup)
+# -------------------------------------------------
+#  Phases are always recorded (two perf_counter calls each), the report is
+#  only printed when enabled. Phases may overlap: background imports run
+#  while Tk builds the window.
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.enabled = False
+        self.phases = []    # (name, start, end) relative to t0
+        self._open = {}
+        self._reported = False
+
+    def start(self, name):
+        self._open[name] = time.perf_counter()
+
+    def end(self, name):
+        started = self._open.pop(name, None)
+        if started is not None:
+            self.phases.append((name, started - self.t0, time.perf_counter() - self.t0))
+
+    def mark(self, name):
+        """Zero-length event (e.g. first paint)."""
+        now = time.perf_counter() - self.t0
+        self.phases.append((name, now, now))
+
+    def report(self):
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        print("\nStartup profile (ms since process start)")
+        print(f"  {'phase':<28} {'start':>8} {'end':>8} {'duration':>9}")
+        for name, start, end in sorted(self.phases, key=lambda p: p[1]):
+            print(f"  {name:<28} {start * 1000:>8.1f} {end * 1000:>8.1f} {(end - start) * 1000:>9.1f}")
+        total = max(end for _, _, end in self.phases) if self.phases else 0
+        print(f"  {'total':<28} {'':>8} {total * 1000:>8.1f}")
+
+
+profiler = StartupProfiler()
@@ -0,0 +1,194 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+# -------------------------------------------------
+#  Background task executor
+# -------------------------------------------------
+#  A few long-lived worker threads instead of one thread per click. Jobs are
+#  tagged with a key ("load", "resume-check", ...) and a generation: submitting
+#  a new job under a key cancels the previous one. A cancelled job has its open
+#  HTTP responses closed (Job.bind), fails its next check() and has queued UI
+#  callbacks dropped. UI callbacks go through one queue that the GUI drains
+#  once per frame (set_dispatcher / drain), like MpvPlayer.dispatch_pending.
+
+
+class CancelledError(Exception):
+    """Raised inside a job that was superseded or cancelled."""
+
+
+class Job:
+    __slots__ = ('key', 'generation', 'fn', 'args', '_cancelled', '_closers', '_lock', '_guard')
+
+    def __init__(self, key, generation, fn, args, guard):
+        self.key = key
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self._cancelled = threading.Event()
+        self._closers = []
+        self._lock = threading.Lock()
+        self._guard = guard     # per-key lock around side effects
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            closers, self._closers = self._closers, []
+        for close in closers:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def check(self):
+        """Raise CancelledError if the job was superseded."""
+        if self._cancelled.is_set():
+            raise CancelledError(self.key)
+
+    def bind(self, resource):
+        """Close resource (anything with close()) as soon as the job is cancelled."""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._closers.append(resource.close)
+                return resource
+        resource.close()
+        raise CancelledError(self.key)
+
+    def unbind(self, resource):
+        with self._lock:
+            try:
+                self._closers.remove(resource.close)
+            except ValueError:
+                pass
+
+    @contextmanager
+    def guard(self):
+        """
+        Side effects (touching the player) go in here. Runs after the previous
+        job of the same key left its guard, and only if this job is still current.
+        """
+        with self._guard:
+            self.check()
+            yield
+
+
+class TaskExecutor:
+    def __init__(self, workers=2, name="task"):
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._current = {}          # key -> latest Job
+        self._guards = {}           # key -> threading.Lock
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self._dispatch_pending = False
+        self._closed = False
+        self._threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def set_dispatcher(self, schedule):
+        """schedule() must arrange for drain() to run on the UI thread."""
+        self._dispatcher = schedule
+
+    def submit(self, key, fn, *args):
+        """
+        Run fn(job, *args) on a worker. Cancels the previous job with the same
+        key and returns the new Job.
+        """
+        with self._lock:
+            self._generation += 1
+            guard = self._guards.setdefault(key, threading.Lock())
+            job = Job(key, self._generation, fn, args, guard)
+            previous = self._current.get(key)
+            self._current[key] = job
+        if previous:
+            previous.cancel()
+        self._jobs.put(job)
+        return job
+
+    def cancel(self, key):
+        with self._lock:
+            job = self._current.pop(key, None)
+        if job:
+            job.cancel()
+
+    def is_current(self, job):
+        with self._lock:
+            return self._current.get(job.key) is job and not job.cancelled
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if job.cancelled:
+                continue
+            try:
+                job.fn(job, *job.args)
+            except CancelledError:
+                pass
+            except Exception as e:
+                if not job.cancelled:
+                    print(f"Task '{job.key}' error: {e}")
+            finally:
+                with self._lock:
+                    if self._current.get(job.key) is job:
+                        del self._current[job.key]
+
+    # --- UI marshalling ---
+
+    def post(self, job, fn, *args):
+        """Queue fn(*args) for the UI thread; dropped if job is superseded by then."""
+        self._results.put((job, fn, args))
+        self._request_dispatch()
+
+    def call_soon(self, fn, *args):
+        """Queue fn(*args) for the UI thread, not tied to a job."""
+        self.post(None, fn, *args)
+
+    def _request_dispatch(self):
+        with self._lock:
+            if self._dispatch_pending or not self._dispatcher or self._closed:
+                return
+            self._dispatch_pending = True
+        try:
+            self._dispatcher()
+        except Exception:
+            # UI is gone (closing)
+            self._dispatch_pending = False
+
+    def drain(self):
+        """Run queued UI callbacks. Call on the UI thread."""
+        with self._lock:
+            self._dispatch_pending = False
+        while True:
+            try:
+                job, fn, args = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None and job.cancelled:
+                continue
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"UI callback error: {e}")
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            jobs = list(self._current.values())
+            self._current.clear()
+            self._dispatcher = None
+        for job in jobs:
+            job.cancel()
+        for _ in self._threads:
+            self._jobs.put(None)
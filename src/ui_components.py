@@ -212,8 +212,6 @@ class PrimaryButton(RoundedButton):
                         bg=bg_normal, fg=fg, hover_bg=bg_hover, active_bg=bg_active,
                         width=120, height=32, corner_radius=16, **kwargs)
 
-from .utils import extract_expiration, get_remaining_time
-
 from .utils import extract_expiration, get_remaining_time, get_status_color
 import tkinter.ttk as ttk
 
@@ -259,6 +257,144 @@ class ScrollableFrame(tk.Frame):
         elif event.num == 4 or event.delta > 0:
             self.canvas.yview_scroll(-1, "units")
 
+class VirtualScrollableFrame(ScrollableFrame):
+    """
+    ScrollableFrame that only keeps widgets for the rows in view.
+    Rows come from a fixed pool and are re-bound to new items as the list
+    scrolls; item i always lives in pool slot i % len(pool), so scrolling by
+    one row only re-binds one widget.
+
+    The inner frame never grows past the viewport (X11/Win32 windows are
+    limited to ~32k px), rows are placed relative to the scroll offset and
+    the scrollbar is driven from the item count. Items are pulled a page at
+    a time from fetch(offset, limit), so the full list is never loaded.
+    """
+    PAGE_ROWS = 64
+
+    def __init__(self, container, row_height, create_row, bind_row, *args, **kwargs):
+        self.row_height = row_height
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.count = 0
+        self.fetch = lambda offset, limit: []
+        self.offset = 0
+        self.pool = []
+        self._page_start = 0
+        self._page = []
+        super().__init__(container, *args, **kwargs)
+        self.canvas.configure(yscrollcommand="")
+        self.scrollbar.configure(command=self.yview)
+
+    def on_canvas_configure(self, event):
+        super().on_canvas_configure(event)
+        self.canvas.itemconfig("frame", height=event.height)
+        self._scroll_to(self.offset)
+
+    def _on_mousewheel(self, event):
+        if event.num == 5 or event.delta < 0:
+            self.yview("scroll", 1, "units")
+        elif event.num == 4 or event.delta > 0:
+            self.yview("scroll", -1, "units")
+
+    def _view_height(self):
+        return max(self.canvas.winfo_height(), self.row_height)
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"|"pages")."""
+        if not args:
+            return
+        total = self.count * self.row_height
+        if args[0] == "moveto":
+            offset = float(args[1]) * total
+        elif args[0] == "scroll":
+            step = self._view_height() if args[2] == "pages" else self.row_height
+            offset = self.offset + int(args[1]) * step
+        else:
+            return
+        self._scroll_to(offset)
+
+    def _scroll_to(self, offset):
+        total = self.count * self.row_height
+        view_h = self._view_height()
+        self.offset = int(max(0, min(offset, total - view_h)))
+        if total > 0:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + view_h) / total))
+        else:
+            self.scrollbar.set(0, 1)
+        self.render()
+
+    def set_source(self, count, fetch):
+        """Show count items, loaded on demand with fetch(offset, limit)."""
+        self.count = count
+        self.fetch = fetch
+        self._page_start, self._page = 0, []
+        # Invalidate bindings, the data behind every index may have changed
+        for row in self.pool:
+            row.vindex = None
+        self._scroll_to(self.offset)
+
+    def set_items(self, items):
+        self.set_source(len(items), lambda offset, limit: items[offset:offset + limit])
+
+    def item_at(self, index):
+        end = self._page_start + len(self._page)
+        if not (self._page_start <= index < end):
+            limit = max(self.PAGE_ROWS, 2 * len(self.pool))
+            start = max(0, index - limit // 4)
+            self._page_start, self._page = start, list(self.fetch(start, limit))
+            end = start + len(self._page)
+            if not (start <= index < end):
+                return None
+        return self._page[index - self._page_start]
+
+    def loaded_index(self, match):
+        """Index of the first loaded item for which match(item) is true, or None."""
+        for i, item in enumerate(self._page):
+            if match(item):
+                return self._page_start + i
+        return None
+
+    def replace_item(self, index, item):
+        """Swap a loaded item and re-bind its row if visible."""
+        if self._page_start <= index < self._page_start + len(self._page):
+            self._page[index - self._page_start] = item
+            self.refresh_index(index)
+
+    def render(self):
+        needed = self._view_height() // self.row_height + 2
+        if len(self.pool) < needed:
+            while len(self.pool) < needed:
+                self.pool.append(self.create_row(self.scrollable_frame))
+            # Slot mapping depends on pool size
+            for row in self.pool:
+                row.vindex = None
+
+        first = self.offset // self.row_height
+        shift = self.offset % self.row_height
+        n = len(self.pool)
+        for i in range(first, first + n):
+            row = self.pool[i % n]
+            item = self.item_at(i) if i < self.count else None
+            if item is None:
+                if row.vindex is not None or row.winfo_ismapped():
+                    row.place_forget()
+                    row.vindex = None
+                continue
+            if row.vindex != i:
+                self.bind_row(row, item, i)
+                row.vindex = i
+            row.place(x=0, y=(i - first) * self.row_height - shift, relwidth=1, height=self.row_height)
+
+    def refresh_index(self, index):
+        """Re-bind a single row if it is currently visible."""
+        if not self.pool or not (0 <= index < self.count):
+            return
+        row = self.pool[index % len(self.pool)]
+        if row.vindex == index:
+            item = self.item_at(index)
+            if item is not None:
+                self.bind_row(row, item, index)
+
 class HistoryItemRow(tk.Frame):
     def __init__(self, master, item_data, load_callback, delete_callback, index, **kwargs):
         bg_color = kwargs.get('bg', COLORS['bg'])
@@ -267,27 +403,19 @@ class HistoryItemRow(tk.Frame):
         self.load_callback = load_callback
         self.delete_callback = delete_callback
         self.index = index
+        self.vindex = None
         self.default_bg = bg_color
         self.hover_bg = COLORS.get('button_hover', '#333333')
         
         self.config(bg=self.default_bg, pady=8, padx=10)
         
-        # Extract data
-        url = item_data.get('url', '')
-        name = item_data.get('title') or url
-        if len(name) > 60: name = name[:57] + "..."
-        
-        exp_timestamp = extract_expiration(url)
-        remaining = get_remaining_time(exp_timestamp)
-        status_color = get_status_color(exp_timestamp) or COLORS['accent']
-        
         # 1. Status Dot (Canvas)
         self.dot_canvas = tk.Canvas(self, width=10, height=10, bg=self.default_bg, highlightthickness=0)
         self.dot_canvas.pack(side=tk.LEFT, padx=(0, 10))
-        self.dot_canvas.create_oval(2, 2, 8, 8, fill=status_color, outline="")
+        self.dot = self.dot_canvas.create_oval(2, 2, 8, 8, fill=COLORS['accent'], outline="")
         
         # 2. Title/URL
-        self.lbl_title = tk.Label(self, text=name, bg=self.default_bg, fg=COLORS['text'], 
+        self.lbl_title = tk.Label(self, text="", bg=self.default_bg, fg=COLORS['text'], 
                                  font=('Segoe UI', 9), anchor="w")
         self.lbl_title.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
@@ -296,9 +424,7 @@ class HistoryItemRow(tk.Frame):
         self.right_frame.pack(side=tk.RIGHT)
         
         # Time Label
-        time_text = remaining if remaining else ""
-        time_fg = status_color if remaining != "Expired" else "#666666"
-        self.lbl_time = tk.Label(self.right_frame, text=time_text, bg=self.default_bg, fg=time_fg,
+        self.lbl_time = tk.Label(self.right_frame, text="", bg=self.default_bg,
                                 font=('Segoe UI', 9))
         self.lbl_time.pack(side=tk.RIGHT, padx=(10, 0))
         
@@ -327,20 +453,44 @@ class HistoryItemRow(tk.Frame):
             widget.bind("<Enter>", self.on_enter)
             widget.bind("<Leave>", self.on_leave)
             
-        # Click to load
-        self.bind("<Button-1>", lambda e: self.load_callback(url))
-        self.lbl_title.bind("<Button-1>", lambda e: self.load_callback(url))
-        self.dot_canvas.bind("<Button-1>", lambda e: self.load_callback(url))
+        # Click to load (reads item_data so recycled rows load the right URL)
+        for widget in [self, self.lbl_title, self.dot_canvas]:
+            widget.bind("<Button-1>", lambda e: self.load_callback(self.item_data.get('url', '')))
+
+        self.bind_item(item_data, index)
+
+    def bind_item(self, item_data, index):
+        """Show another history item in this row (used when recycling)."""
+        self.item_data = item_data
+        self.index = index
+        
+        # Extract data
+        url = item_data.get('url', '')
+        name = item_data.get('title') or url
+        if len(name) > 60: name = name[:57] + "..."
+        
+        exp_timestamp = extract_expiration(url)
+        remaining = get_remaining_time(exp_timestamp)
+        status_color = get_status_color(exp_timestamp) or COLORS['accent']
+        
+        self.dot_canvas.itemconfig(self.dot, fill=status_color)
+        self.lbl_title.config(text=name)
+        
+        time_text = remaining if remaining else ""
+        time_fg = status_color if remaining != "Expired" else "#666666"
+        self.lbl_time.config(text=time_text, fg=time_fg)
+        
+        # A recycled row may still be in hover state
+        self._set_bg(self.default_bg)
+        self.actions_frame.pack_forget()
+
+    def _set_bg(self, color):
+        for widget in [self, self.lbl_title, self.lbl_time, self.right_frame, self.actions_frame,
+                       self.btn_copy, self.btn_delete, self.dot_canvas]:
+            widget.config(bg=color)
 
     def on_enter(self, event):
-        self.config(bg=self.hover_bg)
-        self.lbl_title.config(bg=self.hover_bg)
-        self.lbl_time.config(bg=self.hover_bg)
-        self.right_frame.config(bg=self.hover_bg)
-        self.actions_frame.config(bg=self.hover_bg)
-        self.btn_copy.config(bg=self.hover_bg)
-        self.btn_delete.config(bg=self.hover_bg)
-        self.dot_canvas.config(bg=self.hover_bg)
+        self._set_bg(self.hover_bg)
         
         # Show actions, hide time (or show both? Image shows time AND actions)
         # Image shows: [Title] ... [Time] [Copy] [Delete]
@@ -360,15 +510,7 @@ class HistoryItemRow(tk.Frame):
         height = self.winfo_height()
         
         if not (widget_x <= x <= widget_x + width and widget_y <= y <= widget_y + height):
-            self.config(bg=self.default_bg)
-            self.lbl_title.config(bg=self.default_bg)
-            self.lbl_time.config(bg=self.default_bg)
-            self.right_frame.config(bg=self.default_bg)
-            self.actions_frame.config(bg=self.default_bg)
-            self.btn_copy.config(bg=self.default_bg)
-            self.btn_delete.config(bg=self.default_bg)
-            self.dot_canvas.config(bg=self.default_bg)
-            
+            self._set_bg(self.default_bg)
             self.actions_frame.pack_forget()
             
     def copy_to_clipboard(self, event):
@@ -377,6 +519,9 @@ class HistoryItemRow(tk.Frame):
         # Optional: Flash feedback
 
 class HistoryPanel(tk.Frame):
+    ROW_HEIGHT = 36
+    EXPIRY_REFRESH_MS = 30000
+
     def __init__(self, master, load_callback, delete_callback, clear_callback):
         super().__init__(master, bg=COLORS['bg'])
         self.load_callback = load_callback
@@ -394,26 +539,45 @@ class HistoryPanel(tk.Frame):
         # Separator
         tk.Frame(self, bg="#333333", height=1).pack(fill=tk.X)
         
-        # Scrollable List
-        self.list_container = ScrollableFrame(self, bg=COLORS['bg'])
+        # Scrollable List (virtualized)
+        self.list_container = VirtualScrollableFrame(self, self.ROW_HEIGHT, self._create_row,
+                                                     lambda row, item, i: row.bind_item(item, i),
+                                                     bg=COLORS['bg'])
         self.list_container.pack(fill=tk.BOTH, expand=True)
+
+        # Remaining-time labels tick down, refresh only the visible rows
+        self.after(self.EXPIRY_REFRESH_MS, self._refresh_expiry)
+
+    def _create_row(self, parent):
+        row = HistoryItemRow(parent, {}, self.load_callback, self.delete_callback, -1, bg=COLORS['bg'])
+        # Bind mouse scroll to row and its children
+        self.list_container.bind_mouse_scroll(row)
+        self.list_container.bind_mouse_scroll(row.lbl_title)
+        self.list_container.bind_mouse_scroll(row.right_frame)
+        self.list_container.bind_mouse_scroll(row.lbl_time)
+        return row
         
+    def set_source(self, count, fetch_page):
+        """Show count entries, fetched a page at a time with fetch_page(offset, limit)."""
+        self.list_container.set_source(count, fetch_page)
+
     def update_history(self, history_items):
-        # Clear existing items
-        for widget in self.list_container.scrollable_frame.winfo_children():
-            widget.destroy()
-            
-        # Populate
-        for i, item in enumerate(history_items):
-            row = HistoryItemRow(self.list_container.scrollable_frame, item, 
-                               self.load_callback, self.delete_callback, i,
-                               bg=COLORS['bg'])
-            row.pack(fill=tk.X, expand=True)
-            # Bind mouse scroll to row and its children
-            self.list_container.bind_mouse_scroll(row)
-            self.list_container.bind_mouse_scroll(row.lbl_title)
-            self.list_container.bind_mouse_scroll(row.right_frame)
-            self.list_container.bind_mouse_scroll(row.lbl_time)
+        self.list_container.set_items(history_items)
+
+    def update_item(self, item):
+        """Update one entry in place (e.g. new position) without a full refresh."""
+        if not item:
+            return
+        url = item.get('url')
+        i = self.list_container.loaded_index(lambda cached: cached.get('url') == url)
+        if i is not None:
+            self.list_container.replace_item(i, item)
+
+    def _refresh_expiry(self):
+        for row in self.list_container.pool:
+            if row.vindex is not None:
+                self.list_container.refresh_index(row.vindex)
+        self.after(self.EXPIRY_REFRESH_MS, self._refresh_expiry)
 
 class LoadingSpinner:
     """
@@ -584,11 +748,19 @@ class LoadingSpinner:
         self.stop()
 
 class BufferedScale(tk.Canvas):
+    """
+    Seek / volume bar. Canvas items are created once and moved with coords();
+    set_progress / set_buffer only record values and schedule one idle redraw,
+    so any number of updates per frame cost a single batch of coords() calls.
+    """
+    RADIUS = 6
+    TRACK_H = 4
+
     def __init__(self, master, command=None, **kwargs):
         super().__init__(master, **kwargs)
         self.command = command
         self.progress = 0.0  # 0 to 100
-        self.buffer = 0.0    # 0 to 100
+        self.ranges = []     # buffered ranges [(start, end)], 0 to 100
         
         self.config(bg=COLORS['control_bg'], highlightthickness=0, height=20)
         self.bind('<Configure>', self.draw)
@@ -597,62 +769,90 @@ class BufferedScale(tk.Canvas):
         self.bind('<ButtonRelease-1>', self.on_release)
         
         self.is_dragging = False
+        self._redraw_job = None
+        self._shown = {}     # item id -> last coords, to skip no-op updates
+
+        # Persistent items, bottom to top
+        self._track = self.create_rectangle(0, 0, 0, 0, fill=COLORS['seekbar_bg'], outline="", tags="track")
+        self._buffer_items = []
+        self._progress_item = self.create_rectangle(0, 0, 0, 0, fill=COLORS['accent'], outline="")
+        self._thumb = self.create_oval(0, 0, 0, 0, fill='white', outline=COLORS['accent'], width=1)
+
+    @property
+    def buffer(self):
+        """End of the buffered range that starts at 0 (single-range callers)."""
+        return self.ranges[0][1] if self.ranges and self.ranges[0][0] <= 0 else 0.0
 
     def set_progress(self, value):
         if not self.is_dragging:
-            self.progress = max(0, min(100, value))
-            self.draw()
+            value = max(0, min(100, value))
+            if value != self.progress:
+                self.progress = value
+                self._schedule()
 
     def set_buffer(self, value):
-        self.buffer = max(0, min(100, value))
-        self.draw()
+        """Single buffered prefix [0, value]."""
+        value = max(0, min(100, value))
+        self.set_buffered_ranges([(0, value)] if value > 0 else [])
+
+    def set_buffered_ranges(self, ranges):
+        """Disjoint buffered ranges as (start, end) percentages."""
+        ranges = [(max(0, min(100, a)), max(0, min(100, b))) for a, b in ranges if b > a]
+        if ranges != self.ranges:
+            self.ranges = ranges
+            self._schedule()
+
+    def _schedule(self):
+        if self._redraw_job is None:
+            self._redraw_job = self.after_idle(self._redraw)
 
     def draw(self, event=None):
-        self.delete("all")
+        """Redraw now (also the <Configure> handler)."""
+        if self._redraw_job is not None:
+            self.after_cancel(self._redraw_job)
+        self._redraw()
+
+    def _geometry(self):
         w = self.winfo_width()
         h = self.winfo_height()
-        cy = h / 2
-        
-        # Track dimensions (Thinner for sleek look)
-        track_h = 4
-        y1 = cy - (track_h / 2)
-        y2 = cy + (track_h / 2)
-        
-        # Padding for thumb radius
-        radius = 6
-        padding = radius + 1
-        
-        # Available width for track
-        track_w = w - (padding * 2)
-        if track_w < 0: track_w = 0
+        padding = self.RADIUS + 1
+        track_w = max(0, w - (padding * 2))
+        return padding, track_w, h / 2
+
+    def _move(self, item, *coords):
+        if self._shown.get(item) != coords:
+            self._shown[item] = coords
+            self.coords(item, *coords)
+
+    def _redraw(self):
+        self._redraw_job = None
+        padding, track_w, cy = self._geometry()
+        y1 = cy - (self.TRACK_H / 2)
+        y2 = cy + (self.TRACK_H / 2)
         
         # Background track
-        self.create_rectangle(padding, y1, padding + track_w, y2, fill=COLORS['seekbar_bg'], outline="", tags="track")
-        
-        # Buffer track
-        if self.buffer > 0:
-            bw = (self.buffer / 100) * track_w
-            self.create_rectangle(padding, y1, padding + bw, y2, fill=COLORS['text_gray'], outline="")
+        self._move(self._track, padding, y1, padding + track_w, y2)
+        
+        # Buffered ranges (pool grows as needed, unused items collapse to nothing)
+        while len(self._buffer_items) < len(self.ranges):
+            item = self.create_rectangle(0, 0, 0, 0, fill=COLORS['text_gray'], outline="")
+            self.tag_raise(item, self._track)
+            self._buffer_items.append(item)
+        for i, item in enumerate(self._buffer_items):
+            if i < len(self.ranges):
+                a, b = self.ranges[i]
+                self._move(item, padding + (a / 100) * track_w, y1, padding + (b / 100) * track_w, y2)
+            else:
+                self._move(item, 0, 0, 0, 0)
             
-        # Progress track
+        # Progress track + thumb
+        px = padding + (self.progress / 100) * track_w
         if self.progress > 0:
-            pw = (self.progress / 100) * track_w
-            self.create_rectangle(padding, y1, padding + pw, y2, fill=COLORS['accent'], outline="")
-            
-            # Thumb (Circle)
-            tx1 = padding + pw - radius
-            tx2 = padding + pw + radius
-            ty1 = cy - radius
-            ty2 = cy + radius
-            
-            self.create_oval(tx1, ty1, tx2, ty2, fill='white', outline=COLORS['accent'], width=1)
+            self._move(self._progress_item, padding, y1, px, y2)
         else:
-            # Draw thumb at 0 position
-            tx1 = padding - radius
-            tx2 = padding + radius
-            ty1 = cy - radius
-            ty2 = cy + radius
-            self.create_oval(tx1, ty1, tx2, ty2, fill='white', outline=COLORS['accent'], width=1)
+            self._move(self._progress_item, 0, 0, 0, 0)
+        r = self.RADIUS
+        self._move(self._thumb, px - r, cy - r, px + r, cy + r)
 
     def on_click(self, event):
         self.is_dragging = True
@@ -668,10 +868,7 @@ class BufferedScale(tk.Canvas):
             self.command(self.progress)
 
     def update_from_event(self, event):
-        w = self.winfo_width()
-        radius = 6
-        padding = radius + 1
-        track_w = w - (padding * 2)
+        padding, track_w, _ = self._geometry()
         
         if track_w > 0:
             # Adjust x to be relative to the track start
@@ -680,7 +877,7 @@ class BufferedScale(tk.Canvas):
             x = max(0, min(track_w, x))
             
             self.progress = (x / track_w) * 100
-            self.draw()
+            self._schedule()
             # Optional: Call command while dragging for live seek
             # if self.command: self.command(self.progress)
 
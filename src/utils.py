@@ -1,12 +1,19 @@
 import json
 import os
-from datetime import datetime
 import time
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs
 
+from .config import HISTORY_SETTINGS
+from .history_store import get_store
+from .history_db import get_db_store
+
 HISTORY_FILE = "history.json"
+HISTORY_DB_FILE = "history.db"
 SETTINGS_FILE = "settings.json"
 
+_history_backend = None
+
 def format_time(secs):
     """Format seconds into HH:MM:SS string."""
     if secs is None:
@@ -20,6 +27,7 @@ def format_time(secs):
     s = secs % 60
     return f"{h:02d}:{m:02d}:{s:02d}"
 
+@lru_cache(maxsize=4096)
 def extract_expiration(url):
     """Extract expiration timestamp from URL."""
     try:
@@ -70,79 +78,53 @@ def get_status_color(timestamp):
     except:
         return None
 
+def _history_store():
+    """Return the history backend selected in settings.json."""
+    global _history_backend
+    if _history_backend is None:
+        settings = load_settings()
+        limit = settings.get('history_limit', HISTORY_SETTINGS['limit'])
+        if settings.get('history_backend', HISTORY_SETTINGS['backend']) == 'sqlite':
+            _history_backend = get_db_store(HISTORY_DB_FILE, max_entries=limit, migrate_from=HISTORY_FILE)
+        else:
+            _history_backend = get_store(HISTORY_FILE, max_entries=limit)
+    return _history_backend
+
 def load_history():
-    """Load playback history from JSON file."""
-    if not os.path.exists(HISTORY_FILE):
-        return []
-    try:
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
+    """Load playback history (newest first)."""
+    return _history_store().load()
 
 def save_history(url, name=None):
     """Save a URL to history, avoiding duplicates at the top."""
-    history = load_history()
-    
-    # Check for existing position
-    last_pos = 0
-    for h in history:
-        if h['url'] == url:
-            last_pos = h.get('last_position', 0)
-            break
-            
-    # Create entry
-    entry = {
-        "url": url,
-        "name": name or url,
-        "timestamp": datetime.now().isoformat(),
-        "last_position": last_pos
-    }
-    
-    # Remove existing entry with same URL if exists
-    history = [h for h in history if h['url'] != url]
-    
-    # Add to top
-    history.insert(0, entry)
-    
-    # Limit to 50 entries
-    history = history[:50]
-    
-    try:
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2)
-    except Exception as e:
-        print(f"Error saving history: {e}")
+    _history_store().add(url, name)
 
 def update_history_progress(url, position):
     """Update the last playback position for a URL."""
-    history = load_history()
-    found = False
-    for item in history:
-        if item['url'] == url:
-            item['last_position'] = position
-            item['timestamp'] = datetime.now().isoformat()
-            found = True
-            break
-    
-    if found:
-        write_history(history)
+    _history_store().update_position(url, position)
 
 def get_history_item(url):
     """Get history item by URL."""
-    history = load_history()
-    for item in history:
-        if item['url'] == url:
-            return item
-    return None
+    return _history_store().get(url)
+
+def get_history_page(offset, limit):
+    """Get a slice of history (newest first) without loading everything."""
+    return _history_store().page(offset, limit)
+
+def count_history():
+    """Number of entries in history."""
+    return len(_history_store())
+
+def remove_history(url):
+    """Remove a single URL from history."""
+    _history_store().remove(url)
 
 def write_history(history):
     """Write the entire history list to file."""
-    try:
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2)
-    except Exception as e:
-        print(f"Error saving history: {e}")
+    _history_store().replace_all(history)
+
+def flush_history():
+    """Persist pending history changes immediately (e.g. on exit)."""
+    _history_store().close()
 
 def get_unique_filename(base_path, filename):
     """Get a unique filename by appending a counter if file exists."""
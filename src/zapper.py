@@ -0,0 +1,164 @@
+import time
+
+from .cache_controller import available_memory, MB
+from .player_core import MpvPlayer
+
+# -------------------------------------------------
+#  Channel zapping with standby players
+# -------------------------------------------------
+#  One or two extra MpvPlayer instances, each rendering into its own video
+#  surface stacked below the visible one, open the neighbouring channels
+#  paused and muted with a small cache. Zapping to a prepared channel swaps
+#  the libmpv instances (MpvPlayer.swap_core) and the surfaces' stacking
+#  order instead of opening the stream, so the first frame is already
+#  decoded. The previous channel stays warm in the freed slot.
+#  Everything here runs on the UI thread, except the ready watchers.
+
+MAX_STANDBY = 2
+STANDBY_BACK_MB = 2         # back cache of a standby player
+STANDBY_OVERHEAD_MB = 64    # libmpv, decoder and video output per instance (1080p)
+
+
+def standby_capacity(standby_players, standby_cache_mb, memory_ceiling_mb):
+    """How many standby players fit under the ceiling and in half of the free RAM."""
+    per_player = standby_cache_mb + STANDBY_BACK_MB + STANDBY_OVERHEAD_MB
+    count = min(standby_players, MAX_STANDBY, memory_ceiling_mb // per_player)
+    free = available_memory()
+    if free is not None:
+        count = min(count, int(free / MB / 2) // per_player)
+    return max(0, count)
+
+
+class StandbySlot:
+    __slots__ = ('player', 'surface', 'url', 'loaded_at', 'ready')
+
+    def __init__(self, player, surface):
+        self.player = player
+        self.surface = surface
+        self.url = None
+        self.loaded_at = 0.0
+        self.ready = False      # first frame decoded
+
+    def age(self):
+        return time.monotonic() - self.loaded_at
+
+
+class ChannelZapper:
+    """
+    make_surface() must return a new, lowered Tk frame inside the video area.
+    player_options are extra MpvPlayer() options shared by all standby players.
+    """
+
+    def __init__(self, make_surface, standby_players=1, standby_cache_mb=16,
+                 memory_ceiling_mb=256, max_age=30, player_options=None):
+        self.make_surface = make_surface
+        self.standby_cache_mb = standby_cache_mb
+        self.max_age = max_age
+        self.capacity = standby_capacity(standby_players, standby_cache_mb, memory_ceiling_mb)
+        self.player_options = dict(player_options or {})
+        self.slots = []
+        self.headers = None
+        self.user_agent = None
+
+    def start(self):
+        """Create the standby players. Returns how many could be started."""
+        for _ in range(self.capacity):
+            surface = self.make_surface()
+            try:
+                player = MpvPlayer(wid=surface.winfo_id(), mute=True, pause=True,
+                                   demuxer_max_bytes=f"{self.standby_cache_mb}MiB",
+                                   demuxer_max_back_bytes=f"{STANDBY_BACK_MB}MiB",
+                                   **self.player_options)
+            except Exception as e:
+                surface.destroy()
+                print(f"Standby player error: {e}")
+                break
+            slot = StandbySlot(player, surface)
+            player.observe('duration')
+            player.watch('time-pos', lambda name, value, slot=slot: self._on_time_pos(slot, value))
+            self.slots.append(slot)
+        return len(self.slots)
+
+    def stop(self):
+        for slot in self.slots:
+            try:
+                slot.player.terminate()
+            except Exception:
+                pass
+            slot.surface.destroy()
+        self.slots = []
+
+    def _on_time_pos(self, slot, value):
+        # mpv event thread
+        if value is not None:
+            slot.ready = True
+
+    @staticmethod
+    def neighbours(channels, index, direction, count):
+        """URLs to keep warm: the next channel in the zap direction first."""
+        n = len(channels)
+        if n < 2 or count <= 0:
+            return []
+        wanted = [channels[(index + direction) % n]]
+        if count > 1 and n > 2:
+            wanted.append(channels[(index - direction) % n])
+        return wanted
+
+    def prepare(self, channels, index, direction=1, headers=None, user_agent=None):
+        """Point the standby players at the neighbours of channels[index]."""
+        self.headers = headers
+        self.user_agent = user_agent
+        wanted = self.neighbours(channels, index, direction, len(self.slots))
+        missing = [url for url in wanted if not any(s.url == url for s in self.slots)]
+        for slot in self.slots:
+            if not missing:
+                break
+            if slot.url in wanted:
+                continue
+            self._load(slot, missing.pop(0))
+
+    def _load(self, slot, url):
+        slot.url = url
+        slot.ready = False
+        slot.loaded_at = time.monotonic()
+        slot.player.mpv.pause = True
+        slot.player.play(url, headers=self.headers, user_agent=self.user_agent, use_proxy=False)
+
+    def take(self, url):
+        """The standby slot holding url with its first frame ready, or None."""
+        for slot in self.slots:
+            if slot.url == url and slot.ready:
+                return slot
+        return None
+
+    def swap(self, player, surface, slot, old_url):
+        """
+        Bind the standby instance in slot to the visible surface: player (the
+        GUI's MpvPlayer) gets slot's libmpv instance, slot keeps the previous
+        channel. Returns the surface that is now visible.
+        """
+        player.swap_core(slot.player)
+        visible = slot.surface
+        visible.lift(surface)
+        surface.lower()
+        slot.surface = surface
+        slot.url = old_url
+        slot.loaded_at = time.monotonic()
+        # The demoted channel idles quietly with a small cache
+        try:
+            slot.player.mpv.pause = True
+            slot.player.mpv.mute = True
+            slot.player.apply_cache_settings(self.standby_cache_mb, STANDBY_BACK_MB)
+        except Exception as e:
+            print(f"Standby demote error: {e}")
+        return visible
+
+    def rewarm(self):
+        """Reload live standbys that have been paused longer than max_age."""
+        for slot in self.slots:
+            if slot.url and slot.ready and slot.age() > self.max_age \
+                    and slot.player.get_state('duration') is None:
+                self._load(slot, slot.url)
+
+    def memory_estimate_mb(self):
+        return len(self.slots) * (self.standby_cache_mb + STANDBY_BACK_MB + STANDBY_OVERHEAD_MB)